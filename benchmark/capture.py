@@ -0,0 +1,39 @@
+import time
+
+import cv2
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+from shenzhen_solitaire.capture import FileCapture, RegionCapture
+from shenzhen_solitaire.card_detection.board_parser import parse_board
+
+from .timing import benchmark_files
+
+
+def main() -> None:
+    conf = configuration.load("test_config.zip", compiled=True)
+    # Every benchmark is captured twice, once as png and once in memory
+    screen = FileCapture([path for path in benchmark_files for _ in range(2)])
+    region = RegionCapture.for_configuration(screen, conf)
+    print("png\tregion\tparse\tequal")
+    for benchmark in benchmark_files:
+        # Like saving a screenshot as png and reading it again
+        start_time = time.time()
+        _, encoded = cv2.imencode(".png", screen.capture())
+        image = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+        png_duration = time.time() - start_time
+
+        start_time = time.time()
+        region_image = region.capture()
+        region_duration = time.time() - start_time
+
+        start_time = time.time()
+        board = parse_board(region_image, conf)
+        parse_duration = time.time() - start_time
+        print(
+            f"{png_duration:>5.3f}\t{region_duration:>5.3f}\t{parse_duration:>5.3f}\t"
+            f"{board.to_json() == parse_board(image, conf).to_json()}\t{benchmark}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import time
+
+import cv2
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+from shenzhen_solitaire.card_detection.board_parser import (
+    ReparseStats,
+    parse_board,
+    reparse_board,
+)
+
+from .timing import benchmark_files
+
+
+def main() -> None:
+    conf = configuration.load("test_config.zip", compiled=True)
+    images = [cv2.imread(benchmark) for benchmark in benchmark_files]
+    print("full\tpartial\tchanged\tread\tequal")
+    for index, previous_image in enumerate(images):
+        previous_board = parse_board(previous_image, conf)
+        # One column of the next picture, like after a move
+        image = previous_image.copy()
+        next_image = images[(index + 1) % len(images)]
+        image[560:, 720:870] = next_image[560:, 720:870]
+
+        start_time = time.time()
+        board = parse_board(image, conf)
+        full_duration = time.time() - start_time
+        stats = ReparseStats()
+        partial_board = reparse_board(
+            previous_image, previous_board, image, conf, stats=stats
+        )
+        print(
+            f"{full_duration:>5.3f}\t{stats.duration:>5.3f}\t"
+            f"{stats.changed:>3}/{stats.squares}\t{stats.classified:>3}\t"
+            f"{partial_board.to_json() == board.to_json()}\t{benchmark_files[index]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import contextlib
+import io
+import time
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+import shenzhen_solitaire.clicker as clicker
+from shenzhen_solitaire.board import Board
+from shenzhen_solitaire.card_detection.board_parser import parse_board
+from shenzhen_solitaire.clicker.simulation import SimulatedInput
+from shenzhen_solitaire.solver import action_optimization, solver
+from shenzhen_solitaire.solver.board_actions import Action
+
+from .timing import benchmark_files
+
+SOLVE_TIMEOUT = 10
+# Waits of the assistant around the click on the new game button
+NEW_GAME_DURATION = 2 + clicker.CLICK_DURATION + clicker.DRAGON_WAIT + 7
+
+Solve = Callable[[Board], Optional[List[Action]]]
+
+
+def _solve(board: Board) -> Optional[List[Action]]:
+    return next(solver.solve(board, timeout=SOLVE_TIMEOUT), None)
+
+
+def _best_first(board: Board) -> Optional[List[Action]]:
+    return next(solver.best_first_solve(board, timeout=SOLVE_TIMEOUT), None)
+
+
+def _optimized(solve: Solve) -> Solve:
+    def _solve_optimized(board: Board) -> Optional[List[Action]]:
+        solution = solve(board)
+        if solution is None:
+            return None
+        return action_optimization.optimize(board, solution)
+
+    return _solve_optimized
+
+
+SOLVERS: List[Tuple[str, Solve]] = [
+    ("solve", _solve),
+    ("solve+optimize", _optimized(_solve)),
+    ("best_first", _best_first),
+    ("best_first+optimize", _optimized(_best_first)),
+]
+
+
+def main() -> None:
+    conf = configuration.load("test_config.zip", compiled=True)
+    boards = [parse_board(cv2.imread(benchmark), conf) for benchmark in benchmark_files]
+    print("solver\t\t\twon\tsolve\tplay\tgames/h")
+    for name, solve in SOLVERS:
+        won = 0
+        total_duration = 0.0
+        solve_duration = 0.0
+        play_duration = 0.0
+        for board in boards:
+            start_time = time.time()
+            solution = solve(board)
+            solve_duration += time.time() - start_time
+            total_duration += time.time() - start_time + NEW_GAME_DURATION
+            if solution is None:
+                continue
+            game = SimulatedInput(board, conf)
+            # The clicker prints every action
+            with contextlib.redirect_stdout(io.StringIO()):
+                clicker.handle_actions(
+                    [action.to_json_struct() for action in solution],
+                    (0, 0),
+                    conf,
+                    backend=game,
+                )
+            won += game.board.solved()
+            play_duration += game.time
+            total_duration += game.time
+        print(
+            f"{name:<20}\t{won}/{len(boards)}\t"
+            f"{solve_duration / len(boards):>5.2f}\t"
+            f"{play_duration / len(boards):>5.1f}\t"
+            f"{3600 * won / total_duration:>5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
-import multiprocessing
 from pathlib import Path
 
+import shenzhen_solitaire.card_detection.configuration as configuration
+from shenzhen_solitaire.card_detection.parser_service import ParserService
+
 from .util import run_benchmark
 
 benchmark_files = [
@@ -14,12 +16,13 @@ benchmark_files = [
 
 
 def main() -> None:
-    with multiprocessing.Pool() as pool:
-        result = pool.imap_unordered(
+    conf = configuration.load("test_config.zip", compiled=True)
+    # Workers share the configuration instead of loading it for every benchmark
+    with ParserService(conf) as service:
+        for _ in service.map(
             run_benchmark, [Path(benchmark) for benchmark in benchmark_files]
-        )
-        pool.close()
-        pool.join()
+        ):
+            pass
 
 
 if __name__ == "__main__":
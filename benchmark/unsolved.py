@@ -1,8 +1,8 @@
-import multiprocessing
-from pathlib import Path
+import cv2
 
-
-from .util import run_benchmark
+import shenzhen_solitaire.card_detection.configuration as configuration
+from shenzhen_solitaire.card_detection.board_parser import parse_board
+from shenzhen_solitaire.solver.batch import solve_many
 
 benchmark_files = [
     "pictures/unsolved/tmp1ern14si.png",
@@ -20,17 +20,13 @@ benchmark_files = [
 ]
 
 
-def runner(benchmark: Path) -> None:
-    run_benchmark(benchmark, timeout=60)
-
-
 def main() -> None:
-    with multiprocessing.Pool() as pool:
-        result = pool.imap_unordered(
-            runner, [Path(benchmark) for benchmark in benchmark_files]
-        )
-        pool.close()
-        pool.join()
+    conf = configuration.load("test_config.zip")
+    boards = [parse_board(cv2.imread(benchmark), conf) for benchmark in benchmark_files]
+    for index, solution, stats in solve_many(boards, timeout=60):
+        solved_string = "[" + ("Solved" if solution is not None else "Unsolved") + "]"
+        print(f"{solved_string:<10} {benchmark_files[index]}")
+        print(f"{stats.duration:>5.2f}\t{stats.nodes:>8}")
 
 
 if __name__ == "__main__":
@@ -3,9 +3,9 @@ from pathlib import Path
 
 import cv2
 
-import shenzhen_solitaire.card_detection.configuration as configuration
 import shenzhen_solitaire.solver.solver as solver
 from shenzhen_solitaire.card_detection.board_parser import parse_board
+from shenzhen_solitaire.card_detection.configuration import Configuration
 from typing import Callable, List, Tuple
 
 
@@ -39,16 +39,15 @@ class BenchmarkTimer:
         return [x[1] for x in self.timing]
 
 
-def run_benchmark(benchmark: Path, *, timeout: float = 10) -> None:
+def run_benchmark(
+    conf: Configuration, benchmark: Path, *, timeout: float = 10
+) -> None:
     result = ""
     result += f"{benchmark}:\n"
     my_timer = BenchmarkTimer()
     with my_timer.stopwatch("Load image"):
         image = cv2.imread(str(benchmark))
 
-    with my_timer.stopwatch("Load configuration"):
-        conf = configuration.load("test_config.zip")
-
     with my_timer.stopwatch("Parse board"):
         board = parse_board(image, conf)
 
@@ -2,7 +2,7 @@
 import enum
 import itertools
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 import json
 
 class SpecialCard(enum.Enum):
@@ -18,6 +18,10 @@ class SpecialCard(enum.Enum):
         return int(self.value)
 
 
+# Number card identifiers start after the special cards, so they stay unique
+_NUMBER_CARD_OFFSET = len(SpecialCard)
+
+
 @dataclass(frozen=True)
 class NumberCard:
     """Different number cards"""
@@ -34,7 +38,7 @@ class NumberCard:
 
     def identifier(self) -> int:
         """Returns unique identifier representing this card"""
-        return int(self.number - 1 + 9 ** int(self.suit.value))
+        return int(_NUMBER_CARD_OFFSET + self.number - 1 + 9 * int(self.suit.value))
 
     def __repr__(self) -> str:
         return f"NumberCard({self.suit.name} {self.number})"
@@ -72,6 +76,28 @@ def _goal_card_to_str(card: Optional[NumberCard]):
         return None
     return {"value": card.number, "suit": card.suit.name}
 
+
+def _number_card_from_str(card: Dict[str, Any]) -> NumberCard:
+    return NumberCard(NumberCard.Suit[card["suit"]], card["value"])
+
+
+def _field_card_from_str(card: Any) -> Card:
+    if card == "Hua":
+        return SpecialCard.Hua
+    if "Special" in card:
+        return SpecialCard[card["Special"]]
+    return _number_card_from_str(card["Number"])
+
+
+def _bunker_card_from_str(
+    card: Any,
+) -> Union[Tuple[SpecialCard, int], Optional[Card]]:
+    if card == "Empty":
+        return None
+    if "Blocked" in card:
+        return (SpecialCard[card["Blocked"]], 0)
+    return _field_card_from_str(card["Stashed"])
+
 class Board:
     """Solitaire board"""
 
@@ -80,7 +106,7 @@ class Board:
     MAX_COLUMN_SIZE = 8
 
     def __init__(self) -> None:
-        self.field: List[List[Card]] = [[]] * Board.MAX_COLUMN_SIZE
+        self.field: List[List[Card]] = [[] for _ in range(Board.MAX_COLUMN_SIZE)]
         self.bunker: List[Union[Tuple[SpecialCard, int], Optional[Card]]] = [None] * 3
         self.goal: List[Optional[NumberCard]] = [None] * 3
         self.flower_gone: bool = False
@@ -113,7 +139,7 @@ class Board:
 
     def solved(self) -> bool:
         """Returns true if the board is solved"""
-        if any(x.number != 9 for x in self.goal if x is not None):
+        if any(x is None or x.number != 9 for x in self.goal):
             return False
         if any(not isinstance(x, tuple) for x in self.bunker):
             return False
@@ -217,3 +243,19 @@ class Board:
             "goal": [_goal_card_to_str(card) for card in self.goal],
         }
         return json.dumps(mystruct)
+
+    @staticmethod
+    def from_json(json_string: str) -> "Board":
+        """Parse a board in the format of `to_json`"""
+        mystruct = json.loads(json_string)
+        result = Board()
+        result.field = [
+            [_field_card_from_str(card) for card in row] for row in mystruct["field"]
+        ]
+        result.flower_gone = mystruct["hua_set"]
+        result.bunker = [_bunker_card_from_str(card) for card in mystruct["bunker"]]
+        result.goal = [
+            None if card is None else _number_card_from_str(card)
+            for card in mystruct["goal"]
+        ]
+        return result
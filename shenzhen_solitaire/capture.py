@@ -0,0 +1,279 @@
+"""Contains backends to capture the game from the screen"""
+import abc
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .board import Board
+from .card_detection import adjustment
+from .card_detection.board_parser import CHANGE_THRESHOLD
+from .card_detection.configuration import Configuration
+
+# Region of the screen as (x, y, width, height), relative to the game
+Region = Tuple[int, int, int, int]
+
+# Pixels captured around the squares of the configuration,
+# covers the search padding of the parser and moved boards
+REGION_MARGIN = 16
+
+# Seconds between two captures while waiting for the screen
+POLL_INTERVAL = 0.02
+# Number of polls without change, after which the screen has settled
+SETTLE_POLLS = 2
+
+
+class CaptureBackend(abc.ABC):
+    """Source of screenshots of the game"""
+
+    @abc.abstractmethod
+    def capture(self, region: Optional[Region] = None) -> np.ndarray:
+        """Returns a BGR image of region, of the whole game without region"""
+
+
+class ScreenCapture(CaptureBackend):
+    """Captures the screen with pyautogui, the game is at offset and has size"""
+
+    def __init__(self, offset: Tuple[int, int], size: Tuple[int, int]) -> None:
+        self.offset = offset
+        self.size = size
+
+    def capture(self, region: Optional[Region] = None) -> np.ndarray:
+        import pyautogui
+
+        x, y, width, height = region if region is not None else (0, 0, *self.size)
+        screenshot = pyautogui.screenshot(
+            region=(x + self.offset[0], y + self.offset[1], width, height)
+        )
+        # Converted in memory, without encoding the screenshot as a picture
+        return cv2.cvtColor(np.asarray(screenshot.convert("RGB")), cv2.COLOR_RGB2BGR)
+
+
+class ArrayCapture(CaptureBackend):
+    """Returns given images as screenshots, to run without a screen
+
+    Every capture returns the next image, the last image stays on the screen.
+    """
+
+    def __init__(self, images: Sequence[np.ndarray]) -> None:
+        assert images
+        self.images = list(images)
+        self.captures = 0
+
+    def show(self, image: np.ndarray) -> None:
+        """Put image on the screen, it is returned by all further captures"""
+        self.images = [image]
+        self.captures = 0
+
+    def capture(self, region: Optional[Region] = None) -> np.ndarray:
+        image = self.images[min(self.captures, len(self.images) - 1)]
+        self.captures += 1
+        if region is None:
+            return image.copy()
+        x, y, width, height = region
+        return image[y : y + height, x : x + width].copy()
+
+
+class FileCapture(ArrayCapture):
+    """Returns the pictures of files as screenshots, see `ArrayCapture`
+
+    The files are read once, when the backend is created.
+    """
+
+    def __init__(self, paths: Sequence[str]) -> None:
+        images = [cv2.imread(str(path)) for path in paths]
+        assert all(image is not None for image in images)
+        super().__init__(images)
+
+
+def _grid_region(
+    adj: adjustment.Adjustment, columns: int, rows: int
+) -> Tuple[int, int, int, int]:
+    """Returns the corners of the squares of a grid, as (left, top, right, bottom)"""
+    first = adjustment.get_square(adj, 0, 0)
+    last = adjustment.get_square(adj, columns - 1, rows - 1)
+    return (
+        min(first[0], last[0]),
+        min(first[1], last[1]),
+        max(first[2], last[2]),
+        max(first[3], last[3]),
+    )
+
+
+def board_region(conf: Configuration, margin: int = REGION_MARGIN) -> Region:
+    """Returns the region of the game, that the parser reads with conf"""
+    grids = [
+        _grid_region(conf.field_adjustment, Board.MAX_COLUMN_SIZE, Board.MAX_ROW_SIZE),
+        _grid_region(conf.border_adjustment, Board.MAX_COLUMN_SIZE, Board.MAX_ROW_SIZE),
+        _grid_region(conf.bunker_adjustment, 3, 1),
+        _grid_region(conf.goal_adjustment, 3, 1),
+        _grid_region(conf.hua_adjustment, 1, 1),
+        _grid_region(conf.special_button_adjustment, 1, 3),
+    ]
+    left = max(min(grid[0] for grid in grids) - margin, 0)
+    top = max(min(grid[1] for grid in grids) - margin, 0)
+    right = max(grid[2] for grid in grids) + margin
+    bottom = max(grid[3] for grid in grids) + margin
+    return (left, top, right - left, bottom - top)
+
+
+class RegionCapture(CaptureBackend):
+    """Captures only a region of the game with another backend
+
+    The region is placed at its position in a black image,
+    so screenshots can be parsed as if the whole game was captured.
+    """
+
+    def __init__(self, backend: CaptureBackend, region: Region) -> None:
+        self.backend = backend
+        self.region = region
+
+    @staticmethod
+    def for_configuration(
+        backend: CaptureBackend, conf: Configuration, margin: int = REGION_MARGIN
+    ) -> "RegionCapture":
+        """Returns a capture of the region the parser reads, see `board_region`"""
+        return RegionCapture(backend, board_region(conf, margin))
+
+    def capture(self, region: Optional[Region] = None) -> np.ndarray:
+        if region is not None:
+            return self.backend.capture(region)
+        x, y = self.region[:2]
+        captured = self.backend.capture(self.region)
+        # The backend can return less at the edge of the screen
+        height, width = captured.shape[:2]
+        result = np.zeros((y + height, x + width, 3), dtype=np.uint8)
+        result[y : y + height, x : x + width] = captured
+        return result
+
+
+def _bounding_region(regions: Sequence[Region]) -> Region:
+    left = min(region[0] for region in regions)
+    top = min(region[1] for region in regions)
+    right = max(region[0] + region[2] for region in regions)
+    bottom = max(region[1] + region[3] for region in regions)
+    return (left, top, right - left, bottom - top)
+
+
+@dataclass
+class WaitStats:
+    """Counts of waits for the screen
+
+    `timeouts` counts waits which ended by their timeout,
+    `duration` is the time spent waiting, in seconds.
+    """
+
+    waits: int = 0
+    timeouts: int = 0
+    duration: float = 0.0
+
+
+class ScreenWait:
+    """Waits until the screen is ready, instead of sleeping for fixed durations
+
+    `mark` remembers small regions of the screen before an input, `wait` polls
+    them until they differ from it and then stay the same for some polls,
+    e.g. until the card dropped on a column stopped moving.
+    """
+
+    def __init__(
+        self,
+        backend: CaptureBackend,
+        *,
+        poll_interval: float = POLL_INTERVAL,
+        settle_polls: int = SETTLE_POLLS,
+        threshold: float = CHANGE_THRESHOLD,
+        stats: Optional[WaitStats] = None,
+    ) -> None:
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.settle_polls = settle_polls
+        self.threshold = threshold
+        self.stats = stats
+        # Bounds of the marked regions and their capture
+        self._marked: Optional[Tuple[Region, np.ndarray]] = None
+
+    def mark(self, regions: Sequence[Region]) -> None:
+        """Remember the regions of the screen, the next waits for the same regions
+        compare them to it
+
+        Only the bounds of the regions are captured, nothing without regions.
+        """
+        if not regions:
+            self._marked = None
+            return
+        bounds = _bounding_region(regions)
+        self._marked = (bounds, self.backend.capture(bounds))
+
+    def _differs(
+        self,
+        first: np.ndarray,
+        second: np.ndarray,
+        regions: Sequence[Region],
+        bounds: Region,
+    ) -> bool:
+        """Returns if any region differs between two captures of bounds"""
+        for x, y, width, height in regions:
+            top = y - bounds[1]
+            left = x - bounds[0]
+            first_square = first[top : top + height, left : left + width]
+            second_square = second[top : top + height, left : left + width]
+            if float(cv2.absdiff(first_square, second_square).mean()) > self.threshold:
+                return True
+        return False
+
+    def wait(
+        self,
+        regions: Sequence[Region],
+        timeout: float,
+        *,
+        changed: bool = True,
+        settle_polls: Optional[int] = None,
+    ) -> bool:
+        """Wait until the regions have settled, at most timeout seconds
+
+        With `changed`, regions first have to differ from the marked screen,
+        or from the first poll if these regions were not marked.
+        Returns False if the wait ended by the timeout,
+        e.g. because an input was missed and nothing changed.
+        Without regions, there is nothing to wait for.
+        """
+        if not regions:
+            return True
+        if settle_polls is None:
+            settle_polls = self.settle_polls
+        start_time = time.monotonic()
+        bounds = _bounding_region(regions)
+        reference = None
+        if self._marked is not None and self._marked[0] == bounds:
+            reference = self._marked[1]
+        previous = None
+        stable_polls = 0
+        seen_change = not changed
+        settled = False
+        while True:
+            current = self.backend.capture(bounds)
+            if reference is None:
+                reference = current
+            if not seen_change:
+                seen_change = self._differs(reference, current, regions, bounds)
+            elif previous is not None and not self._differs(
+                previous, current, regions, bounds
+            ):
+                stable_polls += 1
+            else:
+                stable_polls = 0
+            previous = current
+            if seen_change and stable_polls >= settle_polls:
+                settled = True
+                break
+            if time.monotonic() - start_time >= timeout:
+                break
+            time.sleep(self.poll_interval)
+        if self.stats is not None:
+            self.stats.waits += 1
+            self.stats.timeouts += not settled
+            self.stats.duration += time.monotonic() - start_time
+        return settled
@@ -1,50 +1,103 @@
 """Contains parse_board function"""
 
-import copy
-import itertools
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import threading
+import time
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
 
 import cv2
 import numpy as np
 import json
 
 from ..board import Board, Card, NumberCard, SpecialCard
-from . import adjustment, card_finder
+from . import adjustment, card_finder, decoding, registration
 from .configuration import ButtonState, Configuration
+from .template_matching import TemplateStack, downsample, match_each
 
+# Parses running in threads share the statistics of coarse to fine matching
+_STATS_LOCK = threading.Lock()
 
-def grouper(
-    iterable: Iterable[Any], groupsize: int, fillvalue: Any = None
-) -> Iterable[Iterable[Any]]:
-    "Collect data into fixed-length chunks or blocks"
-    args = [iter(iterable)] * groupsize
-    return itertools.zip_longest(*args, fillvalue=fillvalue)
+
+@dataclass
+class RefinementStats:
+    """Counts of squares matched coarse to fine
+
+    `changed` counts squares where the full resolution matching chose another
+    card than the coarse matching, `wrong` counts squares where the card
+    differs from matching all templates at full resolution,
+    it is only counted with `CoarseToFine.verify`.
+    Other templates of the same card are not counted, but squares without a card,
+    like empty bunker slots, are, although their card is not used.
+    """
+
+    squares: int = 0
+    changed: int = 0
+    wrong: int = 0
+
+
+@dataclass
+class CoarseToFine:
+    """Settings to match the catalogue coarse to fine
+
+    All templates are matched on grayscale squares, downsampled by `downsample`,
+    only the `top_k` best templates are matched on the full resolution squares.
+    If `stats` is given, it is updated with every match,
+    with `verify` all templates are matched at full resolution again to count mistakes.
+
+    This is an experimental tuning aid and off by default,
+    on the pictures of the repository it is barely faster than matching all templates.
+    """
+
+    top_k: int = 3
+    downsample: int = 2
+    stats: Optional[RefinementStats] = None
+    verify: bool = False
+
+
+@dataclass
+class NearestStats:
+    """Counts of field squares classified by the feature index,
+    `fallbacks` counts squares that were template matched since the index was unsure
+    """
+
+    squares: int = 0
+    fallbacks: int = 0
+
+
+@dataclass
+class NearestNeighbour:
+    """Settings to classify field squares with the feature index of the catalogue
+
+    Squares whose best card is ahead of every other card by less than `margin`,
+    see `FeatureIndex.query`, are template matched instead.
+    If `stats` is given, it is updated with every classification.
+    """
+
+    margin: float = 0.03
+    stats: Optional[NearestStats] = None
 
 
 def fake_adjustment(adj: adjustment.Adjustment) -> adjustment.Adjustment:
-    result = copy.deepcopy(adj)
-    result.x -= 5
-    result.y -= 5
-    result.h += 10
-    result.w += 10
-    return result
+    return registration.pad_adjustment(adj, 5)
 
 
-def get_field_square_iterator(
-    image: np.ndarray, conf: Configuration, row_count: int, column_count: int
-) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
-    """Return iterator for both the square, as well as the matching card border"""
-    my_adj = fake_adjustment(conf.field_adjustment)
-    my_border_adj = fake_adjustment(conf.border_adjustment)
-    squares = card_finder.get_field_squares(
-        image, my_adj, count_x=row_count, count_y=column_count
-    )
-    border_squares = card_finder.get_field_squares(
-        image, my_border_adj, count_x=row_count, count_y=column_count
-    )
-    grouped_squares = grouper(squares, row_count)
-    grouped_border_squares = grouper(border_squares, row_count)
-    return zip(grouped_squares, grouped_border_squares)
+def _search_adjustment(
+    adj: adjustment.Adjustment,
+    offset: Optional[registration.Offset],
+    pile: bool = False,
+) -> adjustment.Adjustment:
+    """Returns the adjustment of the squares templates are searched in
+
+    Without an offset, squares are padded to search around the configured position,
+    with the offset of a registered board, squares are moved there instead.
+    Cards on a pile, like the goal or the flower, move a little as the pile grows,
+    so they are still searched around the moved position.
+    """
+    if offset is None:
+        return fake_adjustment(adj)
+    shifted = registration.shift_adjustment(adj, offset)
+    return fake_adjustment(shifted) if pile else shifted
 
 
 def match_template(template: np.ndarray, search_image: np.ndarray) -> float:
@@ -55,184 +108,675 @@ def match_template(template: np.ndarray, search_image: np.ndarray) -> float:
     return float(max_val)
 
 
-def parse_field_square(
-    square: np.ndarray, border: np.ndarray, conf: Configuration
-) -> Tuple[Union[NumberCard, SpecialCard], bool]:
-    square_fits = [
-        (match_template(template, square), name) for template, name in conf.catalogue
-    ]
-    best_val, best_name = max(square_fits, key=lambda x: x[0])
-    best_border = max(
-        match_template(template=template, search_image=border)
-        for template in conf.card_border
-    )
-    best_empty = max(
-        match_template(template=template, search_image=border)
-        for template in conf.empty_card
-    )
+def _match(
+    stack: Optional[TemplateStack],
+    templates: Sequence[np.ndarray],
+    squares: Sequence[np.ndarray],
+) -> np.ndarray:
+    """Returns the best score of every template in every square,
+    templates without a stack are matched one by one"""
+    if stack is None:
+        return match_each(templates, squares)
+    return stack.match(squares)
 
-    assert best_name is not None
-    assert best_empty is not None
-    assert best_border is not None
-    row_finished = best_empty > best_border
 
-    return (best_name, row_finished)
+def _catalogue_images(conf: Configuration) -> List[np.ndarray]:
+    return [image for image, _ in conf.catalogue]
 
 
-def parse_field(image: np.ndarray, conf: Configuration) -> List[List[Card]]:
-    """Parse a screenshot of the game, using a given configuration"""
-    square_iterator = get_field_square_iterator(
-        image, conf, row_count=Board.MAX_ROW_SIZE, column_count=Board.MAX_COLUMN_SIZE
-    )
+def _crop_around(
+    squares: List[np.ndarray],
+    positions: np.ndarray,
+    shape: Tuple[int, ...],
+    margin: int,
+) -> List[np.ndarray]:
+    """Returns the part of every square where a template of the shape fits
+    at most margin pixels away from the position of that square"""
+    height, width = shape[:2]
     result = []
-    for square_group, border_group in square_iterator:
-        group_field = []
-        for index, (square, border_square) in enumerate(
-            zip(square_group, border_group)
-        ):
-            value, row_finished = parse_field_square(square, border_square, conf)
-            group_field.append(value)
-            if row_finished:
-                break
-
-        result.append(group_field)
-
+    for square, (position_y, position_x) in zip(squares, positions):
+        top = int(
+            np.clip(position_y - margin, 0, square.shape[0] - height - 2 * margin)
+        )
+        left = int(
+            np.clip(position_x - margin, 0, square.shape[1] - width - 2 * margin)
+        )
+        result.append(
+            square[top : top + height + 2 * margin, left : left + width + 2 * margin]
+        )
     return result
 
 
-def parse_hua(image: np.ndarray, conf: Configuration) -> bool:
-    """Return true if hua is in the hua spot, false if hua spot is empty"""
-    my_hua_adj = fake_adjustment(conf.hua_adjustment)
-    hua_square = card_finder.get_field_squares(image, my_hua_adj, count_x=1, count_y=1)[
-        0
-    ]
-    hua_templates = [
-        image for image, card_type in conf.catalogue if card_type == SpecialCard.Hua
-    ]
-    best_hua = max(
-        match_template(template=template, search_image=hua_square)
-        for template in hua_templates
+def _match_catalogue(
+    squares: List[np.ndarray], conf: Configuration, coarse: Optional[CoarseToFine]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the index and score of the best catalogue template for every square"""
+    rows = np.arange(len(squares))
+    catalogue = conf.stacks().catalogue
+    # Squares of registered boards fit the templates, so there is nothing to refine,
+    # templates without a stack can not be matched coarse to fine
+    if (
+        coarse is None
+        or catalogue is None
+        or squares[0].shape[:2] == catalogue.shape[:2]
+    ):
+        fits = _match(catalogue, _catalogue_images(conf), squares)
+        best = fits.argmax(axis=1)
+        return (best, fits[rows, best])
+
+    coarse_fits = conf.coarse_catalogue(coarse.downsample).match_all(
+        [downsample(square, coarse.downsample) for square in squares]
     )
-    best_green = max(
-        match_template(template=template, search_image=hua_square)
-        for template in conf.green_card
+    coarse_best = coarse_fits.max(axis=(1, 2))
+    # Best candidates first
+    candidates = np.argsort(-coarse_best, axis=1, kind="stable")[:, : coarse.top_k]
+    # The best candidate locates the card, the others are only matched around it
+    positions = np.array(
+        [
+            np.unravel_index(fits[..., candidate].argmax(), fits.shape[:2])
+            for fits, candidate in zip(coarse_fits, candidates[:, 0])
+        ]
     )
-    return best_hua > best_green
-
-
-def parse_bunker_field(
-    image: np.ndarray,
-    green_cards: List[np.ndarray],
-    card_backs: List[np.ndarray],
-    catalogue: List[Tuple[np.ndarray, Card]],
-) -> Union[Tuple[SpecialCard, int], Optional[Card]]:
-
-    best_green = max(
-        match_template(template=template, search_image=image)
-        for template in green_cards
+    fits = catalogue.match_candidates(
+        _crop_around(
+            squares, positions * coarse.downsample, catalogue.shape, coarse.downsample
+        ),
+        candidates,
     )
-    best_back = max(
-        match_template(template=template, search_image=image) for template in card_backs
+    best_candidate = fits.argmax(axis=1)
+    best = candidates[rows, best_candidate]
+    if coarse.stats is not None:
+        # Several templates show the same card, only other cards are counted
+        cards = [card for _, card in conf.catalogue]
+        changed = sum(
+            cards[chosen] != cards[first]
+            for chosen, first in zip(best, candidates[:, 0])
+        )
+        wrong = 0
+        if coarse.verify:
+            exact = catalogue.match(squares).argmax(axis=1)
+            wrong = sum(
+                cards[chosen] != cards[other] for chosen, other in zip(best, exact)
+            )
+        with _STATS_LOCK:
+            coarse.stats.squares += len(squares)
+            coarse.stats.changed += changed
+            coarse.stats.wrong += wrong
+    return (best, fits[rows, best_candidate])
+
+
+def _column_lengths(border_squares: List[np.ndarray], conf: Configuration) -> List[int]:
+    """Returns the number of cards in every column of the border squares"""
+    stacks = conf.stacks()
+    # A column ends with the first card without another card below it
+    row_finished = _match(stacks.empty_card, conf.empty_card, border_squares).max(
+        axis=1
+    ) > _match(stacks.card_border, conf.card_border, border_squares).max(axis=1)
+    lengths = []
+    for column in range(len(border_squares) // Board.MAX_ROW_SIZE):
+        finished = row_finished[
+            column * Board.MAX_ROW_SIZE : (column + 1) * Board.MAX_ROW_SIZE
+        ]
+        lengths.append(int(finished.argmax()) + 1 if finished.any() else len(finished))
+    return lengths
+
+
+def _field_squares(
+    image: np.ndarray,
+    conf: Configuration,
+    offset: Optional[registration.Offset],
+    columns: Sequence[int] = range(Board.MAX_COLUMN_SIZE),
+) -> Tuple[List[int], List[np.ndarray]]:
+    """Returns the number of cards in the columns and the squares of these cards"""
+    my_adj = _search_adjustment(conf.field_adjustment, offset)
+    my_border_adj = _search_adjustment(conf.border_adjustment, offset)
+    squares = card_finder.get_field_squares(
+        image, my_adj, count_x=Board.MAX_ROW_SIZE, count_y=Board.MAX_COLUMN_SIZE
     )
-
-    best_card_value, best_card_name = max(
-        ((match_template(template, image), name) for template, name in catalogue),
-        key=lambda x: x[0],
+    border_squares = card_finder.get_field_squares(
+        image, my_border_adj, count_x=Board.MAX_ROW_SIZE, count_y=Board.MAX_COLUMN_SIZE
     )
-
-    return max(
+    lengths = _column_lengths(
         [
-            (best_green, None),
-            (best_back, (SpecialCard.Hua, 0)),
-            (best_card_value, best_card_name),
+            border_squares[column * Board.MAX_ROW_SIZE + row]
+            for column in columns
+            for row in range(Board.MAX_ROW_SIZE)
         ],
-        key=lambda x: x[0],
-    )[1]
+        conf,
+    )
+    card_squares = [
+        squares[column * Board.MAX_ROW_SIZE + row]
+        for column, length in zip(columns, lengths)
+        for row in range(length)
+    ]
+    return (lengths, card_squares)
+
+
+def _classify_catalogue(
+    squares: List[np.ndarray],
+    conf: Configuration,
+    coarse: Optional[CoarseToFine],
+    nearest: Optional[NearestNeighbour],
+) -> np.ndarray:
+    """Returns the index of the best catalogue template for every square"""
+    # The feature index needs templates of equal size, like a stack
+    if nearest is None or conf.stacks().catalogue is None:
+        return _match_catalogue(squares, conf, coarse)[0]
+    best, margins = conf.feature_index().query(squares)
+    unsure = np.flatnonzero(margins < nearest.margin)
+    if len(unsure):
+        best[unsure] = _match_catalogue(
+            [squares[index] for index in unsure], conf, coarse
+        )[0]
+    if nearest.stats is not None:
+        with _STATS_LOCK:
+            nearest.stats.squares += len(squares)
+            nearest.stats.fallbacks += len(unsure)
+    return best
+
+
+def _parse_columns(
+    image: np.ndarray,
+    conf: Configuration,
+    columns: Sequence[int],
+    coarse: Optional[CoarseToFine],
+    offset: Optional[registration.Offset],
+    nearest: Optional[NearestNeighbour] = None,
+) -> List[List[Card]]:
+    lengths, squares = _field_squares(image, conf, offset, columns)
+    best_templates = iter(_classify_catalogue(squares, conf, coarse, nearest))
+    return [
+        [conf.catalogue[next(best_templates)][1] for _ in range(length)]
+        for length in lengths
+    ]
 
 
-def parse_special_button(
+def _prepare(
+    conf: Configuration,
+    coarse: Optional[CoarseToFine],
+    nearest: Optional[NearestNeighbour] = None,
+) -> None:
+    """Build the templates of the configuration, before threads use them"""
+    if conf.stacks().catalogue is None:
+        return
+    if coarse is not None:
+        conf.coarse_catalogue(coarse.downsample)
+    if nearest is not None:
+        conf.feature_index()
+
+
+def _submit_columns(
+    executor: Executor,
     image: np.ndarray,
-    position: SpecialCard,
-    buttons: List[Tuple[ButtonState, SpecialCard, np.ndarray]],
-) -> ButtonState:
-    """Return true if special button is greyed out, e.g. this dragon card is removed from the field"""
-    square_fits = [
-        (match_template(template, image), state, name)
-        for state, name, template in buttons
+    conf: Configuration,
+    coarse: Optional[CoarseToFine],
+    offset: Optional[registration.Offset],
+    nearest: Optional[NearestNeighbour] = None,
+) -> "List[Future[List[List[Card]]]]":
+    return [
+        executor.submit(_parse_columns, image, conf, [column], coarse, offset, nearest)
+        for column in range(Board.MAX_COLUMN_SIZE)
     ]
-    best_state, best_name = max(square_fits, key=lambda x: x[0])[1:]
-    assert best_name == position
-    return best_state
+
+
+def parse_field(
+    image: np.ndarray,
+    conf: Configuration,
+    *,
+    coarse: Optional[CoarseToFine] = None,
+    offset: Optional[registration.Offset] = None,
+    executor: Optional[Executor] = None,
+    nearest: Optional[NearestNeighbour] = None,
+) -> List[List[Card]]:
+    """Parse a screenshot of the game, using a given configuration
+
+    With `executor`, every column is parsed in its own task.
+    With `nearest`, cards are classified by the feature index of the catalogue,
+    falling back to template matching where it is unsure.
+    """
+    if executor is None:
+        return _parse_columns(
+            image, conf, range(Board.MAX_COLUMN_SIZE), coarse, offset, nearest
+        )
+    _prepare(conf, coarse, nearest)
+    futures = _submit_columns(executor, image, conf, coarse, offset, nearest)
+    return [column for future in futures for column in future.result()]
+
+
+def parse_hua(
+    image: np.ndarray,
+    conf: Configuration,
+    *,
+    offset: Optional[registration.Offset] = None,
+) -> bool:
+    """Return true if hua is in the hua spot, false if hua spot is empty"""
+    my_hua_adj = _search_adjustment(conf.hua_adjustment, offset, pile=True)
+    hua_square = card_finder.get_field_squares(image, my_hua_adj, count_x=1, count_y=1)
+    stacks = conf.stacks()
+    catalogue_fits = _match(stacks.catalogue, _catalogue_images(conf), hua_square)[0]
+    best_hua = max(
+        fit
+        for fit, (_, card_type) in zip(catalogue_fits, conf.catalogue)
+        if card_type == SpecialCard.Hua
+    )
+    best_green = _match(stacks.green_card, conf.green_card, hua_square)[0].max()
+    return bool(best_hua > best_green)
+
+
+def _bunker_squares(
+    image: np.ndarray, conf: Configuration, offset: Optional[registration.Offset]
+) -> List[np.ndarray]:
+    return card_finder.get_field_squares(
+        image,
+        _search_adjustment(conf.bunker_adjustment, offset),
+        count_x=1,
+        count_y=3,
+    )
 
 
 def parse_bunker(
-    image: np.ndarray, conf: Configuration
+    image: np.ndarray,
+    conf: Configuration,
+    *,
+    coarse: Optional[CoarseToFine] = None,
+    offset: Optional[registration.Offset] = None,
 ) -> List[Union[Tuple[SpecialCard, int], Optional[Card]]]:
-    bunker_squares = card_finder.get_field_squares(
-        image, fake_adjustment(conf.bunker_adjustment), count_x=1, count_y=3
-    )
+    bunker_squares = _bunker_squares(image, conf, offset)
     button_squares = card_finder.get_field_squares(
-        image, fake_adjustment(conf.special_button_adjustment), count_x=3, count_y=1
+        image,
+        _search_adjustment(conf.special_button_adjustment, offset),
+        count_x=3,
+        count_y=1,
     )
+    stacks = conf.stacks()
     dragon_sequence = [SpecialCard.Zhong, SpecialCard.Fa, SpecialCard.Bai]
-    dragons = [
-        card_type
-        for dragon_image, card_type in zip(button_squares, dragon_sequence)
-        if parse_special_button(dragon_image, card_type, conf.special_buttons)
-        == ButtonState.greyed
-    ]
+    dragons = []
+    button_images = [image for _, _, image in conf.special_buttons]
+    for button_fits, card_type in zip(
+        _match(stacks.special_buttons, button_images, button_squares),
+        dragon_sequence,
+    ):
+        best_state, best_name, _ = conf.special_buttons[int(button_fits.argmax())]
+        assert best_name == card_type
+        if best_state == ButtonState.greyed:
+            dragons.append(card_type)
     dragon_iter = iter(dragons)
-    matches = [
-        parse_bunker_field(square, conf.green_card, conf.card_back, conf.catalogue)
-        for square in bunker_squares
-    ]
+
+    best_greens = _match(stacks.green_card, conf.green_card, bunker_squares).max(axis=1)
+    best_backs = _match(stacks.card_back, conf.card_back, bunker_squares).max(axis=1)
+    best_cards, best_card_values = _match_catalogue(bunker_squares, conf, coarse)
+    matches: List[Union[Tuple[SpecialCard, int], Optional[Card]]] = []
+    for best_green, best_back, best_card, best_card_value in zip(
+        best_greens, best_backs, best_cards, best_card_values
+    ):
+        # Green card, card back, card, the first one wins on ties
+        matches.append(
+            max(
+                [
+                    (best_green, None),
+                    (best_back, (SpecialCard.Hua, 0)),
+                    (best_card_value, conf.catalogue[best_card][1]),
+                ],
+                key=lambda x: x[0],
+            )[1]
+        )
     matches = [(next(dragon_iter), 0) if isinstance(x, tuple) else x for x in matches]
     assert next(dragon_iter, None) is None
     return matches
 
 
-def parse_goal_field(
+def parse_goal(
+    image: np.ndarray,
+    conf: Configuration,
+    *,
+    coarse: Optional[CoarseToFine] = None,
+    offset: Optional[registration.Offset] = None,
+) -> List[Optional[NumberCard]]:
+    goal_squares = card_finder.get_field_squares(
+        image,
+        _search_adjustment(conf.goal_adjustment, offset, pile=True),
+        count_x=1,
+        count_y=3,
+    )
+    stacks = conf.stacks()
+    goal_list: List[Optional[NumberCard]] = []
+    for best_card, best_card_value, best_green_value in zip(
+        *_match_catalogue(goal_squares, conf, coarse),
+        _match(stacks.green_card, conf.green_card, goal_squares).max(axis=1),
+    ):
+        if best_green_value > best_card_value:
+            goal_list.append(None)
+            continue
+        best_card_name = conf.catalogue[best_card][1]
+        assert isinstance(best_card_name, NumberCard)
+        goal_list.append(best_card_name)
+
+    return goal_list
+
+
+def _decode_cards(
     image: np.ndarray,
-    catalogue: List[Tuple[np.ndarray, Card]],
-    green_cards: List[np.ndarray],
-) -> Optional[NumberCard]:
-    square_fits = [
-        (match_template(template, image), name) for template, name in catalogue
+    conf: Configuration,
+    result: Board,
+    offset: Optional[registration.Offset],
+) -> None:
+    """Read the cards of the field and the bunker of the board together,
+    so every card is used as often as it is left in the game
+
+    Keeps the cards read one by one if there are more cards than left in the game.
+    """
+    lengths, squares = _field_squares(image, conf, offset)
+    bunker_squares = _bunker_squares(image, conf, offset)
+    bunker_indices = [
+        index
+        for index, card in enumerate(result.bunker)
+        if isinstance(card, (NumberCard, SpecialCard))
     ]
-    best_card_value, best_card_name = max(square_fits, key=lambda x: x[0])
+    squares += [bunker_squares[index] for index in bunker_indices]
+    template_fits = _match(conf.stacks().catalogue, _catalogue_images(conf), squares)
+    cards: List[Card] = []
+    templates: List[List[int]] = []
+    for index, (_, card) in enumerate(conf.catalogue):
+        if card not in cards:
+            cards.append(card)
+            templates.append([])
+        templates[cards.index(card)].append(index)
+    # A card fits as well as its best template
+    card_fits = np.stack(
+        [
+            template_fits[:, template_indices].max(axis=1)
+            for template_indices in templates
+        ],
+        axis=1,
+    )
+    counts = decoding.remaining_cards(result.goal, result.bunker, result.flower_gone)
+    decoded = decoding.decode(card_fits, cards, counts)
+    if decoded is None:
+        decoded = [cards[index] for index in card_fits.argmax(axis=1)]
+    decoded_iter = iter(decoded)
+    result.field = [[next(decoded_iter) for _ in range(length)] for length in lengths]
+    for index in bunker_indices:
+        result.bunker[index] = next(decoded_iter)
 
-    best_green_value = max(match_template(template, image) for template in green_cards)
-    if best_green_value > best_card_value:
-        return None
 
-    assert isinstance(best_card_name, NumberCard)
-    return best_card_name
+def _parse_board(
+    image: np.ndarray,
+    conf: Configuration,
+    coarse: Optional[CoarseToFine],
+    register: bool,
+    decode: bool,
+    executor: Optional[Executor],
+    start: bool,
+    nearest: Optional[NearestNeighbour] = None,
+) -> Board:
+    offset = registration.estimate_offset(image, conf) if register else None
+    result = Board()
+    if executor is None:
+        result.flower_gone = parse_hua(image, conf, offset=offset)
+        result.bunker = (
+            [None] * 3
+            if start
+            else parse_bunker(image, conf, coarse=coarse, offset=offset)
+        )
+        result.goal = parse_goal(image, conf, coarse=coarse, offset=offset)
+        if decode:
+            _decode_cards(image, conf, result, offset)
+        else:
+            result.field = parse_field(
+                image, conf, coarse=coarse, offset=offset, nearest=nearest
+            )
+        return result
+
+    # Every task is submitted from here, so no task waits for another one
+    _prepare(conf, coarse, nearest)
+    columns = (
+        []
+        if decode
+        else _submit_columns(executor, image, conf, coarse, offset, nearest)
+    )
+    hua = executor.submit(parse_hua, image, conf, offset=offset)
+    bunker = (
+        None
+        if start
+        else executor.submit(parse_bunker, image, conf, coarse=coarse, offset=offset)
+    )
+    goal = executor.submit(parse_goal, image, conf, coarse=coarse, offset=offset)
+    result.flower_gone = hua.result()
+    result.bunker = [None] * 3 if bunker is None else bunker.result()
+    result.goal = goal.result()
+    if decode:
+        _decode_cards(image, conf, result, offset)
+    else:
+        result.field = [column for future in columns for column in future.result()]
+    return result
 
 
-def parse_goal(image: np.ndarray, conf: Configuration) -> List[Optional[NumberCard]]:
-    goal_squares = card_finder.get_field_squares(
-        image, fake_adjustment(conf.goal_adjustment), count_x=1, count_y=3
+def parse_board(
+    image: np.ndarray,
+    conf: Configuration,
+    *,
+    coarse: Optional[CoarseToFine] = None,
+    register: bool = False,
+    decode: bool = False,
+    executor: Optional[Executor] = None,
+    nearest: Optional[NearestNeighbour] = None,
+) -> Board:
+    """Parse a screenshot of the game
+
+    With `coarse`, catalogue templates are matched coarse to fine,
+    an experimental tuning aid, see `CoarseToFine`.
+    With `register`, the offset of the board is estimated once,
+    see `registration.estimate_offset`, and templates are matched only there.
+    With `decode`, the cards of the field and bunker are read together,
+    so that every card is used as often as it is in the game, see `decoding.decode`.
+    Coarse to fine matching does not apply to these cards then.
+    With `executor`, e.g. a `ThreadPoolExecutor` kept for all screenshots,
+    board regions and, without `decode`, field columns are parsed concurrently,
+    the result is the same as without.
+    With `nearest`, the cards of the field are classified by the feature index
+    of the catalogue first, see `NearestNeighbour`, unless they are decoded.
+    """
+    return _parse_board(
+        image, conf, coarse, register, decode, executor, start=False, nearest=nearest
+    )
+
+def parse_start_board(
+    image: np.ndarray,
+    conf: Configuration,
+    *,
+    coarse: Optional[CoarseToFine] = None,
+    register: bool = False,
+    decode: bool = False,
+    executor: Optional[Executor] = None,
+    nearest: Optional[NearestNeighbour] = None,
+) -> Board:
+    return _parse_board(
+        image, conf, coarse, register, decode, executor, start=True, nearest=nearest
     )
-    goal_list = [
-        parse_goal_field(square, conf.catalogue, conf.green_card)
-        for square in goal_squares
+
+
+# Mean absolute difference of pixel values, above which a square has changed
+CHANGE_THRESHOLD = 4.0
+
+
+@dataclass
+class ReparseStats:
+    """Statistics about incremental parses
+
+    `squares` counts the compared squares, `changed` the squares which changed
+    and `classified` the squares which were matched with templates again,
+    `duration` is the time the parses took.
+    """
+
+    squares: int = 0
+    changed: int = 0
+    classified: int = 0
+    duration: float = 0.0
+
+
+def _changed_squares(
+    previous_image: np.ndarray,
+    image: np.ndarray,
+    adj: adjustment.Adjustment,
+    count_x: int,
+    count_y: int,
+    threshold: float,
+    stats: ReparseStats,
+) -> List[bool]:
+    """Returns for every square of the adjustment, if it differs between the images"""
+    result = [
+        float(cv2.absdiff(previous_square, square).mean()) > threshold
+        for previous_square, square in zip(
+            card_finder.get_field_squares(previous_image, adj, count_x, count_y),
+            card_finder.get_field_squares(image, adj, count_x, count_y),
+        )
     ]
+    stats.squares += len(result)
+    stats.changed += sum(result)
+    return result
 
-    return goal_list
 
+def _reparse_field(
+    previous_image: np.ndarray,
+    previous_field: List[List[Card]],
+    image: np.ndarray,
+    conf: Configuration,
+    coarse: Optional[CoarseToFine],
+    threshold: float,
+    stats: ReparseStats,
+) -> List[List[Card]]:
+    my_adj = fake_adjustment(conf.field_adjustment)
+    my_border_adj = fake_adjustment(conf.border_adjustment)
+    changed = [
+        square_changed or border_changed
+        for square_changed, border_changed in zip(
+            *(
+                _changed_squares(
+                    previous_image,
+                    image,
+                    adj,
+                    Board.MAX_ROW_SIZE,
+                    Board.MAX_COLUMN_SIZE,
+                    threshold,
+                    stats,
+                )
+                for adj in [my_adj, my_border_adj]
+            )
+        )
+    ]
+    changed_columns = [
+        column
+        for column in range(Board.MAX_COLUMN_SIZE)
+        if any(
+            changed[column * Board.MAX_ROW_SIZE : (column + 1) * Board.MAX_ROW_SIZE]
+        )
+    ]
+    result = [list(cards) for cards in previous_field]
+    if not changed_columns:
+        return result
 
-def parse_board(image: np.ndarray, conf: Configuration) -> Board:
-    result = Board()
-    result.field = parse_field(image, conf)
-    result.flower_gone = parse_hua(image, conf)
-    result.bunker = parse_bunker(image, conf)
-    result.goal = parse_goal(image, conf)
+    squares = card_finder.get_field_squares(
+        image, my_adj, count_x=Board.MAX_ROW_SIZE, count_y=Board.MAX_COLUMN_SIZE
+    )
+    border_squares = card_finder.get_field_squares(
+        image, my_border_adj, count_x=Board.MAX_ROW_SIZE, count_y=Board.MAX_COLUMN_SIZE
+    )
+    lengths = _column_lengths(
+        [
+            border_squares[column * Board.MAX_ROW_SIZE + row]
+            for column in changed_columns
+            for row in range(Board.MAX_ROW_SIZE)
+        ],
+        conf,
+    )
+    # Cards whose square did not change are still the same
+    unknown = [
+        column * Board.MAX_ROW_SIZE + row
+        for column, length in zip(changed_columns, lengths)
+        for row in range(length)
+        if row >= len(previous_field[column])
+        or changed[column * Board.MAX_ROW_SIZE + row]
+    ]
+    best_templates = dict(
+        zip(
+            unknown,
+            _match_catalogue([squares[index] for index in unknown], conf, coarse)[0]
+            if unknown
+            else [],
+        )
+    )
+    stats.classified += len(unknown)
+    for column, length in zip(changed_columns, lengths):
+        result[column] = [
+            conf.catalogue[best_templates[column * Board.MAX_ROW_SIZE + row]][1]
+            if column * Board.MAX_ROW_SIZE + row in best_templates
+            else previous_field[column][row]
+            for row in range(length)
+        ]
     return result
 
-def parse_start_board(image: np.ndarray, conf: Configuration) -> Board:
+
+def reparse_board(
+    previous_image: np.ndarray,
+    previous_board: Board,
+    image: np.ndarray,
+    conf: Configuration,
+    *,
+    coarse: Optional[CoarseToFine] = None,
+    threshold: float = CHANGE_THRESHOLD,
+    stats: Optional[ReparseStats] = None,
+) -> Board:
+    """Parse a screenshot of the game, given the board of a previous screenshot
+
+    Only squares differing from the previous screenshot are read again,
+    the rest of the board is taken from the previous board.
+    Both screenshots need to show the board at the same position.
+    If given, `stats` is updated with the squares compared and read again,
+    and the duration of the parse.
+    """
+    start_time = time.time()
+    if stats is None:
+        stats = ReparseStats()
     result = Board()
-    result.field = parse_field(image, conf)
-    result.flower_gone = parse_hua(image, conf)
-    result.bunker = [None] * 3
-    result.goal = parse_goal(image, conf)
-    return result
\ No newline at end of file
+    result.field = _reparse_field(
+        previous_image,
+        previous_board.field,
+        image,
+        conf,
+        coarse,
+        threshold,
+        stats,
+    )
+
+    def _region_changed(adj: adjustment.Adjustment, count_x: int, count_y: int) -> bool:
+        return any(
+            _changed_squares(
+                previous_image,
+                image,
+                fake_adjustment(adj),
+                count_x,
+                count_y,
+                threshold,
+                stats,
+            )
+        )
+
+    if _region_changed(conf.hua_adjustment, 1, 1):
+        result.flower_gone = parse_hua(image, conf)
+        stats.classified += 1
+    else:
+        result.flower_gone = previous_board.flower_gone
+    if _region_changed(conf.bunker_adjustment, 1, 3) or _region_changed(
+        conf.special_button_adjustment, 3, 1
+    ):
+        result.bunker = parse_bunker(image, conf, coarse=coarse)
+        stats.classified += 3
+    else:
+        result.bunker = list(previous_board.bunker)
+    if _region_changed(conf.goal_adjustment, 1, 3):
+        result.goal = parse_goal(image, conf, coarse=coarse)
+        stats.classified += 3
+    else:
+        result.goal = list(previous_board.goal)
+    stats.duration += time.time() - start_time
+    return result
@@ -1,18 +1,22 @@
 """Contains configuration class"""
 import dataclasses
 import enum
+import hashlib
 import io
 import json
+import os
 import tempfile
 import zipfile
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Mapping, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
 from .. import board
 from . import adjustment, card_finder
+from .feature_index import FeatureIndex
+from .template_matching import TemplateStack, downsample, stackable
 
 ADJUSTMENT_FILE_NAME = "adjustment.json"
 
@@ -32,6 +36,19 @@ CARD_BACK_DIRECTORY = "card_backs"
 
 PICTURE_EXTENSION = "png"
 
+# Suffix of the compiled templates next to a configuration archive
+COMPILED_SUFFIX = ".npz"
+_CONTENT_HASH_KEY = "content_hash"
+_ADJUSTMENTS_KEY = "adjustments"
+_IMAGE_DIRECTORIES = [
+    TEMPLATES_DIRECTORY,
+    CARD_BORDER_DIRECTORY,
+    EMPTY_CARD_DIRECTORY,
+    GREEN_CARD_DIRECTORY,
+    SPECIAL_BUTTON_DIRECTORY,
+    CARD_BACK_DIRECTORY,
+]
+
 
 class ButtonState(enum.Enum):
     normal = enum.auto()
@@ -39,6 +56,26 @@ class ButtonState(enum.Enum):
     shiny = enum.auto()
 
 
+@dataclass
+class TemplateStacks:
+    """Templates of a configuration, stacked for batched matching
+
+    Templates which can not be stacked, because there are none
+    or they differ in size, have no stack and are matched one by one.
+    """
+
+    catalogue: Optional[TemplateStack]
+    card_border: Optional[TemplateStack]
+    empty_card: Optional[TemplateStack]
+    green_card: Optional[TemplateStack]
+    card_back: Optional[TemplateStack]
+    special_buttons: Optional[TemplateStack]
+
+
+def _stack(templates: List[np.ndarray]) -> Optional[TemplateStack]:
+    return TemplateStack(templates) if stackable(templates) else None
+
+
 @dataclass
 class Configuration:
     """Configuration for solitaire cv"""
@@ -72,6 +109,61 @@ class Configuration:
     ] = dataclasses.field(default_factory=list)
     card_back: List[np.ndarray] = dataclasses.field(default_factory=list)
     meta: Dict[str, str] = dataclasses.field(default_factory=dict)
+    _stacks: Optional[TemplateStacks] = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _coarse_catalogues: Dict[int, TemplateStack] = dataclasses.field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _feature_index: Optional[FeatureIndex] = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def stacks(self) -> TemplateStacks:
+        """Returns the templates stacked for batched matching
+
+        The stacks are built on first use, so templates must not change afterwards.
+        """
+        if self._stacks is None:
+            self._stacks = TemplateStacks(
+                catalogue=_stack([image for image, _ in self.catalogue]),
+                card_border=_stack(self.card_border),
+                empty_card=_stack(self.empty_card),
+                green_card=_stack(self.green_card),
+                card_back=_stack(self.card_back),
+                special_buttons=_stack([image for _, _, image in self.special_buttons]),
+            )
+        return self._stacks
+
+    def coarse_catalogue(self, factor: int) -> TemplateStack:
+        """Returns the catalogue templates in grayscale, downsampled by factor"""
+        if factor not in self._coarse_catalogues:
+            self._coarse_catalogues[factor] = TemplateStack(
+                [downsample(image, factor) for image, _ in self.catalogue]
+            )
+        return self._coarse_catalogues[factor]
+
+    def feature_index(self) -> FeatureIndex:
+        """Returns the nearest neighbour index of the catalogue templates
+
+        The label of a template is the index of the first template of its card.
+        The index is built on first use, like the stacks.
+        """
+        if self._feature_index is None:
+            cards = [card for _, card in self.catalogue]
+            self._feature_index = FeatureIndex.build(
+                [image for image, _ in self.catalogue],
+                [cards.index(card) for card in cards],
+            )
+        return self._feature_index
+
+
+def _card_file_name(card: board.Card) -> str:
+    if isinstance(card, board.SpecialCard):
+        return f"s{card.value}-{card.name}"
+    if isinstance(card, board.NumberCard):
+        return f"n{card.suit.value}{card.number}-{card.suit.name}"
+    raise AssertionError()
 
 
 def _save_catalogue(
@@ -81,21 +173,13 @@ def _save_catalogue(
         fd, myfile = tempfile.mkstemp(suffix=f".{PICTURE_EXTENSION}")
 
         cv2.imwrite(myfile, square)
-        file_name = ""
-        if isinstance(card, board.SpecialCard):
-            file_name = f"s{card.value}-{card.name}-{counter}"
-        elif isinstance(card, board.NumberCard):
-            file_name = (
-                f"n{card.suit.value}{card.number}" f"-{card.suit.name}-{counter}"
-            )
-        else:
-            raise AssertionError()
+        file_name = f"{_card_file_name(card)}-{counter}"
         zip_file.write(
             myfile, arcname=f"{TEMPLATES_DIRECTORY}/{file_name}.{PICTURE_EXTENSION}"
         )
 
 
-def _save_adjustments(zip_file: zipfile.ZipFile, conf: Configuration) -> None:
+def _adjustments(conf: Configuration) -> Dict[str, Dict[str, int]]:
     adjustments = {}
     adjustments[FIELD_ADJUSTMENT_KEY] = dataclasses.asdict(conf.field_adjustment)
     adjustments[BORDER_ADJUSTMENT_KEY] = dataclasses.asdict(conf.border_adjustment)
@@ -105,8 +189,12 @@ def _save_adjustments(zip_file: zipfile.ZipFile, conf: Configuration) -> None:
     adjustments[SPECIAL_BUTTON_ADJUSTMENT_KEY] = dataclasses.asdict(
         conf.special_button_adjustment
     )
+    return adjustments
+
+
+def _save_adjustments(zip_file: zipfile.ZipFile, conf: Configuration) -> None:
     zip_file.writestr(
-        ADJUSTMENT_FILE_NAME, json.dumps(adjustments),
+        ADJUSTMENT_FILE_NAME, json.dumps(_adjustments(conf)),
     )
 
 
@@ -187,7 +275,6 @@ def _parse_file_name(card_filename: str) -> board.Card:
 def _load_dir_with_name(
     zip_file: zipfile.ZipFile, dirname: str
 ) -> List[Tuple[str, np.ndarray]]:
-    mydir = tempfile.mkdtemp()
     image_filenames = [
         image_filename
         for image_filename in (
@@ -199,7 +286,10 @@ def _load_dir_with_name(
     images = [
         (
             image_filename[len(dirname + "/") :],
-            cv2.imread(zip_file.extract(image_filename, path=mydir)),
+            cv2.imdecode(
+                np.frombuffer(zip_file.read(image_filename), dtype=np.uint8),
+                cv2.IMREAD_COLOR,
+            ),
         )
         for image_filename in image_filenames
     ]
@@ -207,12 +297,11 @@ def _load_dir_with_name(
     return images
 
 
-def _load_catalogue(zip_file: zipfile.ZipFile,) -> List[Tuple[np.ndarray, board.Card]]:
+def _load_catalogue(
+    images: List[Tuple[str, np.ndarray]]
+) -> List[Tuple[np.ndarray, board.Card]]:
 
-    catalogue = [
-        (image, _parse_file_name(filename))
-        for filename, image in _load_dir_with_name(zip_file, TEMPLATES_DIRECTORY)
-    ]
+    catalogue = [(image, _parse_file_name(filename)) for filename, image in images]
 
     return catalogue
 
@@ -238,53 +327,209 @@ def _parse_special_button_filename(
 
 
 def _load_special_buttions(
-    zip_file: zipfile.ZipFile,
+    images: List[Tuple[str, np.ndarray]]
 ) -> List[Tuple[ButtonState, board.SpecialCard, np.ndarray]]:
     result = [
         (*_parse_special_button_filename(filename), image)
-        for filename, image in _load_dir_with_name(zip_file, SPECIAL_BUTTON_DIRECTORY)
+        for filename, image in images
     ]
     return result
 
 
-def _load_dir(zip_file: zipfile.ZipFile, dirname: str) -> List[np.ndarray]:
-    return [image for filename, image in _load_dir_with_name(zip_file, dirname)]
+def _load_dir(images: List[Tuple[str, np.ndarray]]) -> List[np.ndarray]:
+    return [image for filename, image in images]
 
 
-def load(filename: str) -> Configuration:
-    """Load configuration from zip archive"""
+def compiled_path(filename: str) -> str:
+    """Returns the path of the compiled templates of a configuration archive"""
+    return filename + COMPILED_SUFFIX
 
-    with zipfile.ZipFile(filename, "r") as zip_file:
-        adjustment_dict = json.loads(zip_file.read(ADJUSTMENT_FILE_NAME))
 
-        result = Configuration(
-            field_adjustment=adjustment.Adjustment(
-                **adjustment_dict.get(FIELD_ADJUSTMENT_KEY, {})
-            ),
-            border_adjustment=adjustment.Adjustment(
-                **adjustment_dict.get(BORDER_ADJUSTMENT_KEY, {})
-            ),
-            goal_adjustment=adjustment.Adjustment(
-                **adjustment_dict.get(GOAL_ADJUSTMENT_KEY, {})
-            ),
-            bunker_adjustment=adjustment.Adjustment(
-                **adjustment_dict.get(BUNKER_ADJUSTMENT_KEY, {})
-            ),
-            hua_adjustment=adjustment.Adjustment(
-                **adjustment_dict.get(HUA_ADJUSTMENT_KEY, {})
-            ),
-            special_button_adjustment=adjustment.Adjustment(
-                **adjustment_dict.get(SPECIAL_BUTTON_ADJUSTMENT_KEY, {})
-            ),
-            catalogue=_load_catalogue(zip_file),
-            card_border=_load_dir(zip_file, CARD_BORDER_DIRECTORY),
-            empty_card=_load_dir(zip_file, EMPTY_CARD_DIRECTORY),
-            green_card=_load_dir(zip_file, GREEN_CARD_DIRECTORY),
-            card_back=_load_dir(zip_file, CARD_BACK_DIRECTORY),
-            special_buttons=_load_special_buttions(zip_file),
-            meta={},
+def _named_images(conf: Configuration) -> Dict[str, List[Tuple[str, np.ndarray]]]:
+    """Returns the images of a configuration by directory,
+    with file names as in the archive"""
+
+    def _numbered(images: List[np.ndarray]) -> List[Tuple[str, np.ndarray]]:
+        return [
+            (f"{index:03}.{PICTURE_EXTENSION}", image)
+            for index, image in enumerate(images)
+        ]
+
+    return {
+        TEMPLATES_DIRECTORY: [
+            (f"{_card_file_name(card)}.{PICTURE_EXTENSION}", image)
+            for image, card in conf.catalogue
+        ],
+        CARD_BORDER_DIRECTORY: _numbered(conf.card_border),
+        EMPTY_CARD_DIRECTORY: _numbered(conf.empty_card),
+        GREEN_CARD_DIRECTORY: _numbered(conf.green_card),
+        SPECIAL_BUTTON_DIRECTORY: [
+            (
+                f"{_generate_special_button_filename(state, card)}"
+                f"{index:03}.{PICTURE_EXTENSION}",
+                image,
+            )
+            for index, (state, card, image) in enumerate(conf.special_buttons)
+        ],
+        CARD_BACK_DIRECTORY: _numbered(conf.card_back),
+    }
+
+
+def _from_images(
+    adjustment_dict: Dict[str, Dict[str, int]],
+    images: Dict[str, List[Tuple[str, np.ndarray]]],
+) -> Configuration:
+    return Configuration(
+        field_adjustment=adjustment.Adjustment(
+            **adjustment_dict.get(FIELD_ADJUSTMENT_KEY, {})
+        ),
+        border_adjustment=adjustment.Adjustment(
+            **adjustment_dict.get(BORDER_ADJUSTMENT_KEY, {})
+        ),
+        goal_adjustment=adjustment.Adjustment(
+            **adjustment_dict.get(GOAL_ADJUSTMENT_KEY, {})
+        ),
+        bunker_adjustment=adjustment.Adjustment(
+            **adjustment_dict.get(BUNKER_ADJUSTMENT_KEY, {})
+        ),
+        hua_adjustment=adjustment.Adjustment(
+            **adjustment_dict.get(HUA_ADJUSTMENT_KEY, {})
+        ),
+        special_button_adjustment=adjustment.Adjustment(
+            **adjustment_dict.get(SPECIAL_BUTTON_ADJUSTMENT_KEY, {})
+        ),
+        catalogue=_load_catalogue(images[TEMPLATES_DIRECTORY]),
+        card_border=_load_dir(images[CARD_BORDER_DIRECTORY]),
+        empty_card=_load_dir(images[EMPTY_CARD_DIRECTORY]),
+        green_card=_load_dir(images[GREEN_CARD_DIRECTORY]),
+        card_back=_load_dir(images[CARD_BACK_DIRECTORY]),
+        special_buttons=_load_special_buttions(images[SPECIAL_BUTTON_DIRECTORY]),
+        meta={},
+    )
+
+
+def to_arrays(conf: Configuration) -> Dict[str, np.ndarray]:
+    """Returns the configuration as arrays, to be restored with `from_arrays`
+
+    Besides the adjustments and images, the arrays hold the template stacks
+    and the feature index, so they need not be built again.
+    """
+    arrays: Dict[str, np.ndarray] = {
+        _ADJUSTMENTS_KEY: np.array(json.dumps(_adjustments(conf)))
+    }
+    images = _named_images(conf)
+    for dirname, dir_images in images.items():
+        arrays[f"{dirname}.names"] = np.array(
+            [name for name, _ in dir_images], dtype=str
+        )
+        if dir_images and len({image.shape for _, image in dir_images}) == 1:
+            # One array per directory loads a lot faster than one per image
+            arrays[f"{dirname}.images"] = np.stack([image for _, image in dir_images])
+        else:
+            for index, (_, image) in enumerate(dir_images):
+                arrays[f"{dirname}.{index:03}"] = image
+    stacks = conf.stacks()
+    for field in dataclasses.fields(TemplateStacks):
+        stack = getattr(stacks, field.name)
+        if stack is None:
+            continue
+        for key, value in stack.to_arrays().items():
+            arrays[f"stacks.{field.name}.{key}"] = value
+    if stacks.catalogue is not None:
+        for key, value in conf.feature_index().to_arrays().items():
+            arrays[f"index.{key}"] = value
+    return arrays
+
+
+def from_arrays(arrays: Mapping[str, np.ndarray]) -> Configuration:
+    """Restore a configuration from `to_arrays`
+
+    Images and templates are taken as they are, without copying them,
+    e.g. from shared memory.
+    Raises KeyError if arrays are missing.
+    """
+    images = {}
+    for dirname in _IMAGE_DIRECTORIES:
+        names = arrays[f"{dirname}.names"]
+        if f"{dirname}.images" in arrays:
+            dir_images = list(arrays[f"{dirname}.images"])
+        else:
+            dir_images = [
+                arrays[f"{dirname}.{index:03}"] for index in range(len(names))
+            ]
+        images[dirname] = list(zip((str(name) for name in names), dir_images))
+    result = _from_images(json.loads(str(arrays[_ADJUSTMENTS_KEY])), images)
+    result._stacks = TemplateStacks(
+        **{
+            field.name: TemplateStack.from_arrays(
+                {
+                    key: arrays[f"stacks.{field.name}.{key}"]
+                    for key in ["shape", "templates", "norms"]
+                }
+            )
+            if f"stacks.{field.name}.templates" in arrays
+            else None
+            for field in dataclasses.fields(TemplateStacks)
+        }
+    )
+    if "index.features" in arrays:
+        result._feature_index = FeatureIndex.from_arrays(
+            {key: arrays[f"index.{key}"] for key in ["shape", "features", "labels"]}
         )
-        return result
+    return result
+
+
+def _load_compiled(path: str, content_hash: str) -> Optional[Configuration]:
+    """Returns the compiled configuration,
+    None if there is none for the archive content"""
+    try:
+        with np.load(path, allow_pickle=False) as compiled:
+            if str(compiled[_CONTENT_HASH_KEY]) != content_hash:
+                return None
+            return from_arrays({key: compiled[key] for key in compiled.files})
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_compiled(path: str, content_hash: str, conf: Configuration) -> None:
+    """Store a configuration as arrays, see `to_arrays`"""
+    arrays = to_arrays(conf)
+    arrays[_CONTENT_HASH_KEY] = np.array(content_hash)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as compiled_file:
+        np.savez(compiled_file, **arrays)
+    os.replace(temporary_path, path)
+
+
+def load(filename: str, *, compiled: bool = False) -> Configuration:
+    """Load configuration from zip archive
+
+    With `compiled`, the decoded and preprocessed templates and the feature index
+    are stored next to the archive, see `compiled_path`,
+    and taken from there while the archive is unchanged.
+    """
+    with open(filename, "rb") as archive:
+        content = archive.read()
+    content_hash = hashlib.sha256(content).hexdigest()
+    if compiled:
+        loaded = _load_compiled(compiled_path(filename), content_hash)
+        if loaded is not None:
+            return loaded
+
+    with zipfile.ZipFile(io.BytesIO(content), "r") as zip_file:
+        adjustment_dict = json.loads(zip_file.read(ADJUSTMENT_FILE_NAME))
+        images = {
+            dirname: _load_dir_with_name(zip_file, dirname)
+            for dirname in _IMAGE_DIRECTORIES
+        }
+    result = _from_images(adjustment_dict, images)
+    if compiled:
+        try:
+            _save_compiled(compiled_path(filename), content_hash, result)
+        except OSError:
+            # A read only location only costs the speedup
+            pass
+    return result
 
 
 def generate(image: np.ndarray) -> Configuration:
@@ -0,0 +1,126 @@
+"""Contains the decoding of card squares under the card counts of the game"""
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..board import Card, NumberCard, SpecialCard
+
+# Score margin between the best and second best card of a square,
+# above which the square is assigned before solving the assignment problem
+CONFIDENT_MARGIN = 0.05
+
+
+def remaining_cards(
+    goal: Sequence[Optional[NumberCard]],
+    bunker: Sequence[Union[Tuple[SpecialCard, int], Optional[Card]]],
+    flower_gone: bool,
+) -> Dict[Card, int]:
+    """Returns how often every card is in the field and bunker squares,
+    given the goal, the killed dragons in the bunker and the flower"""
+    goal_numbers = {card.suit: card.number for card in goal if card is not None}
+    result: Dict[Card, int] = {}
+    for suit in NumberCard.Suit:
+        for number in range(goal_numbers.get(suit, 0) + 1, 10):
+            result[NumberCard(suit, number)] = 1
+    killed = {card[0] for card in bunker if isinstance(card, tuple)}
+    for dragon in [SpecialCard.Zhong, SpecialCard.Fa, SpecialCard.Bai]:
+        if dragon not in killed:
+            result[dragon] = 4
+    if not flower_gone:
+        result[SpecialCard.Hua] = 1
+    return result
+
+
+def assign(cost: np.ndarray) -> np.ndarray:
+    """Returns the column of every row in the assignment with the least total cost
+
+    Hungarian algorithm, the cost matrix needs at least as many columns as rows.
+    """
+    rows, columns = cost.shape
+    assert rows <= columns
+    # Potentials and the matching, index 0 is a virtual column
+    row_potential = np.zeros(rows + 1)
+    column_potential = np.zeros(columns + 1)
+    matched_row = np.zeros(columns + 1, dtype=int)
+    previous = np.zeros(columns + 1, dtype=int)
+    for row in range(1, rows + 1):
+        matched_row[0] = row
+        column = 0
+        min_slack = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while matched_row[column] != 0:
+            used[column] = True
+            current_row = matched_row[column]
+            slack = (
+                cost[current_row - 1]
+                - row_potential[current_row]
+                - column_potential[1:]
+            )
+            free = ~used[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            previous[1:][better] = column
+            free_slack = np.where(free, min_slack[1:], np.inf)
+            next_column = int(free_slack.argmin()) + 1
+            delta = free_slack[next_column - 1]
+            row_potential[matched_row[used]] += delta
+            column_potential[used] -= delta
+            min_slack[1:][free] -= delta
+            column = next_column
+        # Flip the augmenting path
+        while column != 0:
+            previous_column = previous[column]
+            matched_row[column] = matched_row[previous_column]
+            column = previous_column
+
+    result = np.empty(rows, dtype=int)
+    for column in range(1, columns + 1):
+        if matched_row[column] != 0:
+            result[matched_row[column] - 1] = column - 1
+    return result
+
+
+def decode(
+    scores: np.ndarray,
+    cards: Sequence[Card],
+    counts: Dict[Card, int],
+    confident_margin: float = CONFIDENT_MARGIN,
+) -> Optional[List[Card]]:
+    """Returns the cards of the squares with the best total score,
+    using every card at most as often as given by counts
+
+    `scores` holds the score of every card in every square, with shape (square, card).
+    Squares whose best card is ahead of the others by `confident_margin`
+    get that card right away, the remaining squares are solved as assignment problem.
+    Returns None if there are more squares than cards.
+    """
+    remaining = dict(counts)
+    result: List[Optional[Card]] = [None] * len(scores)
+    if len(scores) == 0:
+        return []
+    ordered = np.sort(scores, axis=1)
+    margins = (
+        ordered[:, -1] - ordered[:, -2] if scores.shape[1] > 1 else ordered[:, -1]
+    )
+    best = scores.argmax(axis=1)
+    for square in np.argsort(-margins, kind="stable"):
+        card = cards[best[square]]
+        if margins[square] < confident_margin:
+            break
+        if remaining.get(card, 0) > 0:
+            remaining[card] -= 1
+            result[square] = card
+
+    open_squares = [square for square, card in enumerate(result) if card is None]
+    slots = [
+        index
+        for index, card in enumerate(cards)
+        for _ in range(remaining.get(card, 0))
+    ]
+    if len(open_squares) > len(slots):
+        return None
+    if open_squares:
+        columns = assign(-scores[np.ix_(open_squares, slots)])
+        for square, column in zip(open_squares, columns):
+            result[square] = cards[slots[column]]
+    return [card for card in result if card is not None]
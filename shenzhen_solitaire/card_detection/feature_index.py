@@ -0,0 +1,86 @@
+"""Contains a nearest neighbour index of templates"""
+from typing import Dict, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Width and height of templates are divided by this for their features
+FEATURE_FACTOR = 3
+
+
+def features(images: Sequence[np.ndarray], shape: Tuple[int, ...]) -> np.ndarray:
+    """Returns the features of images with the shape of a template
+
+    Features are the downsampled color pixels, centered and normalized,
+    so the product of two features is the correlation of the downsampled images.
+    """
+    height, width = shape[:2]
+    size = (max(width // FEATURE_FACTOR, 1), max(height // FEATURE_FACTOR, 1))
+    result = np.stack(
+        [
+            cv2.resize(image, size, interpolation=cv2.INTER_AREA).reshape(-1)
+            for image in images
+        ]
+    ).astype(np.float32)
+    result -= result.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(result, axis=1, keepdims=True)
+    return result / np.where(norms > 0, norms, 1)
+
+
+class FeatureIndex:
+    """Features of templates of equal size, each with a label
+
+    Images are classified by the template with the most similar features.
+    Several templates can have the same label, e.g. pictures of the same card.
+    """
+
+    def __init__(
+        self, shape: Tuple[int, ...], template_features: np.ndarray, labels: np.ndarray
+    ) -> None:
+        self.shape = shape
+        self.features = template_features
+        self.labels = labels
+
+    @staticmethod
+    def build(templates: Sequence[np.ndarray], labels: Sequence[int]) -> "FeatureIndex":
+        """Build the index of the templates"""
+        assert templates
+        shape = templates[0].shape
+        assert all(template.shape == shape for template in templates)
+        return FeatureIndex(shape, features(templates, shape), np.array(labels))
+
+    def query(self, images: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the most similar template of every image and its margin,
+        the difference to the similarity of the best template with another label
+
+        Images are cut to the size of the templates around their center.
+        """
+        height, width = self.shape[:2]
+        centers = []
+        for image in images:
+            top = (image.shape[0] - height) // 2
+            left = (image.shape[1] - width) // 2
+            centers.append(image[top : top + height, left : left + width])
+        similarities = features(centers, self.shape) @ self.features.T
+        rows = np.arange(len(images))
+        best = similarities.argmax(axis=1)
+        other_labels = self.labels[np.newaxis, :] != self.labels[best][:, np.newaxis]
+        second = np.where(other_labels, similarities, -np.inf).max(axis=1)
+        return (best, similarities[rows, best] - second)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Returns the index as arrays, to be restored with `from_arrays`"""
+        return {
+            "shape": np.array(self.shape),
+            "features": self.features,
+            "labels": self.labels,
+        }
+
+    @staticmethod
+    def from_arrays(arrays: Dict[str, np.ndarray]) -> "FeatureIndex":
+        """Restore an index from `to_arrays`"""
+        return FeatureIndex(
+            tuple(int(x) for x in arrays["shape"]),
+            np.asarray(arrays["features"], dtype=np.float32),
+            np.asarray(arrays["labels"]),
+        )
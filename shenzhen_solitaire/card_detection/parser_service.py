@@ -0,0 +1,155 @@
+"""Contains a pool of parser processes sharing one configuration in shared memory"""
+import functools
+import multiprocessing
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from ..board import Board
+from . import board_parser, configuration
+from .configuration import Configuration
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Arrays start at multiples of this, so every dtype is aligned
+_ALIGNMENT = 64
+
+
+@dataclass(frozen=True)
+class SharedLayout:
+    """Name of a shared memory block and where the arrays of a configuration are,
+    by key the offset, shape and dtype"""
+
+    name: str
+    arrays: Dict[str, Tuple[int, Tuple[int, ...], str]]
+
+
+class SharedConfiguration:
+    """A configuration, as arrays in one shared memory block
+
+    The block is created by the owner and removed by `close`,
+    other processes read the configuration with `attach` without copying it.
+    """
+
+    def __init__(self, conf: Configuration) -> None:
+        arrays = configuration.to_arrays(conf)
+        offsets = {}
+        size = 0
+        for key, array in arrays.items():
+            offsets[key] = size
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+        self._memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for key, array in arrays.items():
+            np.ndarray(
+                array.shape, array.dtype, buffer=self._memory.buf, offset=offsets[key]
+            )[...] = array
+        self.layout = SharedLayout(
+            name=self._memory.name,
+            arrays={
+                key: (offsets[key], array.shape, array.dtype.str)
+                for key, array in arrays.items()
+            },
+        )
+
+    def close(self) -> None:
+        """Remove the shared memory block, attached configurations become invalid"""
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self) -> "SharedConfiguration":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def attach(
+    layout: SharedLayout,
+) -> Tuple[shared_memory.SharedMemory, Configuration]:
+    """Returns the shared memory block of layout and the configuration in it
+
+    The images and templates of the configuration are read only views
+    of the block, it has to be kept open as long as the configuration is used.
+    """
+    memory = shared_memory.SharedMemory(name=layout.name)
+    arrays = {}
+    for key, (offset, shape, dtype) in layout.arrays.items():
+        array = np.ndarray(shape, np.dtype(dtype), buffer=memory.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[key] = array
+    return (memory, configuration.from_arrays(arrays))
+
+
+# Shared memory and configuration of a worker process, set when the process starts
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+_worker_conf: Optional[Configuration] = None
+
+
+def _init_worker(layout: SharedLayout) -> None:
+    global _worker_memory, _worker_conf
+    _worker_memory, _worker_conf = attach(layout)
+
+
+def _call(function: Callable[[Configuration, T], R], item: T) -> R:
+    assert _worker_conf is not None
+    return function(_worker_conf, item)
+
+
+def _parse_board(conf: Configuration, task: Tuple[np.ndarray, Dict[str, Any]]) -> Board:
+    image, options = task
+    return board_parser.parse_board(image, conf, **options)
+
+
+class ParserService:
+    """Worker processes for parsing, which are started once
+
+    The configuration is put into shared memory once,
+    workers attach to it when they start instead of loading or unpickling it,
+    so tasks do not wait for the configuration
+    and memory does not grow with the number of workers.
+    """
+
+    def __init__(self, conf: Configuration, processes: Optional[int] = None) -> None:
+        self.shared = SharedConfiguration(conf)
+        try:
+            self._pool = multiprocessing.Pool(
+                processes, initializer=_init_worker, initargs=(self.shared.layout,)
+            )
+        except BaseException:
+            self.shared.close()
+            raise
+
+    def parse_board(self, image: np.ndarray, **options: Any) -> Board:
+        """Parse a screenshot in a worker, options are those of `parse_board`"""
+        return self._pool.apply(_call, (_parse_board, (image, options)))
+
+    def map(
+        self,
+        function: Callable[[Configuration, T], R],
+        items: Iterable[T],
+        chunksize: int = 1,
+    ) -> Iterator[R]:
+        """Yields `function(conf, item)` of every item, computed in the workers,
+        in the order of items
+
+        `function` has to be picklable, e.g. a function of a module.
+        """
+        return self._pool.imap(
+            functools.partial(_call, function), items, chunksize=chunksize
+        )
+
+    def close(self) -> None:
+        """Wait for the workers to finish and remove the shared configuration"""
+        self._pool.close()
+        self._pool.join()
+        self.shared.close()
+
+    def __enter__(self) -> "ParserService":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
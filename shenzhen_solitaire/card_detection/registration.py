@@ -0,0 +1,64 @@
+"""Contains functions to find the board in a screenshot"""
+import copy
+from typing import Tuple
+
+import numpy as np
+
+from ..board import SpecialCard
+from . import adjustment, card_finder
+from .configuration import Configuration
+
+# Offset of a screenshot, as (y, x) in pixels
+Offset = Tuple[int, int]
+
+
+def pad_adjustment(adj: adjustment.Adjustment, padding: int) -> adjustment.Adjustment:
+    """Returns the adjustment with squares grown by padding on every side"""
+    result = copy.deepcopy(adj)
+    result.x -= padding
+    result.y -= padding
+    result.h += 2 * padding
+    result.w += 2 * padding
+    return result
+
+
+def shift_adjustment(
+    adj: adjustment.Adjustment, offset: Offset
+) -> adjustment.Adjustment:
+    """Returns the adjustment with squares moved by offset"""
+    result = copy.deepcopy(adj)
+    result.y += offset[0]
+    result.x += offset[1]
+    return result
+
+
+def estimate_offset(image: np.ndarray, conf: Configuration, radius: int = 5) -> Offset:
+    """Returns how far the board is moved in the image, compared to the configuration
+
+    The special buttons are always visible, so they are used as anchors.
+    Every button is matched with the templates of its dragon at every offset
+    up to radius pixels, the offset fitting all buttons best is returned.
+    """
+    squares = card_finder.get_field_squares(
+        image,
+        pad_adjustment(conf.special_button_adjustment, radius),
+        count_x=3,
+        count_y=1,
+    )
+    dragon_sequence = [SpecialCard.Zhong, SpecialCard.Fa, SpecialCard.Bai]
+    candidates = np.array(
+        [
+            [
+                index
+                for index, (_, card, _) in enumerate(conf.special_buttons)
+                if card == dragon
+            ]
+            for dragon in dragon_sequence
+        ]
+    )
+    buttons = conf.stacks().special_buttons
+    assert buttons is not None, "Special buttons need to have equal size"
+    fits = buttons.match_candidates_all(squares, candidates)
+    total = fits.max(axis=3).sum(axis=0)
+    offset_y, offset_x = np.unravel_index(total.argmax(), total.shape)
+    return (int(offset_y) - radius, int(offset_x) - radius)
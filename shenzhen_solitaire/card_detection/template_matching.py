@@ -0,0 +1,206 @@
+"""Contains batched template matching on numpy arrays"""
+from typing import Dict, Sequence
+
+import cv2
+import numpy as np
+
+
+def downsample(image: np.ndarray, factor: int) -> np.ndarray:
+    """Returns the image in grayscale, with width and height divided by factor"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    height, width = image.shape[:2]
+    return cv2.resize(
+        image,
+        (max(width // factor, 1), max(height // factor, 1)),
+        interpolation=cv2.INTER_AREA,
+    )
+
+
+def stackable(templates: Sequence[np.ndarray]) -> bool:
+    """Returns true if the templates can be stacked, see `TemplateStack`"""
+    return bool(templates) and all(
+        template.shape == templates[0].shape for template in templates
+    )
+
+
+def match_each(
+    templates: Sequence[np.ndarray], images: Sequence[np.ndarray]
+) -> np.ndarray:
+    """Returns the best score of every template in every image,
+    like `TemplateStack.match`
+
+    Templates are matched one by one with `cv2.matchTemplate`,
+    so they may differ in size or be none at all.
+    """
+    result = np.empty((len(images), len(templates)))
+    for image_index, image in enumerate(images):
+        for template_index, template in enumerate(templates):
+            result[image_index, template_index] = cv2.minMaxLoc(
+                cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+            )[1]
+    return result
+
+
+class TemplateStack:
+    """Templates of equal size, stacked to be matched against many images at once
+
+    Scores are the same as the maximum of `cv2.matchTemplate`
+    with `cv2.TM_CCOEFF_NORMED`.
+    There needs to be at least one template, see `stackable`.
+    """
+
+    def __init__(self, templates: Sequence[np.ndarray]) -> None:
+        assert stackable(templates)
+        self.shape = templates[0].shape
+        stacked = np.stack(templates).astype(np.float64)
+        stacked = stacked.reshape(*stacked.shape[:3], -1)
+        stacked -= stacked.mean(axis=(1, 2), keepdims=True)
+        self.norms = np.sqrt((stacked ** 2).sum(axis=(1, 2, 3)))
+        # Flattened templates, centered per channel
+        self.templates = stacked.reshape(len(templates), -1).astype(np.float32)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Returns the preprocessed templates, to be restored with `from_arrays`"""
+        return {
+            "shape": np.array(self.shape),
+            "templates": self.templates,
+            "norms": self.norms,
+        }
+
+    @staticmethod
+    def from_arrays(arrays: Dict[str, np.ndarray]) -> "TemplateStack":
+        """Restore templates preprocessed by `to_arrays`"""
+        result = TemplateStack.__new__(TemplateStack)
+        result.shape = tuple(int(x) for x in arrays["shape"])
+        result.templates = np.asarray(arrays["templates"], dtype=np.float32)
+        result.norms = np.asarray(arrays["norms"], dtype=np.float64)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def _window_variance(self, images: np.ndarray) -> np.ndarray:
+        """Returns the variance sum of the window at every offset, over all channels,
+        using integral images"""
+        height, width = self.shape[:2]
+        count, image_height, image_width, channels = images.shape
+        values = images.astype(np.float64)
+        sums = np.zeros((count, image_height + 1, image_width + 1, channels))
+        sums[:, 1:, 1:] = values.cumsum(axis=1).cumsum(axis=2)
+        squares = np.zeros((count, image_height + 1, image_width + 1))
+        squares[:, 1:, 1:] = (values ** 2).sum(axis=3).cumsum(axis=1).cumsum(axis=2)
+
+        def _window_sums(integral: np.ndarray) -> np.ndarray:
+            return (
+                integral[:, height:, width:]
+                - integral[:, :-height, width:]
+                - integral[:, height:, :-width]
+                + integral[:, :-height, :-width]
+            )
+
+        return _window_sums(squares) - (_window_sums(sums) ** 2).sum(axis=3) / (
+            height * width
+        )
+
+    def _candidate_numerators(
+        self, images: np.ndarray, templates: np.ndarray
+    ) -> np.ndarray:
+        """Returns the products of the windows of every image with its templates,
+        with shape (image, offset y, offset x, template)
+
+        `templates` holds the flattened templates of every image,
+        with shape (image, template, pixel).
+        """
+        height, width = self.shape[:2]
+        count = len(images)
+        offsets_y = images.shape[1] - height + 1
+        offsets_x = images.shape[2] - width + 1
+
+        # The templates are centered, so centering the windows does not change this
+        result = np.empty(
+            (count, offsets_y, offsets_x, templates.shape[1]), np.float32
+        )
+        for offset_y in range(offsets_y):
+            for offset_x in range(offsets_x):
+                window = images[
+                    :, offset_y : offset_y + height, offset_x : offset_x + width
+                ].reshape(count, 1, -1)
+                result[:, offset_y, offset_x] = (window @ templates.transpose(0, 2, 1))[
+                    :, 0
+                ]
+        return result
+
+    @staticmethod
+    def _normalize(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        # Same handling of flat windows or templates as cv2.matchTemplate
+        absolute = np.abs(numerator)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                absolute < denominator,
+                numerator / denominator,
+                np.where(absolute < denominator * 1.125, np.sign(numerator), 0),
+            )
+
+    @staticmethod
+    def _stack_images(images: Sequence[np.ndarray]) -> np.ndarray:
+        stacked = np.stack(images).astype(np.float32)
+        return stacked.reshape(*stacked.shape[:3], -1)
+
+    def match_all(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """Returns the scores of every template at every offset in every image,
+        with shape (image, offset y, offset x, template)
+
+        All images need to have the same size, at least as large as the templates.
+        """
+        stacked = self._stack_images(images)
+        height, width = self.shape[:2]
+        count = len(stacked)
+        offsets_y = stacked.shape[1] - height + 1
+        offsets_x = stacked.shape[2] - width + 1
+
+        # One matrix product per offset covers all images and templates
+        numerator = np.empty((count, offsets_y, offsets_x, len(self)), np.float32)
+        for offset_y in range(offsets_y):
+            for offset_x in range(offsets_x):
+                window = stacked[
+                    :, offset_y : offset_y + height, offset_x : offset_x + width
+                ]
+                numerator[:, offset_y, offset_x] = (
+                    window.reshape(count, -1) @ self.templates.T
+                )
+
+        denominator = (
+            np.sqrt(np.maximum(self._window_variance(stacked), 0))[..., np.newaxis]
+            * self.norms
+        )
+        return self._normalize(numerator, denominator)
+
+    def match(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """Returns the best score of every template in every image,
+        with shape (image, template)"""
+        return self.match_all(images).max(axis=(1, 2))
+
+    def match_candidates_all(
+        self, images: Sequence[np.ndarray], candidates: np.ndarray
+    ) -> np.ndarray:
+        """Returns the scores of some templates at every offset in every image
+
+        `candidates` holds the indices of the templates to match for every image,
+        with shape (image, candidate),
+        the result has the shape (image, offset y, offset x, candidate).
+        """
+        stacked = self._stack_images(images)
+        numerator = self._candidate_numerators(stacked, self.templates[candidates])
+        denominator = (
+            np.sqrt(np.maximum(self._window_variance(stacked), 0))[..., np.newaxis]
+            * self.norms[candidates][:, np.newaxis, np.newaxis]
+        )
+        return self._normalize(numerator, denominator)
+
+    def match_candidates(
+        self, images: Sequence[np.ndarray], candidates: np.ndarray
+    ) -> np.ndarray:
+        """Returns the best score of some templates in every image,
+        with the shape of `candidates`, see `match_candidates_all`"""
+        return self.match_candidates_all(images, candidates).max(axis=(1, 2))
@@ -1,7 +1,8 @@
+import abc
+import dataclasses
 import time
-from typing import List, Tuple, Dict, Any, Union
+from typing import List, Optional, Sequence, Tuple, Dict, Any, Union
 
-import pyautogui
 import shenzhen_solitaire.board as board
 import shenzhen_solitaire.card_detection.adjustment as adjustment
 import shenzhen_solitaire.card_detection.configuration as configuration
@@ -9,6 +10,7 @@ import warnings
 
 from dataclasses import dataclass
 from shenzhen_solitaire.board import SpecialCard
+from shenzhen_solitaire.capture import Region, ScreenWait
 
 DRAG_DURATION = 0.2
 CLICK_DURATION = 1
@@ -16,30 +18,112 @@ DRAGON_WAIT = 1
 HUA_WAIT = 1
 GOAL_WAIT = 0.4
 
+# Order of the dragon buttons, from top to bottom
+DRAGON_SEQUENCE = [SpecialCard.Zhong, SpecialCard.Fa, SpecialCard.Bai]
+
+
+class InputBackend(abc.ABC):
+    """Mouse input to the game, and waiting between inputs"""
+
+    @abc.abstractmethod
+    def move_to(self, x: int, y: int) -> None:
+        """Move the mouse to a point on the screen"""
+
+    @abc.abstractmethod
+    def mouse_down(self) -> None:
+        """Press the mouse button"""
+
+    @abc.abstractmethod
+    def mouse_up(self) -> None:
+        """Release the mouse button"""
+
+    @abc.abstractmethod
+    def sleep(self, duration: float) -> None:
+        """Wait for duration seconds"""
+
+
+class ScreenInput(InputBackend):
+    """Input to the screen with pyautogui"""
+
+    def move_to(self, x: int, y: int) -> None:
+        import pyautogui
+
+        pyautogui.moveTo(x=x, y=y)
+
+    def mouse_down(self) -> None:
+        import pyautogui
+
+        pyautogui.mouseDown()
+
+    def mouse_up(self) -> None:
+        import pyautogui
+
+        pyautogui.mouseUp()
+
+    def sleep(self, duration: float) -> None:
+        time.sleep(duration)
+
+
+SCREEN_INPUT = ScreenInput()
+
 
 def drag(
-    src: Tuple[int, int], dst: Tuple[int, int], offset: Tuple[int, int] = (0, 0)
+    src: Tuple[int, int],
+    dst: Tuple[int, int],
+    offset: Tuple[int, int] = (0, 0),
+    waiter: Optional[ScreenWait] = None,
+    watch: Sequence[Region] = (),
+    backend: InputBackend = SCREEN_INPUT,
 ) -> None:
+    """Drag from src to dst
 
-    time.sleep(DRAG_DURATION / 3)
-    pyautogui.moveTo(x=src[0] + offset[0], y=src[1] + offset[1])
-    pyautogui.mouseDown()
-    time.sleep(DRAG_DURATION / 3)
-    pyautogui.moveTo(
+    With `waiter`, the drag ends as soon as the watched regions settled,
+    instead of after the fixed duration.
+    """
+    if waiter is None:
+        backend.sleep(DRAG_DURATION / 3)
+    else:
+        waiter.mark(watch)
+    backend.move_to(x=src[0] + offset[0], y=src[1] + offset[1])
+    backend.mouse_down()
+    backend.sleep(DRAG_DURATION / 3)
+    backend.move_to(
         x=dst[0] + offset[0], y=dst[1] + offset[1],
     )
-    pyautogui.mouseUp()
-    time.sleep(DRAG_DURATION / 3)
+    backend.mouse_up()
+    if waiter is None:
+        backend.sleep(DRAG_DURATION / 3)
+    else:
+        waiter.wait(watch, timeout=2 * DRAG_DURATION / 3)
+
 
+def click(
+    point: Tuple[int, int],
+    offset: Tuple[int, int] = (0, 0),
+    waiter: Optional[ScreenWait] = None,
+    watch: Sequence[Region] = (),
+    timeout: float = CLICK_DURATION / 3 + DRAGON_WAIT,
+    settle_polls: Optional[int] = None,
+    backend: InputBackend = SCREEN_INPUT,
+) -> None:
+    """Click at point
 
-def click(point: Tuple[int, int], offset: Tuple[int, int] = (0, 0)) -> None:
-    time.sleep(CLICK_DURATION / 3)
-    pyautogui.moveTo(x=point[0] + offset[0], y=point[1] + offset[1])
-    pyautogui.mouseDown()
-    time.sleep(CLICK_DURATION / 3)
-    pyautogui.mouseUp()
-    time.sleep(CLICK_DURATION / 3)
-    time.sleep(DRAGON_WAIT)
+    With `waiter`, the click ends as soon as the watched regions settled,
+    or after timeout seconds, instead of after the fixed duration.
+    """
+    if waiter is None:
+        backend.sleep(CLICK_DURATION / 3)
+    else:
+        waiter.mark(watch)
+    backend.move_to(x=point[0] + offset[0], y=point[1] + offset[1])
+    backend.mouse_down()
+    backend.sleep(CLICK_DURATION / 3)
+    backend.mouse_up()
+    if waiter is None:
+        backend.sleep(CLICK_DURATION / 3)
+        backend.sleep(DRAGON_WAIT)
+    else:
+        waiter.wait(watch, timeout=timeout, settle_polls=settle_polls)
 
 
 @dataclass
@@ -51,25 +135,76 @@ class DragAction:
 @dataclass
 class ClickAction:
     destination: Tuple[int, int]
+    # Points which change after the click
+    watch: List[Tuple[int, int]] = dataclasses.field(default_factory=list)
+
 
 @dataclass
 class WaitAction:
     duration: float
+    # Points which change during the wait
+    watch: List[Tuple[int, int]] = dataclasses.field(default_factory=list)
 
 
-def _parse_field(
-    field: Dict[str, Any], conf: configuration.Configuration
+def bunker_slot(slot_index: int, conf: configuration.Configuration) -> Tuple[int, int]:
+    """Returns the point of a bunker slot"""
+    return (
+        slot_index * conf.bunker_adjustment.dx
+        + conf.bunker_adjustment.x
+        + conf.bunker_adjustment.w // 2,
+        conf.bunker_adjustment.y + conf.bunker_adjustment.h // 2,
+    )
+
+
+def goal_slot(slot_index: int, conf: configuration.Configuration) -> Tuple[int, int]:
+    """Returns the point of a goal slot"""
+    return (
+        slot_index * conf.goal_adjustment.dx
+        + conf.goal_adjustment.x
+        + conf.goal_adjustment.w // 2,
+        conf.goal_adjustment.y + conf.goal_adjustment.h // 2,
+    )
+
+
+def special_button(
+    dragon_id: int, conf: configuration.Configuration
+) -> Tuple[int, int]:
+    """Returns the point of the button of a dragon, see `DRAGON_SEQUENCE`"""
+    return (
+        conf.special_button_adjustment.x + conf.special_button_adjustment.w // 2,
+        conf.special_button_adjustment.y
+        + dragon_id * conf.special_button_adjustment.dy
+        + conf.special_button_adjustment.h // 2,
+    )
+
+
+def _watch_region(point: Tuple[int, int], conf: configuration.Configuration) -> Region:
+    """Returns the region of a card square around point"""
+    width = conf.field_adjustment.w
+    height = conf.field_adjustment.h
+    return (int(point[0]) - width // 2, int(point[1]) - height // 2, width, height)
+
+
+def field_point(
+    column: int, row: int, conf: configuration.Configuration
 ) -> Tuple[int, int]:
+    """Returns the point of the card in a row of a field column"""
     return (
-        int(field["column"]) * conf.field_adjustment.dx
+        column * conf.field_adjustment.dx
         + conf.field_adjustment.x
         + conf.field_adjustment.w // 2,
-        int(field["row"]) * conf.field_adjustment.dy
+        row * conf.field_adjustment.dy
         + conf.field_adjustment.y
         + conf.field_adjustment.h // 2,
     )
 
 
+def _parse_field(
+    field: Dict[str, Any], conf: configuration.Configuration
+) -> Tuple[int, int]:
+    return field_point(int(field["column"]), int(field["row"]), conf)
+
+
 def parse_action(
     action: Dict[str, Any],
     conf: configuration.Configuration,
@@ -80,12 +215,7 @@ def parse_action(
     action_name = action_name.lower()
     if action_name == "bunkerize":
         field = _parse_field(info["field_position"], conf)
-        bunker = (
-            int(info["bunker_slot_index"]) * conf.bunker_adjustment.dx
-            + conf.bunker_adjustment.x
-            + conf.bunker_adjustment.w // 2,
-            conf.bunker_adjustment.y + conf.bunker_adjustment.h // 2,
-        )
+        bunker = bunker_slot(int(info["bunker_slot_index"]), conf)
         if str(info["to_bunker"]).lower() == "true":
             return DragAction(source=field, destination=bunker)
         else:
@@ -96,22 +226,17 @@ def parse_action(
             destination=_parse_field(info["destination"], conf),
         )
     elif action_name == "dragonkill":
-        dragon_sequence = [SpecialCard.Zhong, SpecialCard.Fa, SpecialCard.Bai]
         dragon_name_map = {
             "zhong": SpecialCard.Zhong,
             "fa": SpecialCard.Fa,
             "bai": SpecialCard.Bai,
         }
         card_type = dragon_name_map[info["card"].lower()]
-        dragon_id = dragon_sequence.index(card_type)
+        dragon_id = DRAGON_SEQUENCE.index(card_type)
         return ClickAction(
-            destination=(
-                conf.special_button_adjustment.x
-                + conf.special_button_adjustment.w // 2,
-                conf.special_button_adjustment.y
-                + dragon_id * conf.special_button_adjustment.dy
-                + conf.special_button_adjustment.h // 2,
-            )
+            destination=special_button(dragon_id, conf),
+            # The dragons are moved to one of the bunker slots
+            watch=[bunker_slot(slot_index, conf) for slot_index in range(3)],
         )
     elif action_name == "goal":
 
@@ -128,46 +253,93 @@ def parse_action(
             obvious = False
         
         goal_values[info["card"]["suit"].lower()] = proposed_value
-        
+
+        goal = goal_slot(int(info["goal_slot_index"]), conf)
         if obvious:
-            return WaitAction(duration=GOAL_WAIT)
+            return WaitAction(duration=GOAL_WAIT, watch=[goal])
 
-        goal = (
-            int(info["goal_slot_index"]) * conf.goal_adjustment.dx
-            + conf.goal_adjustment.x
-            + conf.goal_adjustment.w // 2,
-            conf.goal_adjustment.y + conf.goal_adjustment.h // 2,
-        )
         if "Field" in info["source"]:
             source = _parse_field(info["source"]["Field"], conf)
         else:
-            source = (
-                int(info["source"]["Bunker"]["slot_index"]) * conf.bunker_adjustment.dx
-                + conf.bunker_adjustment.x
-                + conf.bunker_adjustment.w // 2,
-                conf.bunker_adjustment.y + conf.bunker_adjustment.h // 2,
-            )
+            source = bunker_slot(int(info["source"]["Bunker"]["slot_index"]), conf)
         return DragAction(source=source, destination=goal)
     elif action_name == "huakill":
-        return WaitAction(duration=HUA_WAIT)
+        return WaitAction(
+            duration=HUA_WAIT,
+            watch=[
+                (
+                    conf.hua_adjustment.x + conf.hua_adjustment.w // 2,
+                    conf.hua_adjustment.y + conf.hua_adjustment.h // 2,
+                )
+            ],
+        )
     else:
         assert 0
 
 
+def board_goal_values(action_board: board.Board) -> Dict[str, int]:
+    """Returns the goal values of the board, like `parse_action` takes them"""
+    return {
+        suit.name.lower(): action_board.getGoal(suit) for suit in board.NumberCard.Suit
+    }
+
+
+def execute_action(
+    action: Union[DragAction, ClickAction, WaitAction],
+    offset: Tuple[int, int],
+    conf: configuration.Configuration,
+    waiter: Optional[ScreenWait] = None,
+    backend: InputBackend = SCREEN_INPUT,
+) -> None:
+    """Execute one action returned by `parse_action`, see `handle_actions`"""
+    if isinstance(action, DragAction):
+        drag(
+            action.source,
+            action.destination,
+            offset,
+            waiter,
+            [
+                _watch_region(action.source, conf),
+                _watch_region(action.destination, conf),
+            ],
+            backend,
+        )
+    elif isinstance(action, ClickAction):
+        click(
+            action.destination,
+            offset,
+            waiter,
+            [_watch_region(point, conf) for point in action.watch],
+            backend=backend,
+        )
+    elif isinstance(action, WaitAction):
+        if waiter is None or not action.watch:
+            backend.sleep(action.duration)
+        else:
+            waiter.wait(
+                [_watch_region(point, conf) for point in action.watch],
+                timeout=action.duration,
+            )
+
+
 def handle_actions(
     actions: List[Dict[str, Dict[str, Any]]],
     offset: Tuple[int, int],
     conf: configuration.Configuration,
+    waiter: Optional[ScreenWait] = None,
+    backend: InputBackend = SCREEN_INPUT,
 ) -> None:
+    """Execute the actions of a solution
+
+    With `waiter`, every action waits until the screen regions it changes
+    have settled, instead of sleeping for a fixed duration.
+    The fixed durations are the timeouts then.
+    Input is sent to `backend`, e.g. a `simulation.SimulatedInput`.
+    """
     goal_values = {"red": 0, "black": 0, "green": 0}
     action_tuples = (
         (action, parse_action(action, conf, goal_values)) for action in actions
     )
     for name, action in action_tuples:
         print(name)
-        if isinstance(action, DragAction):
-            drag(action.source, action.destination, offset)
-        elif isinstance(action, ClickAction):
-            click(action.destination, offset)
-        elif isinstance(action, WaitAction):
-            time.sleep(action.duration)
+        execute_action(action, offset, conf, waiter, backend)
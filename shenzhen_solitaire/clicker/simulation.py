@@ -0,0 +1,260 @@
+"""Contains a simulated game, which takes the input of the clicker without a screen"""
+import copy
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .. import clicker
+from ..board import Board, Card, NumberCard, Position, SpecialCard
+from ..card_detection.configuration import Configuration
+from ..solver.board_actions import (
+    Action,
+    BunkerizeAction,
+    DragonKillAction,
+    GoalAction,
+    HuaKillAction,
+    MoveAction,
+)
+from ..compact_board import CARDS, FITS, CompactBoard
+from ..solver.board_possibilities import dragonkill_actions, possible_actions
+
+Point = Tuple[float, float]
+# Position, index and row of a card on the board
+Location = Tuple[Position, int, int]
+
+
+def _fits(card: Card, destination: Card) -> bool:
+    """Returns true if `card` can be put on top of `destination`"""
+    return FITS[card.identifier() * len(CARDS) + destination.identifier()] == 1
+
+
+@dataclass
+class GameTiming:
+    """Durations of the simulated game and input, in seconds
+
+    `input_latency` passes with every input call, like `pyautogui.PAUSE`.
+    The other durations are the animations of the game, input is ignored
+    while the game animates. By default they are the waits of the clicker.
+    """
+
+    input_latency: float = 0.0
+    move: float = 0.0
+    goal: float = clicker.GOAL_WAIT
+    hua: float = clicker.HUA_WAIT
+    dragon: float = clicker.DRAGON_WAIT
+
+
+@dataclass
+class RecordedInput:
+    """A drag or click, at simulated time `time`
+
+    A click has the same source and destination.
+    `action` is the action the game did, None if it ignored the input.
+    """
+
+    time: float
+    source: Point
+    destination: Point
+    action: Optional[Action]
+
+
+class SimulatedInput(clicker.InputBackend):
+    """Input backend playing a simulated game, instead of the screen
+
+    Drags and clicks are recorded and applied to `board`, if they are
+    a legal move at the positions of the configuration.
+    Like the game, cards are moved to the goal and the flower is removed
+    automatically. Sleeps and inputs only advance the simulated `time`.
+    """
+
+    def __init__(
+        self,
+        start_board: Board,
+        conf: Configuration,
+        offset: Tuple[int, int] = (0, 0),
+        timing: Optional[GameTiming] = None,
+    ) -> None:
+        self.board = copy.deepcopy(start_board)
+        self.conf = conf
+        self.offset = offset
+        self.timing = timing if timing is not None else GameTiming()
+        self.time = 0.0
+        self.inputs: List[RecordedInput] = []
+        self._busy_until = 0.0
+        self._position: Point = (0, 0)
+        self._pressed: Optional[Point] = None
+        self._press_time = 0.0
+        self._automatic_moves()
+
+    @property
+    def missed(self) -> int:
+        """Returns the number of inputs the game ignored"""
+        return sum(recorded.action is None for recorded in self.inputs)
+
+    def move_to(self, x: int, y: int) -> None:
+        self.time += self.timing.input_latency
+        self._position = (x - self.offset[0], y - self.offset[1])
+
+    def mouse_down(self) -> None:
+        self.time += self.timing.input_latency
+        self._pressed = self._position
+        self._press_time = self.time
+
+    def mouse_up(self) -> None:
+        self.time += self.timing.input_latency
+        if self._pressed is None:
+            return
+        source = self._pressed
+        self._pressed = None
+        action = None
+        # The game ignores input while it animates
+        if self._press_time >= self._busy_until:
+            action = (
+                self._click_action(source)
+                if self._near(source, self._position)
+                else self._drag_action(source, self._position)
+            )
+        self.inputs.append(RecordedInput(self.time, source, self._position, action))
+        if action is not None:
+            action.apply(self.board)
+            self._busy_until = self.time + (
+                self.timing.dragon
+                if isinstance(action, DragonKillAction)
+                else self.timing.move
+            )
+            self._automatic_moves()
+
+    def sleep(self, duration: float) -> None:
+        self.time += duration
+
+    def _near(self, point: Point, other: Point) -> bool:
+        tolerance = min(self.conf.field_adjustment.w, self.conf.field_adjustment.h) / 2
+        return abs(point[0] - other[0]) <= tolerance and abs(
+            point[1] - other[1]
+        ) <= tolerance
+
+    def _locate(self, point: Point) -> Optional[Location]:
+        """Returns the field square, bunker or goal slot at a point of the clicker"""
+        field = self.conf.field_adjustment
+        column = round((point[0] - field.x - field.w // 2) / field.dx)
+        row = round((point[1] - field.y - field.h // 2) / field.dy)
+        if (
+            0 <= column < Board.MAX_COLUMN_SIZE
+            and 0 <= row < Board.MAX_ROW_SIZE
+            and self._near(point, clicker.field_point(column, row, self.conf))
+        ):
+            return (Position.Field, column, row)
+        for index in range(3):
+            if self._near(point, clicker.bunker_slot(index, self.conf)):
+                return (Position.Bunker, index, 0)
+            if self._near(point, clicker.goal_slot(index, self.conf)):
+                return (Position.Goal, index, 0)
+        return None
+
+    def _goal_action(
+        self, card: Card, position: Position, index: int, row: int, goal_id: int
+    ) -> Optional[GoalAction]:
+        if not isinstance(card, NumberCard):
+            return None
+        goal = self.board.goal[goal_id]
+        if goal is None and card.number != 1:
+            return None
+        if goal is not None and (
+            goal.suit != card.suit or goal.number + 1 != card.number
+        ):
+            return None
+        return GoalAction(
+            card=card,
+            source_id=index,
+            source_row_index=row,
+            source_position=position,
+            goal_id=goal_id,
+            obvious=False,
+        )
+
+    def _drag_action(self, source: Point, destination: Point) -> Optional[Action]:
+        """Returns the legal action a drag does, by the rules of the game
+
+        Unlike the solver, cards can be put on any empty column or slot.
+        Moves between bunker slots have no action and are ignored.
+        """
+        source_location = self._locate(source)
+        destination_location = self._locate(destination)
+        if source_location is None or destination_location is None:
+            return None
+        position, index, row = source_location
+        destination_position, destination_id, destination_row = destination_location
+        if position == Position.Field:
+            cards = self.board.field[index][row:]
+            if not cards or not all(
+                _fits(card, below) for below, card in zip(cards, cards[1:])
+            ):
+                return None
+        elif position == Position.Bunker:
+            bunker_card = self.board.bunker[index]
+            if bunker_card is None or isinstance(bunker_card, tuple):
+                return None
+            cards = [bunker_card]
+        else:
+            return None
+        if cards[0] == SpecialCard.Hua:
+            return None
+
+        if destination_position == Position.Field:
+            column = self.board.field[destination_id]
+            if destination_row > len(column) or (
+                column and not _fits(cards[0], column[-1])
+            ):
+                return None
+            if position == Position.Bunker:
+                return BunkerizeAction(
+                    card=cards[0],
+                    bunker_id=index,
+                    field_id=destination_id,
+                    field_row_index=len(column),
+                    to_bunker=False,
+                )
+            if destination_id == index:
+                return None
+            return MoveAction(
+                cards=list(cards),
+                source_id=index,
+                source_row_index=row,
+                destination_id=destination_id,
+                destination_row_index=len(column),
+            )
+        if len(cards) != 1:
+            return None
+        if destination_position == Position.Goal:
+            return self._goal_action(cards[0], position, index, row, destination_id)
+        if position == Position.Field and self.board.bunker[destination_id] is None:
+            return BunkerizeAction(
+                card=cards[0],
+                bunker_id=destination_id,
+                field_id=index,
+                field_row_index=row,
+                to_bunker=True,
+            )
+        return None
+
+    def _click_action(self, point: Point) -> Optional[Action]:
+        """Returns the dragon kill of the button at point, if it is possible"""
+        for dragon_id, dragon in enumerate(clicker.DRAGON_SEQUENCE):
+            if not self._near(point, clicker.special_button(dragon_id, self.conf)):
+                continue
+            for action in dragonkill_actions(CompactBoard.from_board(self.board)):
+                if action.dragon == dragon:
+                    return action
+        return None
+
+    def _automatic_moves(self) -> None:
+        """Do the moves the game does by itself, one after the other"""
+        while True:
+            action = next(iter(possible_actions(self.board)), None)
+            if isinstance(action, HuaKillAction):
+                duration = self.timing.hua
+            elif isinstance(action, GoalAction) and action.obvious:
+                duration = self.timing.goal
+            else:
+                return
+            action.apply(self.board)
+            self._busy_until = max(self._busy_until, self.time) + duration
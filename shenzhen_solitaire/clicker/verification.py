@@ -0,0 +1,152 @@
+"""Contains the execution of solutions with a check of the game before every input"""
+import copy
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .. import clicker
+from ..board import Board
+from ..capture import CaptureBackend, ScreenWait
+from ..card_detection.board_parser import (
+    CoarseToFine,
+    ReparseStats,
+    parse_board,
+    reparse_board,
+)
+from ..card_detection.configuration import Configuration
+from ..solver.board_actions import Action
+
+# Times the game may differ from the solution, before it is given up
+MAX_DIVERGENCES = 5
+
+# Returns the board of the game, all squares are read with full=True
+ReadBoard = Callable[[bool], Board]
+Solve = Callable[[Board], Optional[List[Action]]]
+
+
+class ScreenReader:
+    """Reads the board of the game from the screen
+
+    After the first read, only the squares which changed since the previous
+    screenshot are read again, see `reparse_board`.
+    """
+
+    def __init__(
+        self,
+        capture: CaptureBackend,
+        conf: Configuration,
+        *,
+        coarse: Optional[CoarseToFine] = None,
+        stats: Optional[ReparseStats] = None,
+    ) -> None:
+        self.capture = capture
+        self.conf = conf
+        self.coarse = coarse
+        self.stats = stats if stats is not None else ReparseStats()
+        self._previous: Optional[Tuple[np.ndarray, Board]] = None
+
+    def __call__(self, full: bool = False) -> Board:
+        image = self.capture.capture()
+        if full or self._previous is None:
+            board = parse_board(image, self.conf, coarse=self.coarse)
+        else:
+            board = reparse_board(
+                *self._previous, image, self.conf, coarse=self.coarse, stats=self.stats
+            )
+        self._previous = (image, board)
+        return board
+
+
+def same_state(board: Board, other: Board) -> bool:
+    """Returns true if both boards are the same game
+
+    Dragons in the bunker are not told apart, the parser knows
+    which dragons were moved to the bunker, but not to which slot.
+    """
+    return (
+        board.field == other.field
+        and board.goal == other.goal
+        and board.flower_gone == other.flower_gone
+        and all(
+            slot == other_slot
+            or (isinstance(slot, tuple) and isinstance(other_slot, tuple))
+            for slot, other_slot in zip(board.bunker, other.bunker)
+        )
+    )
+
+
+@dataclass
+class VerificationStats:
+    """Counts of the checks of the game
+
+    `divergences` counts the checks where the game differed from the solution,
+    `duration` is the time spent reading the game, in seconds.
+    """
+
+    checks: int = 0
+    divergences: int = 0
+    duration: float = 0.0
+
+
+def handle_actions(
+    actions: List[Action],
+    start_board: Board,
+    offset: Tuple[int, int],
+    conf: Configuration,
+    read: ReadBoard,
+    solve: Solve,
+    *,
+    waiter: Optional[ScreenWait] = None,
+    backend: clicker.InputBackend = clicker.SCREEN_INPUT,
+    max_divergences: int = MAX_DIVERGENCES,
+    stats: Optional[VerificationStats] = None,
+) -> bool:
+    """Execute the actions of a solution of start_board, like `clicker.handle_actions`
+
+    The board the solution expects is updated with every action.
+    Before every drag or click, `read` returns the board of the game.
+    If it differs, e.g. because a drag was missed, the whole board is read
+    again and `solve` solves it, the new solution is executed instead.
+    The screen should have settled when it is read, e.g. by using `waiter`.
+    Returns False if the game was given up, after `max_divergences`
+    divergences or if the game could not be solved.
+    """
+    if stats is None:
+        stats = VerificationStats()
+    expected = copy.deepcopy(start_board)
+    remaining = list(actions)
+    divergences = 0
+    # The screen showed another game at the previous read
+    full_read = True
+    while remaining:
+        action = remaining.pop(0)
+        action_struct = action.to_json_struct()
+        parsed = clicker.parse_action(
+            action_struct, conf, clicker.board_goal_values(expected)
+        )
+        # Waits are the moves of the game itself, only input can be missed
+        if not isinstance(parsed, clicker.WaitAction):
+            start_time = time.monotonic()
+            actual = read(full_read)
+            full_read = False
+            stats.checks += 1
+            stats.duration += time.monotonic() - start_time
+            if not same_state(actual, expected):
+                stats.divergences += 1
+                divergences += 1
+                print("Game differs from the solution, solving it again")
+                if divergences > max_divergences:
+                    return False
+                actual = read(True)
+                solution = solve(actual)
+                if solution is None:
+                    return False
+                expected = copy.deepcopy(actual)
+                remaining = list(solution)
+                continue
+        print(action_struct)
+        clicker.execute_action(parsed, offset, conf, waiter, backend)
+        action.apply(expected)
+    return True
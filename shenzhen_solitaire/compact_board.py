@@ -0,0 +1,326 @@
+"""Contains array backed board class"""
+import itertools
+import random
+from typing import List, Optional, Tuple, Union
+
+from .board import Board, Card, NumberCard, SpecialCard
+
+EMPTY = 0x7F
+BLOCKED = 0x80
+
+FIELD_OFFSET = 0
+HEIGHT_OFFSET = FIELD_OFFSET + Board.MAX_COLUMN_SIZE * Board.MAX_ROW_SIZE
+BUNKER_OFFSET = HEIGHT_OFFSET + Board.MAX_COLUMN_SIZE
+GOAL_OFFSET = BUNKER_OFFSET + 3
+FLOWER_OFFSET = GOAL_OFFSET + 3
+BOARD_SIZE = FLOWER_OFFSET + 1
+
+HUA = SpecialCard.Hua.identifier()
+
+CARDS: List[Card] = sorted(
+    itertools.chain(
+        SpecialCard,
+        (
+            NumberCard(suit, number)
+            for suit, number in itertools.product(NumberCard.Suit, range(1, 10))
+        ),
+    ),
+    key=lambda card: card.identifier(),
+)
+assert [card.identifier() for card in CARDS] == list(range(len(CARDS)))
+
+# Number of a card identifier, 0 for special cards
+NUMBER = bytes(card.number if isinstance(card, NumberCard) else 0 for card in CARDS)
+# Suit value of a card identifier, EMPTY for special cards
+SUIT = bytes(
+    card.suit.value if isinstance(card, NumberCard) else EMPTY for card in CARDS
+)
+# FITS[card * len(CARDS) + destination] is 1, if card can be put on destination
+FITS = bytes(
+    int(
+        NUMBER[card] != 0
+        and NUMBER[destination] == NUMBER[card] + 1
+        and SUIT[card] != SUIT[destination]
+    )
+    for card, destination in itertools.product(range(len(CARDS)), repeat=2)
+)
+
+# Random 64 bit value for every (offset, byte value) pair, ZOBRIST[offset << 8 | value]
+_ZOBRIST_RANDOM = random.Random(0x5A0B)
+ZOBRIST = [_ZOBRIST_RANDOM.getrandbits(64) for _ in range(BOARD_SIZE << 8)]
+
+
+def zobrist_hash(data: bytes) -> int:
+    """Returns the zobrist hash of the given compact board data"""
+    result = 0
+    for offset, value in enumerate(data):
+        result ^= ZOBRIST[offset << 8 | value]
+    return result
+
+
+class CompactBoard:
+    """Solitaire board stored in a single bytearray
+
+    The field is laid out as `MAX_COLUMN_SIZE` columns of `MAX_ROW_SIZE` card identifiers,
+    followed by the column heights, the bunker, the goal and the flower flag.
+    Unused field positions are `EMPTY`, so equal states have equal data.
+    `zobrist` holds a 64 bit hash of the data, every mutation updates it incrementally.
+    Bunker slots contain `EMPTY`, a card identifier or `BLOCKED` ored with the dragon identifier.
+    Goal slots contain `EMPTY` or the identifier of the topmost goal card.
+    """
+
+    __slots__ = ("data", "zobrist")
+
+    def __init__(self, data: Optional[bytes] = None) -> None:
+        if data is None:
+            self.data = bytearray(BOARD_SIZE)
+            self.data[FIELD_OFFSET:HEIGHT_OFFSET] = bytes([EMPTY]) * (
+                HEIGHT_OFFSET - FIELD_OFFSET
+            )
+            self.data[BUNKER_OFFSET:FLOWER_OFFSET] = bytes([EMPTY]) * 6
+        else:
+            assert len(data) == BOARD_SIZE
+            self.data = bytearray(data)
+        self.zobrist = zobrist_hash(self.data)
+
+    def _set(self, offset: int, value: int) -> None:
+        """Write a byte, updating the hash"""
+        data = self.data
+        self.zobrist ^= ZOBRIST[offset << 8 | data[offset]]
+        self.zobrist ^= ZOBRIST[offset << 8 | value]
+        data[offset] = value
+
+    @staticmethod
+    def from_board(board: Board) -> "CompactBoard":
+        """Convert board to compact board"""
+        result = CompactBoard()
+        data = result.data
+        for column, stack in enumerate(board.field):
+            assert len(stack) <= Board.MAX_ROW_SIZE
+            offset = FIELD_OFFSET + column * Board.MAX_ROW_SIZE
+            data[offset : offset + len(stack)] = bytes(
+                card.identifier() for card in stack
+            )
+            data[HEIGHT_OFFSET + column] = len(stack)
+        for slot, bunker_card in enumerate(board.bunker):
+            if bunker_card is None:
+                data[BUNKER_OFFSET + slot] = EMPTY
+            elif isinstance(bunker_card, tuple):
+                data[BUNKER_OFFSET + slot] = BLOCKED | bunker_card[0].identifier()
+            else:
+                data[BUNKER_OFFSET + slot] = bunker_card.identifier()
+        for slot, goal_card in enumerate(board.goal):
+            data[GOAL_OFFSET + slot] = (
+                EMPTY if goal_card is None else goal_card.identifier()
+            )
+        data[FLOWER_OFFSET] = int(board.flower_gone)
+        result.zobrist = zobrist_hash(data)
+        return result
+
+    def to_board(self) -> Board:
+        """Convert compact board to board"""
+        result = Board()
+        result.field = [
+            [CARDS[card_id] for card_id in self.column(column)]
+            for column in range(Board.MAX_COLUMN_SIZE)
+        ]
+        result.bunker = [self.bunker_card(slot) for slot in range(3)]
+        result.goal = [self.goal_card(slot) for slot in range(3)]
+        result.flower_gone = self.flower_gone
+        return result
+
+    def snapshot(self) -> bytes:
+        """Returns an immutable copy of the board state"""
+        return bytes(self.data)
+
+    def restore(self, snapshot: bytes) -> None:
+        """Reset the board to a previous snapshot"""
+        self.data[:] = snapshot
+        self.zobrist = zobrist_hash(self.data)
+
+    def copy(self) -> "CompactBoard":
+        """Returns an independent copy of the board"""
+        result = CompactBoard.__new__(CompactBoard)
+        result.data = bytearray(self.data)
+        result.zobrist = self.zobrist
+        return result
+
+    @property
+    def state_identifier(self) -> bytes:
+        """Returns a unique identifier to represent the board state"""
+        return bytes(self.data)
+
+    @property
+    def flower_gone(self) -> bool:
+        """Returns true if the flower card was removed"""
+        return bool(self.data[FLOWER_OFFSET])
+
+    @flower_gone.setter
+    def flower_gone(self, value: bool) -> None:
+        self._set(FLOWER_OFFSET, int(value))
+
+    def height(self, column: int) -> int:
+        """Returns the number of cards in the column"""
+        return self.data[HEIGHT_OFFSET + column]
+
+    def card(self, column: int, row: int) -> int:
+        """Returns card identifier at the given field position"""
+        return self.data[FIELD_OFFSET + column * Board.MAX_ROW_SIZE + row]
+
+    def top(self, column: int) -> int:
+        """Returns card identifier on top of the column, EMPTY if column is empty"""
+        height = self.data[HEIGHT_OFFSET + column]
+        if height == 0:
+            return EMPTY
+        return self.data[FIELD_OFFSET + column * Board.MAX_ROW_SIZE + height - 1]
+
+    def column(self, column: int) -> bytes:
+        """Returns card identifiers of the column"""
+        offset = FIELD_OFFSET + column * Board.MAX_ROW_SIZE
+        return bytes(self.data[offset : offset + self.data[HEIGHT_OFFSET + column]])
+
+    def push(self, column: int, card_id: int) -> None:
+        """Put card on top of column"""
+        height = self.data[HEIGHT_OFFSET + column]
+        assert height < Board.MAX_ROW_SIZE
+        self._set(FIELD_OFFSET + column * Board.MAX_ROW_SIZE + height, card_id)
+        self._set(HEIGHT_OFFSET + column, height + 1)
+
+    def pop(self, column: int) -> int:
+        """Remove card from top of column and return it"""
+        height = self.data[HEIGHT_OFFSET + column] - 1
+        assert height >= 0
+        self._set(HEIGHT_OFFSET + column, height)
+        position = FIELD_OFFSET + column * Board.MAX_ROW_SIZE + height
+        card_id = self.data[position]
+        self._set(position, EMPTY)
+        return card_id
+
+    def move_stack(self, source: int, row: int, destination: int) -> None:
+        """Move cards starting at `row` from source column on top of destination column"""
+        data = self.data
+        source_height = data[HEIGHT_OFFSET + source]
+        destination_height = data[HEIGHT_OFFSET + destination]
+        count = source_height - row
+        assert count > 0
+        assert destination_height + count <= Board.MAX_ROW_SIZE
+        source_offset = FIELD_OFFSET + source * Board.MAX_ROW_SIZE + row
+        destination_offset = (
+            FIELD_OFFSET + destination * Board.MAX_ROW_SIZE + destination_height
+        )
+        for index in range(count):
+            self._set(destination_offset + index, data[source_offset + index])
+            self._set(source_offset + index, EMPTY)
+        self._set(HEIGHT_OFFSET + source, row)
+        self._set(HEIGHT_OFFSET + destination, destination_height + count)
+
+    def bunker(self, slot: int) -> int:
+        """Returns raw bunker slot value"""
+        return self.data[BUNKER_OFFSET + slot]
+
+    def set_bunker(self, slot: int, value: int) -> None:
+        """Set raw bunker slot value"""
+        self._set(BUNKER_OFFSET + slot, value)
+
+    def bunker_card(self, slot: int) -> Union[Tuple[SpecialCard, int], Optional[Card]]:
+        """Returns bunker slot in the format of `Board.bunker`"""
+        value = self.data[BUNKER_OFFSET + slot]
+        if value == EMPTY:
+            return None
+        if value & BLOCKED:
+            dragon = CARDS[value & ~BLOCKED]
+            assert isinstance(dragon, SpecialCard)
+            return (dragon, 0)
+        return CARDS[value]
+
+    def goal(self, slot: int) -> int:
+        """Returns raw goal slot value"""
+        return self.data[GOAL_OFFSET + slot]
+
+    def set_goal(self, slot: int, value: int) -> None:
+        """Set raw goal slot value"""
+        self._set(GOAL_OFFSET + slot, value)
+
+    def goal_card(self, slot: int) -> Optional[NumberCard]:
+        """Returns goal slot in the format of `Board.goal`"""
+        value = self.data[GOAL_OFFSET + slot]
+        if value == EMPTY:
+            return None
+        card = CARDS[value]
+        assert isinstance(card, NumberCard)
+        return card
+
+    def getGoal(self, suit: int) -> int:
+        """Returns the highest number in the goal for the given suit value"""
+        for slot in range(GOAL_OFFSET, GOAL_OFFSET + 3):
+            value = self.data[slot]
+            if value != EMPTY and SUIT[value] == suit:
+                return NUMBER[value]
+        return 0
+
+    def getGoalId(self, suit: int) -> int:
+        """Returns the goal slot the given suit value goes to"""
+        for slot in range(3):
+            value = self.data[GOAL_OFFSET + slot]
+            if value != EMPTY and SUIT[value] == suit:
+                return slot
+        return self.data.index(EMPTY, GOAL_OFFSET, FLOWER_OFFSET) - GOAL_OFFSET
+
+    def solved(self) -> bool:
+        """Returns true if the board is solved"""
+        if not self.data[FLOWER_OFFSET]:
+            return False
+        for slot in range(3):
+            if not self.data[BUNKER_OFFSET + slot] & BLOCKED:
+                return False
+            goal = self.data[GOAL_OFFSET + slot]
+            if goal == EMPTY or NUMBER[goal] != 9:
+                return False
+        return True
+
+    def _column_data(self, column: int) -> bytes:
+        offset = FIELD_OFFSET + column * Board.MAX_ROW_SIZE
+        return bytes(self.data[offset : offset + Board.MAX_ROW_SIZE])
+
+    def canonical_key(self) -> bytes:
+        """Returns an identifier that is equal for boards which only differ in
+        the order of field columns, bunker slots or goal slots"""
+        data = self.data
+        return b"".join(
+            [
+                *sorted(
+                    data[offset : offset + Board.MAX_ROW_SIZE]
+                    for offset in range(FIELD_OFFSET, HEIGHT_OFFSET, Board.MAX_ROW_SIZE)
+                ),
+                bytes(sorted(data[BUNKER_OFFSET:GOAL_OFFSET])),
+                bytes(sorted(data[GOAL_OFFSET:FLOWER_OFFSET])),
+                data[FLOWER_OFFSET:BOARD_SIZE],
+            ]
+        )
+
+    def canonical_order(self) -> Tuple[List[int], List[int], List[int]]:
+        """Returns the real column, bunker slot and goal slot for every canonical index
+
+        Columns are sorted by content, bunker slots by value and goal slots by suit.
+        """
+        columns = sorted(range(Board.MAX_COLUMN_SIZE), key=self._column_data)
+        bunker = sorted(range(3), key=self.bunker)
+        goal = sorted(range(3), key=self.goal)
+        return (columns, bunker, goal)
+
+    def canonical(self) -> "CompactBoard":
+        """Returns the board with columns and slots in canonical order"""
+        columns, bunker, goal = self.canonical_order()
+        result = CompactBoard()
+        data = result.data
+        for index, column in enumerate(columns):
+            offset = FIELD_OFFSET + index * Board.MAX_ROW_SIZE
+            data[offset : offset + Board.MAX_ROW_SIZE] = self._column_data(column)
+            data[HEIGHT_OFFSET + index] = self.height(column)
+        for index, slot in enumerate(bunker):
+            data[BUNKER_OFFSET + index] = self.bunker(slot)
+        for index, slot in enumerate(goal):
+            data[GOAL_OFFSET + index] = self.goal(slot)
+        data[FLOWER_OFFSET] = self.data[FLOWER_OFFSET]
+        result.zobrist = zobrist_hash(data)
+        return result
@@ -0,0 +1,149 @@
+"""Contains an asyncio pipeline of stages connected by queues"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+class LatencyStats:
+    """Durations of the runs of every stage, in seconds"""
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, duration: float) -> None:
+        """Add the duration of one run of stage"""
+        self.durations.setdefault(stage, []).append(duration)
+
+    def percentile(self, stage: str, percent: float) -> float:
+        """Returns the given percentile of the durations of stage"""
+        return float(np.percentile(self.durations[stage], percent))
+
+    def summary(self) -> str:
+        """Returns the p50 and p95 latency of every stage, one line per stage"""
+        return "\n".join(
+            f"{stage:<12}{len(durations):>6} runs  "
+            f"p50 {self.percentile(stage, 50):>7.3f}s  "
+            f"p95 {self.percentile(stage, 95):>7.3f}s"
+            for stage, durations in self.durations.items()
+        )
+
+
+@dataclass
+class Stage:
+    """A step of a pipeline
+
+    `function` is called with every item of the previous stage,
+    its result is passed to the next stage.
+    `warm` is called once when the pipeline starts, before the first item,
+    e.g. to start a solver process while the first board is captured.
+    Both are called in a thread of the stage, so they may block.
+    """
+
+    name: str
+    function: Callable[[Any], Any]
+    warm: Optional[Callable[[], None]] = None
+
+
+class Pipeline:
+    """Runs items through stages, every stage works in its own thread
+
+    Stages are connected by queues, so a stage can work on the next item
+    while later stages work on earlier items, e.g. the parser can parse
+    the next board while the clicker plays the previous one.
+    The time every stage spends on an item is recorded in `stats`.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        *,
+        stats: Optional[LatencyStats] = None,
+        queue_size: int = 1,
+    ) -> None:
+        assert stages
+        self.stages = list(stages)
+        self.stats = stats if stats is not None else LatencyStats()
+        self.queue_size = queue_size
+
+    async def _work(
+        self,
+        stage: Stage,
+        executor: ThreadPoolExecutor,
+        inbox: "asyncio.Queue[Any]",
+        outbox: "asyncio.Queue[Any]",
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        if stage.warm is not None:
+            start_time = time.monotonic()
+            await loop.run_in_executor(executor, stage.warm)
+            self.stats.record(f"{stage.name} warm", time.monotonic() - start_time)
+        while True:
+            item = await inbox.get()
+            start_time = time.monotonic()
+            result = await loop.run_in_executor(executor, stage.function, item)
+            self.stats.record(stage.name, time.monotonic() - start_time)
+            await outbox.put(result)
+
+    async def run(
+        self,
+        items: Iterable[Any],
+        *,
+        feedback: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Any]:
+        """Pass items through all stages, returns the results of the last stage
+
+        With `feedback`, every result of the last stage is passed to the
+        first stage again, like a game which is played over and over.
+        The pipeline stops after `limit` results, without a limit once
+        all items passed, or never with `feedback`.
+        An exception in a stage stops the pipeline and is raised.
+        """
+        items = list(items)
+        if limit is None and not feedback:
+            limit = len(items)
+        # The first queue also takes the results fed back, it must never block
+        queues: List["asyncio.Queue[Any]"] = [asyncio.Queue()] + [
+            asyncio.Queue(maxsize=self.queue_size) for _ in self.stages[1:]
+        ]
+        output: "asyncio.Queue[Any]" = asyncio.Queue()
+        for item in items:
+            queues[0].put_nowait(item)
+        results: List[Any] = []
+
+        async def _collect() -> None:
+            while limit is None or len(results) < limit:
+                result = await output.get()
+                results.append(result)
+                if feedback:
+                    queues[0].put_nowait(result)
+
+        executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=stage.name)
+            for stage in self.stages
+        ]
+        tasks = [
+            asyncio.ensure_future(self._work(stage, executor, inbox, outbox))
+            for stage, executor, inbox, outbox in zip(
+                self.stages, executors, queues, queues[1:] + [output]
+            )
+        ]
+        collector = asyncio.ensure_future(_collect())
+        try:
+            done, _ = await asyncio.wait(
+                tasks + [collector], return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                # Only raises for a failed stage, workers never return
+                task.result()
+        finally:
+            for task in tasks + [collector]:
+                task.cancel()
+            await asyncio.gather(*tasks, collector, return_exceptions=True)
+            for executor in executors:
+                executor.shutdown(wait=True)
+        return results
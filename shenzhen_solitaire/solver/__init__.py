@@ -0,0 +1 @@
+"""Contains the in-process solver for solitaire boards"""
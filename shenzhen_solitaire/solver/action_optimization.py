@@ -0,0 +1,286 @@
+"""Contains functions to shorten solutions by removing unnecessary actions"""
+import dataclasses
+from typing import Iterator, List, Optional, Tuple, Union
+
+from .. import board
+from ..board import Board
+from ..compact_board import CARDS, EMPTY, FITS, NUMBER, SUIT, CompactBoard
+from . import board_possibilities
+from .board_actions import (
+    Action,
+    BunkerizeAction,
+    DragonKillAction,
+    GoalAction,
+    HuaKillAction,
+    MoveAction,
+)
+
+# Where a stack of cards is, a field column or a bunker slot
+Location = Tuple[board.Position, int]
+
+
+def _stack_fits(cards: List[int]) -> bool:
+    return all(
+        FITS[card * len(CARDS) + below] == 1 for below, card in zip(cards, cards[1:])
+    )
+
+
+def _fits_on(search_board: CompactBoard, card: int, column: int) -> bool:
+    top = search_board.top(column)
+    return top == EMPTY or FITS[card * len(CARDS) + top] == 1
+
+
+def _automatic_action(search_board: CompactBoard) -> Optional[Action]:
+    """Returns the action the game does by itself on the board, if there is one"""
+    for hua_action in board_possibilities.huakill_actions(search_board):
+        return hua_action
+    for goal_action in board_possibilities.goal_actions(search_board):
+        if goal_action.obvious:
+            return goal_action
+    return None
+
+
+def _cards(action: Action) -> List[int]:
+    """Returns the identifiers of the cards moved by the action"""
+    if isinstance(action, MoveAction):
+        return [card.identifier() for card in action.cards]
+    if isinstance(action, (BunkerizeAction, GoalAction)):
+        return [action.card.identifier()]
+    return []
+
+
+def _locations(action: Action) -> Tuple[Location, Optional[Location]]:
+    """Returns source and destination of a move, bunkerize or goal action,
+    the destination of a goal action is None"""
+    field = board.Position.Field
+    if isinstance(action, MoveAction):
+        return ((field, action.source_id), (field, action.destination_id))
+    if isinstance(action, BunkerizeAction):
+        bunker_location = (board.Position.Bunker, action.bunker_id)
+        field_location = (field, action.field_id)
+        if action.to_bunker:
+            return (field_location, bunker_location)
+        return (bunker_location, field_location)
+    assert isinstance(action, GoalAction)
+    return ((action.source_position, action.source_id), None)
+
+
+def _materialize(search_board: CompactBoard, action: Action) -> Optional[Action]:
+    """Returns the action with rows, goal slot and dragon sources taken from the board,
+    None if the action is not possible on the board"""
+    if isinstance(action, MoveAction):
+        cards = _cards(action)
+        height = search_board.height(action.source_id)
+        row = height - len(cards)
+        destination_height = search_board.height(action.destination_id)
+        if (
+            action.source_id == action.destination_id
+            or row < 0
+            or bytes(cards) != search_board.column(action.source_id)[row:]
+            or not _stack_fits(cards)
+            or not _fits_on(search_board, cards[0], action.destination_id)
+            or destination_height + len(cards) > Board.MAX_ROW_SIZE
+        ):
+            return None
+        return dataclasses.replace(
+            action, source_row_index=row, destination_row_index=destination_height
+        )
+    if isinstance(action, BunkerizeAction):
+        card = action.card.identifier()
+        if action.to_bunker:
+            if (
+                search_board.bunker(action.bunker_id) != EMPTY
+                or search_board.top(action.field_id) != card
+            ):
+                return None
+            row = search_board.height(action.field_id) - 1
+        else:
+            if search_board.bunker(action.bunker_id) != card or not _fits_on(
+                search_board, card, action.field_id
+            ):
+                return None
+            row = search_board.height(action.field_id)
+        return dataclasses.replace(action, field_row_index=row)
+    if isinstance(action, GoalAction):
+        card = action.card.identifier()
+        if search_board.getGoal(SUIT[card]) + 1 != NUMBER[card]:
+            return None
+        if action.source_position == board.Position.Field:
+            if search_board.top(action.source_id) != card:
+                return None
+            row = search_board.height(action.source_id) - 1
+        else:
+            if search_board.bunker(action.source_id) != card:
+                return None
+            row = 0
+        return dataclasses.replace(
+            action,
+            source_row_index=row,
+            goal_id=search_board.getGoalId(SUIT[card]),
+            obvious=False,
+        )
+    if isinstance(action, DragonKillAction):
+        for dragon_action in board_possibilities.dragonkill_actions(search_board):
+            if dragon_action.dragon == action.dragon:
+                return dragon_action
+        return None
+    return None
+
+
+def _replay(
+    search_board: CompactBoard, manual_actions: List[Action], result: List[Action]
+) -> bool:
+    """Apply the actions and the actions the game does by itself to the board,
+    appending them to `result`, returns false if an action is not possible"""
+
+    def _automatic() -> None:
+        action = _automatic_action(search_board)
+        while action is not None:
+            action.apply_compact(search_board)
+            result.append(action)
+            action = _automatic_action(search_board)
+
+    _automatic()
+    for action in manual_actions:
+        if isinstance(action, GoalAction):
+            card = action.card.identifier()
+            if search_board.getGoal(SUIT[card]) >= NUMBER[card]:
+                continue
+        real_action = _materialize(search_board, action)
+        if real_action is None:
+            return False
+        real_action.apply_compact(search_board)
+        result.append(real_action)
+        _automatic()
+    return True
+
+
+def replay(start_board: Board, manual_actions: List[Action]) -> Optional[List[Action]]:
+    """Replay the actions done by the player on the board
+
+    The actions the game does by itself are inserted where the game does them,
+    manual goal actions the game already did are dropped.
+    Returns the complete solution, or None if an action is not possible
+    or the board is not solved afterwards.
+    """
+    search_board = CompactBoard.from_board(start_board)
+    result: List[Action] = []
+    if not _replay(search_board, manual_actions, result) or not search_board.solved():
+        return None
+    return result
+
+
+def _is_manual(action: Action) -> bool:
+    if isinstance(action, HuaKillAction):
+        return False
+    return not (isinstance(action, GoalAction) and action.obvious)
+
+
+def _action_between(
+    cards: List[int], source: Location, destination: Optional[Location]
+) -> Union[Action, bool]:
+    """Returns an action moving the cards from source to destination,
+    True if nothing needs to be done and False if there is no such action"""
+    field = board.Position.Field
+    if source == destination:
+        return True
+    card = CARDS[cards[0]]
+    if destination is None:
+        if len(cards) != 1 or not isinstance(card, board.NumberCard):
+            return False
+        return GoalAction(
+            card=card,
+            source_id=source[1],
+            source_row_index=0,
+            source_position=source[0],
+            goal_id=0,
+            obvious=False,
+        )
+    if source[0] == field and destination[0] == field:
+        return MoveAction(
+            cards=[CARDS[card_id] for card_id in cards],
+            source_id=source[1],
+            source_row_index=0,
+            destination_id=destination[1],
+            destination_row_index=0,
+        )
+    if len(cards) != 1 or (source[0] != field and destination[0] != field):
+        return False
+    to_bunker = destination[0] != field
+    return BunkerizeAction(
+        card=card,
+        bunker_id=destination[1] if to_bunker else source[1],
+        field_id=source[1] if to_bunker else destination[1],
+        field_row_index=0,
+        to_bunker=to_bunker,
+    )
+
+
+def _candidates(actions: List[Action], index: int) -> Iterator[List[Action]]:
+    """Returns shorter versions of the actions, which differ from `index` on"""
+    action = actions[index]
+    cards = _cards(action)
+    if cards and not isinstance(action, GoalAction):
+        # Find the next action moving the same cards, and move them there at once
+        for later_index in range(index + 1, len(actions)):
+            later_cards = _cards(actions[later_index])
+            if not set(cards) & set(later_cards):
+                continue
+            if later_cards != cards:
+                break
+            merged = _action_between(
+                cards, _locations(action)[0], _locations(actions[later_index])[1]
+            )
+            if merged is False:
+                break
+            between = actions[index + 1 : later_index]
+            rest = actions[later_index + 1 :]
+            if merged is True:
+                yield actions[:index] + between + rest
+            else:
+                assert isinstance(merged, Action)
+                yield actions[:index] + [merged] + between + rest
+                yield actions[:index] + between + [merged] + rest
+            break
+    yield actions[:index] + actions[index + 1 :]
+
+
+def optimize(start_board: Board, solution: List[Action]) -> List[Action]:
+    """Shorten a solution of the board
+
+    Pairs of actions moving a stack away and back are dropped,
+    consecutive moves of the same stack are merged into one
+    and bunker round trips are removed.
+    Actions the game does by itself are placed where the game does them.
+    The result contains at most as many manual actions as the solution.
+    """
+    actions = [action for action in solution if _is_manual(action)]
+    best = replay(start_board, actions)
+    if best is None:
+        return solution
+    improved = True
+    while improved:
+        improved = False
+        search_board = CompactBoard.from_board(start_board)
+        prefix: List[Action] = []
+        _replay(search_board, [], prefix)
+        index = 0
+        while index < len(actions):
+            # Board and solution before actions[index], shared by all candidates
+            snapshot = search_board.snapshot()
+            for candidate in _candidates(actions, index):
+                result = list(prefix)
+                if (
+                    _replay(search_board, candidate[index:], result)
+                    and search_board.solved()
+                ):
+                    actions = candidate
+                    best = result
+                    improved = True
+                    search_board.restore(snapshot)
+                    break
+                search_board.restore(snapshot)
+            else:
+                _replay(search_board, actions[index : index + 1], prefix)
+                index += 1
+    return best
@@ -0,0 +1,82 @@
+"""Contains functions to solve many boards in parallel"""
+import multiprocessing
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..board import Board
+from ..compact_board import CompactBoard
+from . import solver
+from .board_actions import Action
+from .solution_cache import SolutionCache
+
+SolveResult = Tuple[int, Optional[List[Action]], solver.SolverStats]
+
+# Solver options of the current worker process, set once by the pool initializer
+_WORKER_OPTIONS: Dict[str, Any] = {}
+
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    _WORKER_OPTIONS.clear()
+    _WORKER_OPTIONS.update(options)
+
+
+def _solve_task(task: Tuple[int, bytes]) -> SolveResult:
+    index, board_data = task
+    stats = solver.SolverStats()
+    options = dict(_WORKER_OPTIONS)
+    solve = solver.best_first_solve if options.pop("best_first") else solver.solve
+    solution = next(solve(CompactBoard(board_data), stats=stats, **options), None)
+    return (index, solution, stats)
+
+
+def solve_many(
+    boards: Iterable[Board],
+    *,
+    workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    canonical: bool = False,
+    best_first: bool = False,
+    node_budget: Optional[int] = None,
+    cache: Optional[SolutionCache] = None,
+) -> Iterator[SolveResult]:
+    """Solve boards in a process pool
+
+    Yields `(index, solution, stats)` as soon as a board is finished,
+    `solution` is None if the board was not solved within `timeout` seconds.
+    An exception in a worker is raised here and ends the batch.
+    With `best_first`, boards are solved by `solver.best_first_solve`
+    with the given `node_budget`.
+    Boards are sent to the workers as `CompactBoard` snapshots.
+    If a `cache` is given, cached solutions are yielded first without searching,
+    new solutions are added to it.
+    """
+    options: Dict[str, Any] = {
+        "timeout": timeout,
+        "canonical": canonical,
+        "best_first": best_first,
+    }
+    if best_first:
+        options["node_budget"] = node_budget
+    board_list = list(boards)
+    tasks: List[Tuple[int, bytes]] = []
+    for index, board in enumerate(board_list):
+        cached = cache.get(board) if cache is not None else None
+        if cached is not None:
+            cached_solution, duration = cached
+            yield (
+                index,
+                cached_solution,
+                solver.SolverStats(duration=duration, cached=True),
+            )
+        else:
+            tasks.append((index, CompactBoard.from_board(board).snapshot()))
+    if not tasks:
+        return
+    with multiprocessing.Pool(
+        workers,
+        initializer=_init_worker,
+        initargs=(options,),
+    ) as pool:
+        for index, solution, stats in pool.imap_unordered(_solve_task, tasks):
+            if cache is not None and solution is not None:
+                cache.put(board_list[index], solution, stats.duration)
+            yield (index, solution, stats)
@@ -0,0 +1,311 @@
+"""Contains actions that can be applied to the board"""
+import abc
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from .. import board
+from ..board import _field_card_to_str
+from ..compact_board import BLOCKED, EMPTY, HUA, CompactBoard
+
+
+def _field_position(column: int, row: int) -> Dict[str, int]:
+    return {"column": column, "row": row}
+
+
+def _source_position(position: board.Position, index: int, row: int) -> Dict[str, Any]:
+    if position == board.Position.Field:
+        return {"Field": _field_position(index, row)}
+    assert position == board.Position.Bunker
+    return {"Bunker": {"slot_index": index}}
+
+
+class Action(abc.ABC):
+    """Base class for a card move action on a solitaire board"""
+
+    @abc.abstractmethod
+    def apply(self, action_board: board.Board) -> None:
+        """Apply action to board"""
+
+    @abc.abstractmethod
+    def undo(self, action_board: board.Board) -> None:
+        """Undo action on board"""
+
+    @abc.abstractmethod
+    def apply_compact(self, action_board: CompactBoard) -> None:
+        """Apply action to compact board"""
+
+    @abc.abstractmethod
+    def undo_compact(self, action_board: CompactBoard) -> None:
+        """Undo action on compact board"""
+
+    @abc.abstractmethod
+    def to_json_struct(self) -> Dict[str, Any]:
+        """Returns the action in the format of the rust solver"""
+
+
+@dataclass
+class GoalAction(Action):
+    """Move card from field or bunker to goal"""
+
+    card: board.NumberCard
+    source_id: int
+    source_row_index: int
+    source_position: board.Position
+    goal_id: int
+    obvious: bool
+
+    def apply(self, action_board: board.Board) -> None:
+        if self.source_position == board.Position.Field:
+            assert action_board.field[self.source_id][-1] == self.card
+            action_board.field[self.source_id].pop()
+        else:
+            assert action_board.bunker[self.source_id] == self.card
+            action_board.bunker[self.source_id] = None
+        action_board.goal[self.goal_id] = self.card
+
+    def undo(self, action_board: board.Board) -> None:
+        if self.card.number == 1:
+            action_board.goal[self.goal_id] = None
+        else:
+            action_board.goal[self.goal_id] = board.NumberCard(
+                self.card.suit, self.card.number - 1
+            )
+        if self.source_position == board.Position.Field:
+            action_board.field[self.source_id].append(self.card)
+        else:
+            action_board.bunker[self.source_id] = self.card
+
+    def apply_compact(self, action_board: CompactBoard) -> None:
+        if self.source_position == board.Position.Field:
+            action_board.pop(self.source_id)
+        else:
+            action_board.set_bunker(self.source_id, EMPTY)
+        action_board.set_goal(self.goal_id, self.card.identifier())
+
+    def undo_compact(self, action_board: CompactBoard) -> None:
+        card_id = self.card.identifier()
+        action_board.set_goal(
+            self.goal_id, EMPTY if self.card.number == 1 else card_id - 1
+        )
+        if self.source_position == board.Position.Field:
+            action_board.push(self.source_id, card_id)
+        else:
+            action_board.set_bunker(self.source_id, card_id)
+
+    def to_json_struct(self) -> Dict[str, Any]:
+        return {
+            "Goal": {
+                "card": {"value": self.card.number, "suit": self.card.suit.name},
+                "source": _source_position(
+                    self.source_position, self.source_id, self.source_row_index
+                ),
+                "goal_slot_index": self.goal_id,
+            }
+        }
+
+
+@dataclass
+class BunkerizeAction(Action):
+    """Move card from field to bunker or the other way around"""
+
+    card: board.Card
+    bunker_id: int
+    field_id: int
+    field_row_index: int
+    to_bunker: bool
+
+    def apply(self, action_board: board.Board) -> None:
+        if self.to_bunker:
+            assert action_board.bunker[self.bunker_id] is None
+            assert action_board.field[self.field_id][-1] == self.card
+            action_board.field[self.field_id].pop()
+            action_board.bunker[self.bunker_id] = self.card
+        else:
+            assert action_board.bunker[self.bunker_id] == self.card
+            action_board.bunker[self.bunker_id] = None
+            action_board.field[self.field_id].append(self.card)
+
+    def undo(self, action_board: board.Board) -> None:
+        if self.to_bunker:
+            action_board.bunker[self.bunker_id] = None
+            action_board.field[self.field_id].append(self.card)
+        else:
+            action_board.field[self.field_id].pop()
+            action_board.bunker[self.bunker_id] = self.card
+
+    def apply_compact(self, action_board: CompactBoard) -> None:
+        if self.to_bunker:
+            action_board.set_bunker(self.bunker_id, action_board.pop(self.field_id))
+        else:
+            action_board.push(self.field_id, action_board.bunker(self.bunker_id))
+            action_board.set_bunker(self.bunker_id, EMPTY)
+
+    def undo_compact(self, action_board: CompactBoard) -> None:
+        if self.to_bunker:
+            action_board.push(self.field_id, action_board.bunker(self.bunker_id))
+            action_board.set_bunker(self.bunker_id, EMPTY)
+        else:
+            action_board.set_bunker(self.bunker_id, action_board.pop(self.field_id))
+
+    def to_json_struct(self) -> Dict[str, Any]:
+        return {
+            "Bunkerize": {
+                "card": _field_card_to_str(self.card),
+                "bunker_slot_index": self.bunker_id,
+                "field_position": _field_position(self.field_id, self.field_row_index),
+                "to_bunker": self.to_bunker,
+            }
+        }
+
+
+@dataclass
+class DragonKillAction(Action):
+    """Move four dragons to the bunker"""
+
+    dragon: board.SpecialCard
+    source_stacks: List[Tuple[board.Position, int]]
+    destination_bunker_id: int
+
+    def apply(self, action_board: board.Board) -> None:
+        assert (
+            action_board.bunker[self.destination_bunker_id] is None
+            or action_board.bunker[self.destination_bunker_id] == self.dragon
+        )
+        for position, index in self.source_stacks:
+            if position == board.Position.Field:
+                assert action_board.field[index][-1] == self.dragon
+                action_board.field[index].pop()
+            else:
+                assert action_board.bunker[index] == self.dragon
+                action_board.bunker[index] = None
+        action_board.bunker[self.destination_bunker_id] = (self.dragon, 0)
+
+    def undo(self, action_board: board.Board) -> None:
+        action_board.bunker[self.destination_bunker_id] = None
+        for position, index in reversed(self.source_stacks):
+            if position == board.Position.Field:
+                action_board.field[index].append(self.dragon)
+            else:
+                action_board.bunker[index] = self.dragon
+
+    def apply_compact(self, action_board: CompactBoard) -> None:
+        for position, index in self.source_stacks:
+            if position == board.Position.Field:
+                action_board.pop(index)
+            else:
+                action_board.set_bunker(index, EMPTY)
+        action_board.set_bunker(
+            self.destination_bunker_id, BLOCKED | self.dragon.identifier()
+        )
+
+    def undo_compact(self, action_board: CompactBoard) -> None:
+        dragon_id = self.dragon.identifier()
+        action_board.set_bunker(self.destination_bunker_id, EMPTY)
+        for position, index in reversed(self.source_stacks):
+            if position == board.Position.Field:
+                action_board.push(index, dragon_id)
+            else:
+                action_board.set_bunker(index, dragon_id)
+
+    def to_json_struct(self) -> Dict[str, Any]:
+        return {
+            "DragonKill": {
+                "card": self.dragon.name,
+                "source": [
+                    _source_position(position, index, 0)
+                    for position, index in self.source_stacks
+                ],
+                "destination_slot_index": self.destination_bunker_id,
+            }
+        }
+
+
+@dataclass
+class HuaKillAction(Action):
+    """Remove the flower card"""
+
+    source_field_id: int
+    source_field_row_index: int
+
+    def apply(self, action_board: board.Board) -> None:
+        assert not action_board.flower_gone
+        assert action_board.field[self.source_field_id][-1] == board.SpecialCard.Hua
+        action_board.field[self.source_field_id].pop()
+        action_board.flower_gone = True
+
+    def undo(self, action_board: board.Board) -> None:
+        action_board.field[self.source_field_id].append(board.SpecialCard.Hua)
+        action_board.flower_gone = False
+
+    def apply_compact(self, action_board: CompactBoard) -> None:
+        action_board.pop(self.source_field_id)
+        action_board.flower_gone = True
+
+    def undo_compact(self, action_board: CompactBoard) -> None:
+        action_board.push(self.source_field_id, HUA)
+        action_board.flower_gone = False
+
+    def to_json_struct(self) -> Dict[str, Any]:
+        return {
+            "HuaKill": {
+                "field_position": _field_position(
+                    self.source_field_id, self.source_field_row_index
+                )
+            }
+        }
+
+
+@dataclass
+class MoveAction(Action):
+    """Moving a card from one field stack to another"""
+
+    cards: List[board.Card]
+    source_id: int
+    source_row_index: int
+    destination_id: int
+    destination_row_index: int
+
+    def apply(self, action_board: board.Board) -> None:
+        assert action_board.field[self.source_id][self.source_row_index :] == self.cards
+        assert len(action_board.field[self.destination_id]) == (
+            self.destination_row_index
+        )
+        del action_board.field[self.source_id][self.source_row_index :]
+        action_board.field[self.destination_id].extend(self.cards)
+
+    def undo(self, action_board: board.Board) -> None:
+        del action_board.field[self.destination_id][self.destination_row_index :]
+        action_board.field[self.source_id].extend(self.cards)
+
+    def apply_compact(self, action_board: CompactBoard) -> None:
+        action_board.move_stack(
+            self.source_id, self.source_row_index, self.destination_id
+        )
+
+    def undo_compact(self, action_board: CompactBoard) -> None:
+        action_board.move_stack(
+            self.destination_id, self.destination_row_index, self.source_id
+        )
+
+    def to_json_struct(self) -> Dict[str, Any]:
+        suit_sequence = list(board.NumberCard.Suit)
+        pattern = 0
+        for index, (last_card, card) in enumerate(zip(self.cards, self.cards[1:])):
+            assert isinstance(last_card, board.NumberCard)
+            assert isinstance(card, board.NumberCard)
+            last_position = suit_sequence.index(last_card.suit)
+            if (last_position + 1) % len(suit_sequence) != suit_sequence.index(
+                card.suit
+            ):
+                pattern |= 1 << index
+        return {
+            "Move": {
+                "start_card": _field_card_to_str(self.cards[0]),
+                "stack_len": len(self.cards),
+                "pattern": pattern,
+                "source": _field_position(self.source_id, self.source_row_index),
+                "destination": _field_position(
+                    self.destination_id, self.destination_row_index
+                ),
+            }
+        }
@@ -0,0 +1,223 @@
+"""Contains functions to enumerate the actions possible on a board"""
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .. import board
+from ..board import Board, NumberCard, SpecialCard
+from ..compact_board import BLOCKED, CARDS, EMPTY, FITS, HUA, NUMBER, SUIT, CompactBoard
+from . import board_actions
+
+_DRAGONS = [
+    dragon.identifier() for dragon in SpecialCard if dragon != SpecialCard.Hua
+]
+
+
+def _card_fits(card: int, destination: int) -> bool:
+    """Returns true if `card` can be put on top of `destination`"""
+    if destination == EMPTY:
+        return False
+    return FITS[card * len(CARDS) + destination] == 1
+
+
+def _first_empty_column(search_board: CompactBoard) -> Optional[int]:
+    for index in range(Board.MAX_COLUMN_SIZE):
+        if search_board.height(index) == 0:
+            return index
+    return None
+
+
+def _first_empty_bunker(search_board: CompactBoard) -> Optional[int]:
+    for index in range(3):
+        if search_board.bunker(index) == EMPTY:
+            return index
+    return None
+
+
+def _destinations(
+    search_board: CompactBoard, card: int, source_id: int
+) -> Iterator[int]:
+    """Returns all columns `card` could be put on top of"""
+    for index in range(Board.MAX_COLUMN_SIZE):
+        if index != source_id and _card_fits(card, search_board.top(index)):
+            yield index
+    empty_column = _first_empty_column(search_board)
+    if empty_column is not None:
+        yield empty_column
+
+
+def _obvious_goal(search_board: CompactBoard, number: int) -> bool:
+    """Returns true if the game would put the card into the goal by itself"""
+    minimum_goal = min(search_board.getGoal(suit.value) for suit in NumberCard.Suit)
+    return number <= minimum_goal + 1 or number == 2
+
+
+def _movable_cards(
+    search_board: CompactBoard,
+) -> Iterator[Tuple[board.Position, int, int, int]]:
+    """Returns position, index, row index and card identifier of all top cards"""
+    for index in range(Board.MAX_COLUMN_SIZE):
+        height = search_board.height(index)
+        if height:
+            yield (board.Position.Field, index, height - 1, search_board.top(index))
+    for index in range(3):
+        card = search_board.bunker(index)
+        if card != EMPTY and not card & BLOCKED:
+            yield (board.Position.Bunker, index, 0, card)
+
+
+def huakill_actions(
+    search_board: CompactBoard,
+) -> Iterator[board_actions.HuaKillAction]:
+    """Returns the action to remove the flower, if it is free"""
+    for index in range(Board.MAX_COLUMN_SIZE):
+        if search_board.top(index) == HUA:
+            yield board_actions.HuaKillAction(
+                source_field_id=index,
+                source_field_row_index=search_board.height(index) - 1,
+            )
+
+
+def goal_actions(search_board: CompactBoard) -> Iterator[board_actions.GoalAction]:
+    """Returns all actions moving a card to the goal"""
+    for position, index, row_index, card in _movable_cards(search_board):
+        number = NUMBER[card]
+        if not number or search_board.getGoal(SUIT[card]) + 1 != number:
+            continue
+        number_card = CARDS[card]
+        assert isinstance(number_card, NumberCard)
+        yield board_actions.GoalAction(
+            card=number_card,
+            source_id=index,
+            source_row_index=row_index,
+            source_position=position,
+            goal_id=search_board.getGoalId(SUIT[card]),
+            obvious=_obvious_goal(search_board, number),
+        )
+
+
+def dragon_destination(search_board: CompactBoard, dragon: int) -> Optional[int]:
+    """Returns the bunker slot the game moves the given dragon to"""
+    for bunker_id in range(3):
+        if search_board.bunker(bunker_id) in (EMPTY, dragon):
+            return bunker_id
+    return None
+
+
+def dragonkill_actions(
+    search_board: CompactBoard,
+) -> Iterator[board_actions.DragonKillAction]:
+    """Returns all actions moving four free dragons to the bunker"""
+    dragon_positions: Dict[int, List[Tuple[board.Position, int]]] = {
+        dragon: [] for dragon in _DRAGONS
+    }
+    for position, index, _, card in _movable_cards(search_board):
+        if card in dragon_positions:
+            dragon_positions[card].append((position, index))
+
+    for dragon, positions in dragon_positions.items():
+        if len(positions) != 4:
+            continue
+        bunker_id = dragon_destination(search_board, dragon)
+        if bunker_id is None:
+            continue
+        dragon_card = CARDS[dragon]
+        assert isinstance(dragon_card, SpecialCard)
+        yield board_actions.DragonKillAction(
+            dragon=dragon_card,
+            source_stacks=positions,
+            destination_bunker_id=bunker_id,
+        )
+
+
+def debunkerize_actions(
+    search_board: CompactBoard,
+) -> Iterator[board_actions.BunkerizeAction]:
+    """Returns all actions moving a card from the bunker to the field"""
+    for bunker_id in range(3):
+        card = search_board.bunker(bunker_id)
+        if card == EMPTY or card & BLOCKED:
+            continue
+        for destination in _destinations(search_board, card, -1):
+            yield board_actions.BunkerizeAction(
+                card=CARDS[card],
+                bunker_id=bunker_id,
+                field_id=destination,
+                field_row_index=search_board.height(destination),
+                to_bunker=False,
+            )
+
+
+def field_move_actions(
+    search_board: CompactBoard,
+) -> Iterator[board_actions.MoveAction]:
+    """Returns all actions moving a stack of cards from one column to another"""
+    for source_id in range(Board.MAX_COLUMN_SIZE):
+        height = search_board.height(source_id)
+        if not height:
+            continue
+        row_index = height - 1
+        while row_index > 0 and _card_fits(
+            search_board.card(source_id, row_index),
+            search_board.card(source_id, row_index - 1),
+        ):
+            row_index -= 1
+        for source_row_index in range(row_index, height):
+            for destination in _destinations(
+                search_board, search_board.card(source_id, source_row_index), source_id
+            ):
+                destination_height = search_board.height(destination)
+                if not destination_height and source_row_index == 0:
+                    continue
+                yield board_actions.MoveAction(
+                    cards=[
+                        CARDS[search_board.card(source_id, row)]
+                        for row in range(source_row_index, height)
+                    ],
+                    source_id=source_id,
+                    source_row_index=source_row_index,
+                    destination_id=destination,
+                    destination_row_index=destination_height,
+                )
+
+
+def bunkerize_actions(
+    search_board: CompactBoard,
+) -> Iterator[board_actions.BunkerizeAction]:
+    """Returns all actions moving a card from the field to the bunker"""
+    bunker_id = _first_empty_bunker(search_board)
+    if bunker_id is None:
+        return
+    for field_id in range(Board.MAX_COLUMN_SIZE):
+        card = search_board.top(field_id)
+        if card in (EMPTY, HUA):
+            continue
+        yield board_actions.BunkerizeAction(
+            card=CARDS[card],
+            bunker_id=bunker_id,
+            field_id=field_id,
+            field_row_index=search_board.height(field_id) - 1,
+            to_bunker=True,
+        )
+
+
+def possible_actions(
+    search_board: Union[Board, CompactBoard]
+) -> Iterator[board_actions.Action]:
+    """Returns all actions possible on the given board
+
+    If the game would do a move automatically, only that move is returned
+    """
+    if isinstance(search_board, Board):
+        search_board = CompactBoard.from_board(search_board)
+    for hua_action in huakill_actions(search_board):
+        yield hua_action
+        return
+    goals = list(goal_actions(search_board))
+    for goal_action in goals:
+        if goal_action.obvious:
+            yield goal_action
+            return
+    yield from dragonkill_actions(search_board)
+    yield from goals
+    yield from debunkerize_actions(search_board)
+    yield from field_move_actions(search_board)
+    yield from bunkerize_actions(search_board)
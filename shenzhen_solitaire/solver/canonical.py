@@ -0,0 +1,97 @@
+"""Contains functions to translate between real and canonical boards"""
+import dataclasses
+from typing import List, Tuple
+
+from .. import board
+from ..board import Board
+from ..compact_board import CompactBoard
+from . import board_possibilities
+from .board_actions import (
+    Action,
+    BunkerizeAction,
+    DragonKillAction,
+    GoalAction,
+    HuaKillAction,
+    MoveAction,
+)
+
+
+def canonical_board(real_board: Board) -> Tuple[Board, List[int], List[int]]:
+    """Returns the canonical form of the board,
+    together with the real column and bunker slot of every canonical index"""
+    compact = CompactBoard.from_board(real_board)
+    columns, bunker, _ = compact.canonical_order()
+    return (compact.canonical().to_board(), columns, bunker)
+
+
+def remap_solution(
+    real_board: Board, solution: List[Action], columns: List[int], bunker: List[int]
+) -> List[Action]:
+    """Translate a solution of the canonical board to the real board
+
+    Goal slots and dragon destinations are chosen by the game,
+    so they are recomputed while replaying the solution on the real board.
+    """
+    search_board = CompactBoard.from_board(real_board)
+    bunker_map = list(bunker)
+    result: List[Action] = []
+    for action in solution:
+        real_action: Action
+        if isinstance(action, MoveAction):
+            real_action = dataclasses.replace(
+                action,
+                source_id=columns[action.source_id],
+                destination_id=columns[action.destination_id],
+            )
+        elif isinstance(action, BunkerizeAction):
+            real_action = dataclasses.replace(
+                action,
+                field_id=columns[action.field_id],
+                bunker_id=bunker_map[action.bunker_id],
+            )
+        elif isinstance(action, HuaKillAction):
+            real_action = dataclasses.replace(
+                action, source_field_id=columns[action.source_field_id]
+            )
+        elif isinstance(action, GoalAction):
+            real_action = dataclasses.replace(
+                action,
+                source_id=(
+                    columns[action.source_id]
+                    if action.source_position == board.Position.Field
+                    else bunker_map[action.source_id]
+                ),
+                goal_id=search_board.getGoalId(action.card.suit.value),
+            )
+        elif isinstance(action, DragonKillAction):
+            destination = board_possibilities.dragon_destination(
+                search_board, action.dragon.identifier()
+            )
+            assert destination is not None
+            real_action = dataclasses.replace(
+                action,
+                # Keep the field first order of board_possibilities
+                source_stacks=sorted(
+                    (
+                        (
+                            position,
+                            columns[index]
+                            if position == board.Position.Field
+                            else bunker_map[index],
+                        )
+                        for position, index in action.source_stacks
+                    ),
+                    key=lambda stack: (stack[0].value, stack[1]),
+                ),
+                destination_bunker_id=destination,
+            )
+            # The game might pick another slot than in the canonical solution,
+            # swap slots so the blocked slots correspond again
+            moved_slot = bunker_map.index(destination)
+            bunker_map[moved_slot] = bunker_map[action.destination_bunker_id]
+            bunker_map[action.destination_bunker_id] = destination
+        else:
+            raise AssertionError(f"Unknown action {action}")
+        real_action.apply_compact(search_board)
+        result.append(real_action)
+    return result
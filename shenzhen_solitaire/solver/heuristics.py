@@ -0,0 +1,67 @@
+"""Contains heuristics estimating how far a board is from being solved"""
+from typing import Callable, Dict
+
+from ..board import Board, NumberCard, SpecialCard
+from ..compact_board import BLOCKED, EMPTY, NUMBER, SUIT, CompactBoard
+
+Heuristic = Callable[[CompactBoard], float]
+
+_DRAGONS = {
+    dragon.identifier() for dragon in SpecialCard if dragon != SpecialCard.Hua
+}
+
+
+def cards_left(search_board: CompactBoard) -> float:
+    """Number of cards not yet in the goal or killed"""
+    result = 0
+    for column in range(Board.MAX_COLUMN_SIZE):
+        result += search_board.height(column)
+    for slot in range(3):
+        value = search_board.bunker(slot)
+        if value != EMPTY and not value & BLOCKED:
+            result += 1
+    return result
+
+
+def buried_goal_cards(search_board: CompactBoard) -> float:
+    """Number of cards on top of the next card of every suit"""
+    next_numbers = [
+        search_board.getGoal(suit.value) + 1 for suit in NumberCard.Suit
+    ]
+    result = 0
+    for column in range(Board.MAX_COLUMN_SIZE):
+        height = search_board.height(column)
+        for row in range(height):
+            card = search_board.card(column, row)
+            number = NUMBER[card]
+            if number and next_numbers[SUIT[card]] == number:
+                result += height - row - 1
+    return result
+
+
+def blocked_dragons(search_board: CompactBoard) -> float:
+    """Number of cards on top of dragons in the field"""
+    result = 0
+    for column in range(Board.MAX_COLUMN_SIZE):
+        height = search_board.height(column)
+        for row in range(height - 1):
+            if search_board.card(column, row) in _DRAGONS:
+                result += height - row - 1
+    return result
+
+
+def combined(search_board: CompactBoard) -> float:
+    """Sum of all other heuristics"""
+    return (
+        cards_left(search_board)
+        + buried_goal_cards(search_board)
+        + blocked_dragons(search_board)
+    )
+
+
+HEURISTICS: Dict[str, Heuristic] = {
+    "cards_left": cards_left,
+    "buried_goal_cards": buried_goal_cards,
+    "blocked_dragons": blocked_dragons,
+    "combined": combined,
+}
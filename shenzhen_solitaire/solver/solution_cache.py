@@ -0,0 +1,185 @@
+"""Contains a persistent cache of solutions, keyed by the canonical start board"""
+import hashlib
+import itertools
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..board import Board
+from ..compact_board import BLOCKED, CARDS, EMPTY, CompactBoard
+from . import board_possibilities
+from .board_actions import Action, BunkerizeAction, MoveAction
+from .canonical import canonical_board, remap_solution
+from .solver import SOLVER_VERSION
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    key TEXT PRIMARY KEY,
+    actions TEXT NOT NULL,
+    duration REAL NOT NULL,
+    solver_version INTEGER NOT NULL,
+    last_used INTEGER NOT NULL
+)
+"""
+
+
+def _inverse(order: List[int]) -> List[int]:
+    result = [0] * len(order)
+    for canonical_index, real_index in enumerate(order):
+        result[real_index] = canonical_index
+    return result
+
+
+def _decode_action(
+    search_board: CompactBoard, action_struct: Dict[str, Any]
+) -> Optional[Action]:
+    """Returns the action with the given json struct on the board, None if not possible"""
+    action: Action
+    if "Move" in action_struct:
+        content = action_struct["Move"]
+        source = content["source"]
+        height = search_board.height(source["column"])
+        if not 0 <= source["row"] < height:
+            return None
+        action = MoveAction(
+            cards=[
+                CARDS[search_board.card(source["column"], row)]
+                for row in range(source["row"], height)
+            ],
+            source_id=source["column"],
+            source_row_index=source["row"],
+            destination_id=content["destination"]["column"],
+            destination_row_index=content["destination"]["row"],
+        )
+    elif "Bunkerize" in action_struct:
+        content = action_struct["Bunkerize"]
+        field_id = content["field_position"]["column"]
+        card = (
+            search_board.top(field_id)
+            if content["to_bunker"]
+            else search_board.bunker(content["bunker_slot_index"])
+        )
+        if card == EMPTY or card & BLOCKED:
+            return None
+        action = BunkerizeAction(
+            card=CARDS[card],
+            bunker_id=content["bunker_slot_index"],
+            field_id=field_id,
+            field_row_index=content["field_position"]["row"],
+            to_bunker=content["to_bunker"],
+        )
+    else:
+        # Goal slots and dragon destinations are chosen by the game,
+        # so these actions are always among the possible ones
+        for action in itertools.chain(
+            board_possibilities.huakill_actions(search_board),
+            board_possibilities.goal_actions(search_board),
+            board_possibilities.dragonkill_actions(search_board),
+        ):
+            if action.to_json_struct() == action_struct:
+                return action
+        return None
+    if action.to_json_struct() != action_struct:
+        return None
+    return action
+
+
+def decode_actions(
+    start_board: Board, action_structs: List[Dict[str, Any]]
+) -> Optional[List[Action]]:
+    """Returns the actions with the given json structs, replayed from the start board,
+    None if one of them is not possible"""
+    search_board = CompactBoard.from_board(start_board)
+    result: List[Action] = []
+    for action_struct in action_structs:
+        action = _decode_action(search_board, action_struct)
+        if action is None:
+            return None
+        action.apply_compact(search_board)
+        result.append(action)
+    return result
+
+
+class SolutionCache:
+    """Solutions stored in a sqlite database
+
+    Solutions are stored for the canonical form of the start board,
+    so boards only differing in the order of columns or slots share an entry.
+    Every entry holds the actions, the time it took to find them and the solver version,
+    entries of other solver versions are ignored.
+    At most `max_entries` solutions are kept, the least recently used are evicted.
+    """
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(str(path))
+        with self.connection:
+            self.connection.execute(_SCHEMA)
+
+    @staticmethod
+    def key(board: Board) -> str:
+        """Returns the cache key of the board, the hash of its canonical form"""
+        canonical_key = CompactBoard.from_board(board).canonical_key()
+        return hashlib.sha256(canonical_key).hexdigest()
+
+    def _next_use(self) -> int:
+        (last_used,) = self.connection.execute(
+            "SELECT COALESCE(MAX(last_used), 0) FROM solutions"
+        ).fetchone()
+        return int(last_used) + 1
+
+    def get(self, board: Board) -> Optional[Tuple[List[Action], float]]:
+        """Returns the cached solution of the board and the time it took to find it"""
+        key = self.key(board)
+        row = self.connection.execute(
+            "SELECT actions, duration FROM solutions "
+            "WHERE key = ? AND solver_version = ?",
+            (key, SOLVER_VERSION),
+        ).fetchone()
+        if row is None:
+            return None
+        actions, duration = row
+        canonical, columns, bunker = canonical_board(board)
+        solution = decode_actions(canonical, json.loads(actions))
+        with self.connection:
+            if solution is None:
+                self.connection.execute("DELETE FROM solutions WHERE key = ?", (key,))
+                return None
+            self.connection.execute(
+                "UPDATE solutions SET last_used = ? WHERE key = ?",
+                (self._next_use(), key),
+            )
+        return (remap_solution(board, solution, columns, bunker), duration)
+
+    def put(self, board: Board, solution: List[Action], duration: float) -> None:
+        """Store the solution of the board, evicting the least recently used entries"""
+        canonical, columns, bunker = canonical_board(board)
+        canonical_solution = remap_solution(
+            canonical, solution, _inverse(columns), _inverse(bunker)
+        )
+        actions = json.dumps([action.to_json_struct() for action in canonical_solution])
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?)",
+                (self.key(board), actions, duration, SOLVER_VERSION, self._next_use()),
+            )
+            self.connection.execute(
+                "DELETE FROM solutions WHERE key NOT IN "
+                "(SELECT key FROM solutions ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()
+        return int(count)
+
+    def close(self) -> None:
+        """Close the database"""
+        self.connection.close()
+
+    def __enter__(self) -> "SolutionCache":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
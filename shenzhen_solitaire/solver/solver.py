@@ -0,0 +1,293 @@
+"""Contains solver for solitaire"""
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+from ..board import Board
+from ..compact_board import CompactBoard
+from . import board_possibilities, heuristics
+from .board_actions import Action, GoalAction, HuaKillAction
+
+# Increase when the solver finds different solutions, cached solutions are ignored then
+SOLVER_VERSION = 1
+
+
+@dataclass
+class SolverStats:
+    """Statistics about a solver run
+
+    `timed_out` is set if the search gave up because of its timeout or node budget,
+    `cached` is set if the solution was taken from a solution cache,
+    `duration` is the time it originally took to find it then.
+    """
+
+    nodes: int = 0
+    duration: float = 0.0
+    timed_out: bool = False
+    cached: bool = False
+
+
+class ActionStack:
+    """Stack of action iterators, used for depth first search"""
+
+    def __init__(self) -> None:
+        self.iterator_stack: List[Iterator[Action]] = []
+        self.action_stack: List[Optional[Action]] = []
+
+    def push(self, search_board: CompactBoard) -> None:
+        """Push the actions possible on the board"""
+        self.iterator_stack.append(
+            iter(list(board_possibilities.possible_actions(search_board)))
+        )
+        self.action_stack.append(None)
+
+    def next_action(self, search_board: CompactBoard) -> Optional[Action]:
+        """Undo the last action of the current level and return the next one"""
+        last_action = self.action_stack[-1]
+        if last_action is not None:
+            last_action.undo_compact(search_board)
+        action = next(self.iterator_stack[-1], None)
+        self.action_stack[-1] = action
+        return action
+
+    def pop(self, search_board: CompactBoard) -> None:
+        """Remove the current level, undoing the action that led to it"""
+        self.iterator_stack.pop()
+        self.action_stack.pop()
+        if self.action_stack:
+            last_action = self.action_stack[-1]
+            assert last_action is not None
+            last_action.undo_compact(search_board)
+            self.action_stack[-1] = None
+
+    def solution(self) -> List[Action]:
+        """Returns the actions leading to the current board"""
+        result = [action for action in self.action_stack if action is not None]
+        assert len(result) == len(self.action_stack)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.iterator_stack)
+
+
+def solve(
+    board: Union[Board, CompactBoard],
+    *,
+    timeout: Optional[float] = None,
+    check_collisions: bool = False,
+    canonical: bool = False,
+    stats: Optional[SolverStats] = None,
+) -> Iterator[List[Action]]:
+    """Solve a solitaire puzzle
+
+    Yields every solution found, the given board is not modified.
+    Stops searching once `timeout` seconds have passed.
+    Visited states are identified by their zobrist hash, with `check_collisions`
+    the exact state is stored as well, and colliding states are not skipped.
+    With `canonical`, visited states are identified by their canonical key instead,
+    so states only differing in the order of columns or slots are searched once.
+    If given, `stats` is updated while searching.
+    """
+    if isinstance(board, CompactBoard):
+        search_board = board.copy()
+    else:
+        search_board = CompactBoard.from_board(board)
+    if stats is None:
+        stats = SolverStats()
+    start_time = time.time()
+    visited: Dict[Hashable, Optional[bytes]] = {}
+
+    def _visit() -> bool:
+        """Mark the current state as visited, return false if it was visited before"""
+        state: Hashable
+        if canonical:
+            state = search_board.canonical_key()
+        else:
+            state = search_board.zobrist
+        if state in visited:
+            if not check_collisions or canonical:
+                return False
+            if visited[state] == search_board.state_identifier:
+                return False
+            return True
+        visited[state] = (
+            search_board.state_identifier
+            if check_collisions and not canonical
+            else None
+        )
+        return True
+
+    _visit()
+    stack = ActionStack()
+    stack.push(search_board)
+
+    while stack:
+        stats.duration = time.time() - start_time
+        if timeout is not None and stats.duration > timeout:
+            stats.timed_out = True
+            return
+
+        action = stack.next_action(search_board)
+        if action is None:
+            stack.pop(search_board)
+            continue
+
+        action.apply_compact(search_board)
+        stats.nodes += 1
+        if not _visit():
+            continue
+
+        if search_board.solved():
+            yield stack.solution()
+            continue
+
+        stack.push(search_board)
+
+    stats.duration = time.time() - start_time
+
+
+def action_cost(action: Action) -> int:
+    """Returns the cost of an action, moves the game does by itself are free"""
+    if isinstance(action, HuaKillAction):
+        return 0
+    if isinstance(action, GoalAction) and action.obvious:
+        return 0
+    return 1
+
+
+def best_first_solve(
+    board: Union[Board, CompactBoard],
+    *,
+    heuristic: heuristics.Heuristic = heuristics.combined,
+    weight: float = 1.0,
+    node_budget: Optional[int] = None,
+    timeout: Optional[float] = None,
+    canonical: bool = False,
+    improve: bool = False,
+    cancel: Optional[threading.Event] = None,
+    stats: Optional[SolverStats] = None,
+) -> Iterator[List[Action]]:
+    """Solve a solitaire puzzle with a weighted A* search
+
+    Boards are expanded in order of `cost + weight * heuristic`,
+    a weight above 1 trades solution length for search speed.
+    Yields solutions in the order they are found, the given board is not modified.
+    With `improve`, only solutions cheaper than the previous one are yielded
+    and boards which are not cheaper than the previous solution are not expanded.
+    Stops searching once `node_budget` boards were expanded, `timeout` seconds passed
+    or `cancel` is set.
+    """
+    if isinstance(board, CompactBoard):
+        search_board = board.copy()
+    else:
+        search_board = CompactBoard.from_board(board)
+    if stats is None:
+        stats = SolverStats()
+    start_time = time.time()
+
+    def _state() -> Hashable:
+        if canonical:
+            return search_board.canonical_key()
+        return search_board.zobrist
+
+    # parents[node] is the parent node and the action leading from it to node
+    parents: List[Tuple[int, Optional[Action]]] = [(-1, None)]
+    best_cost: Dict[Hashable, int] = {_state(): 0}
+    tie_breaker = itertools.count()
+    queue = [
+        (
+            weight * heuristic(search_board),
+            next(tie_breaker),
+            0,
+            0,
+            search_board.snapshot(),
+        )
+    ]
+
+    def _solution(node: int) -> List[Action]:
+        result: List[Action] = []
+        while node != 0:
+            node, action = parents[node]
+            assert action is not None
+            result.append(action)
+        return result[::-1]
+
+    expanded = 0
+    # Cost of the last yielded solution, used with `improve`
+    solution_cost: Optional[int] = None
+    while queue:
+        stats.duration = time.time() - start_time
+        if (
+            (timeout is not None and stats.duration > timeout)
+            or (node_budget is not None and expanded >= node_budget)
+            or (cancel is not None and cancel.is_set())
+        ):
+            stats.timed_out = True
+            return
+
+        _, _, cost, node, snapshot = heapq.heappop(queue)
+        search_board.restore(snapshot)
+        if cost > best_cost[_state()]:
+            continue
+        if improve and solution_cost is not None and cost >= solution_cost:
+            continue
+        if search_board.solved():
+            solution_cost = cost
+            yield _solution(node)
+            continue
+
+        expanded += 1
+        for action in list(board_possibilities.possible_actions(search_board)):
+            action.apply_compact(search_board)
+            stats.nodes += 1
+            child_cost = cost + action_cost(action)
+            state = _state()
+            if best_cost.get(state, child_cost + 1) > child_cost:
+                best_cost[state] = child_cost
+                parents.append((node, action))
+                heapq.heappush(
+                    queue,
+                    (
+                        child_cost + weight * heuristic(search_board),
+                        next(tie_breaker),
+                        child_cost,
+                        len(parents) - 1,
+                        search_board.snapshot(),
+                    ),
+                )
+            action.undo_compact(search_board)
+
+    stats.duration = time.time() - start_time
+
+
+def anytime_solve(
+    board: Union[Board, CompactBoard],
+    budget: float,
+    *,
+    heuristic: heuristics.Heuristic = heuristics.combined,
+    weight: float = 3.0,
+    canonical: bool = False,
+    cancel: Optional[threading.Event] = None,
+    stats: Optional[SolverStats] = None,
+) -> Iterator[List[Action]]:
+    """Solve a solitaire puzzle, improving the solution within `budget` seconds
+
+    The first solution is found by a greedy weighted A* search,
+    which then continues and yields every strictly cheaper solution it finds,
+    see `action_cost`. The last yielded solution is the best one.
+    Searching stops when the budget is used up, `cancel` is set
+    or the caller stops iterating.
+    """
+    return best_first_solve(
+        board,
+        heuristic=heuristic,
+        weight=weight,
+        timeout=budget,
+        canonical=canonical,
+        improve=True,
+        cancel=cancel,
+        stats=stats,
+    )
@@ -0,0 +1,282 @@
+"""Contains a client for long running solver processes and a python solver process
+
+Both sides speak newline delimited json.
+Every request line is `{"id": ..., "board": ...}` with the board in the format of
+`Board.to_json`, every response line is `{"id": ..., "actions": [...]}` with the
+actions in the format of the rust solver, or `{"id": ..., "error": "..."}`.
+"""
+import argparse
+import itertools
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import IO, Any, Dict, List, Optional, Sequence
+
+from ..board import Board
+from . import solver
+
+JsonActions = List[Dict[str, Any]]
+
+# How often the watchdog checks for timed out requests, in seconds
+_WATCHDOG_INTERVAL = 0.05
+
+
+class WorkerError(Exception):
+    """Raised if the worker could not solve a board"""
+
+
+def _close_pipe(pipe: Optional[IO[str]]) -> None:
+    """Close a pipe of a process, which may already be dead"""
+    if pipe is None:
+        return
+    try:
+        pipe.close()
+    except OSError:
+        pass
+
+
+@dataclass
+class _Request:
+    line: str
+    future: "Future[JsonActions]"
+    deadline: Optional[float]
+    attempts: int = 0
+
+
+class SolverWorker:
+    """Client of a long running solver process
+
+    The process is started once, several requests can be in flight
+    and responses are matched to requests by their id.
+    If the process dies, it is restarted and the outstanding requests are sent again,
+    a request fails with `WorkerError` once it was sent `max_attempts` times.
+    A request not answered within its timeout fails with `TimeoutError`,
+    the process is restarted then, since it is stuck on that request.
+    """
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        *,
+        timeout: Optional[float] = None,
+        max_attempts: int = 2,
+    ) -> None:
+        self.command = list(command)
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending: Dict[int, _Request] = {}
+        self._closed = False
+        self._generation = 0
+        self._process: "subprocess.Popen[str]"
+        with self._lock:
+            self._start()
+        self._watchdog = threading.Thread(target=self._watch, daemon=True)
+        self._watchdog.start()
+
+    def _start(self) -> None:
+        """Start a new process and send all outstanding requests, lock must be held"""
+        self._generation += 1
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        threading.Thread(
+            target=self._read,
+            args=(self._process, self._generation),
+            daemon=True,
+        ).start()
+        for request_id, request in list(self._pending.items()):
+            if request.attempts >= self.max_attempts:
+                del self._pending[request_id]
+                request.future.set_exception(
+                    WorkerError(f"Worker died {request.attempts} times on request")
+                )
+            else:
+                self._send(request)
+
+    def _restart(self) -> None:
+        """Kill the current process and start a new one, lock must be held"""
+        self.restarts += 1
+        self._process.kill()
+        _close_pipe(self._process.stdin)
+        self._start()
+
+    def _send(self, request: _Request) -> None:
+        """Write request to the process, lock must be held"""
+        request.attempts += 1
+        assert self._process.stdin is not None
+        try:
+            self._process.stdin.write(request.line)
+            self._process.stdin.flush()
+        except OSError:
+            # The reader notices the dead process and restarts it
+            pass
+
+    def _read(self, process: "subprocess.Popen[str]", generation: int) -> None:
+        """Resolve the futures of the responses, until the process exits"""
+        assert process.stdout is not None
+        for line in process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                request = self._pending.pop(response.get("id"), None)
+            if request is None:
+                continue
+            if response.get("actions") is not None:
+                request.future.set_result(response["actions"])
+            else:
+                request.future.set_exception(
+                    WorkerError(response.get("error", "No solution"))
+                )
+        process.wait()
+        _close_pipe(process.stdout)
+        with self._lock:
+            # Under the lock, requests are not sent to the closed pipe
+            _close_pipe(process.stdin)
+            if not self._closed and generation == self._generation:
+                self.restarts += 1
+                self._start()
+
+    def _watch(self) -> None:
+        """Fail requests which are not answered in time"""
+        while True:
+            time.sleep(_WATCHDOG_INTERVAL)
+            with self._lock:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                expired = [
+                    request_id
+                    for request_id, request in self._pending.items()
+                    if request.deadline is not None and request.deadline < now
+                ]
+                for request_id in expired:
+                    self._pending.pop(request_id).future.set_exception(
+                        TimeoutError("Solver worker did not answer in time")
+                    )
+                if expired:
+                    self._restart()
+
+    def submit(
+        self, board: Board, timeout: Optional[float] = None
+    ) -> "Future[JsonActions]":
+        """Send board to the worker, the future resolves to the actions solving it
+
+        Without `timeout`, the timeout of the worker is used.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        future: "Future[JsonActions]" = Future()
+        with self._lock:
+            if self._closed:
+                raise WorkerError("Worker is closed")
+            request_id = next(self._ids)
+            request = _Request(
+                line=json.dumps({"id": request_id, "board": json.loads(board.to_json())})
+                + "\n",
+                future=future,
+                deadline=None if timeout is None else time.monotonic() + timeout,
+            )
+            self._pending[request_id] = request
+            self._send(request)
+        return future
+
+    def solve(self, board: Board, timeout: Optional[float] = None) -> JsonActions:
+        """Solve board and wait for the result"""
+        return self.submit(board, timeout).result()
+
+    def close(self) -> None:
+        """Stop the process, outstanding requests fail"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+            _close_pipe(self._process.stdin)
+        for request in pending:
+            request.future.set_exception(WorkerError("Worker is closed"))
+        try:
+            self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+    def __enter__(self) -> "SolverWorker":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def serve(
+    input_stream: IO[str],
+    output_stream: IO[str],
+    *,
+    timeout: Optional[float] = None,
+    delay: float = 0.0,
+    crash_after: Optional[int] = None,
+) -> None:
+    """Answer requests with the python solver until the input ends
+
+    `delay` and `crash_after` make the worker slow or exit after some requests,
+    to test clients.
+    """
+    for count, line in enumerate(input_stream, start=1):
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        time.sleep(delay)
+        board = Board.from_json(json.dumps(request["board"]))
+        solution = next(solver.solve(board, timeout=timeout), None)
+        if solution is None:
+            response = {"id": request["id"], "error": "No solution found"}
+        else:
+            response = {
+                "id": request["id"],
+                "actions": [action.to_json_struct() for action in solution],
+            }
+        output_stream.write(json.dumps(response) + "\n")
+        output_stream.flush()
+        if crash_after is not None and count >= crash_after:
+            sys.exit(1)
+
+
+def main() -> None:
+    """Run the python solver as a worker on stdin and stdout"""
+    parser = argparse.ArgumentParser(description="Python solver worker")
+    parser.add_argument("--timeout", type=float, default=None, help="Solver timeout")
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="Wait before answering a request"
+    )
+    parser.add_argument(
+        "--crash-after",
+        dest="crash_after",
+        type=int,
+        default=None,
+        help="Exit after answering this many requests",
+    )
+    args = parser.parse_args()
+    serve(
+        sys.stdin,
+        sys.stdout,
+        timeout=args.timeout,
+        delay=args.delay,
+        crash_after=args.crash_after,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -27,11 +27,72 @@ struct Opt {
     /// Prettify JSON output
     #[structopt(short, long)]
     pretty: bool,
+
+    /// Keep running and solve one board per line of stdin,
+    /// as `{"id": .., "board": ..}`, answering with `{"id": .., "actions": ..}`
+    /// or `{"id": .., "error": ..}` on one line of stdout
+    #[structopt(long)]
+    serve: bool,
+}
+
+#[derive(serde::Deserialize)]
+struct Request {
+    id: u64,
+    board: board::Board,
+}
+
+#[derive(serde::Serialize)]
+struct Response {
+    id: u64,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    actions: Option<Vec<actions::All>>,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    error: Option<String>,
+}
+
+#[allow(clippy::needless_return)]
+fn serve(optimize: bool) -> Result<(), Box<dyn std::error::Error>> {
+    use std::io::{BufRead, Write};
+    let stdin = std::io::stdin();
+    let stdout = std::io::stdout();
+    let mut handle = stdout.lock();
+    for line in stdin.lock().lines() {
+        let line = line?;
+        if line.trim().is_empty() {
+            continue;
+        }
+        let request: Request = serde_json::from_str(&line)?;
+        let response = match solving::solve(&request.board) {
+            Result::Ok(action_sequence) => {
+                let action_sequence = if optimize {
+                    action_optimization::optimize(&action_sequence)
+                } else {
+                    action_sequence
+                };
+                Response {
+                    id: request.id,
+                    actions: Option::Some(action_sequence),
+                    error: Option::None,
+                }
+            }
+            Result::Err(error) => Response {
+                id: request.id,
+                actions: Option::None,
+                error: Option::Some(error.to_string()),
+            },
+        };
+        writeln!(handle, "{}", serde_json::to_string(&response)?)?;
+        handle.flush()?;
+    }
+    return Result::Ok(());
 }
 
 #[allow(clippy::needless_return)]
 pub fn main() -> Result<(), Box<dyn std::error::Error>> {
     let opts = Opt::from_args();
+    if opts.serve {
+        return serve(opts.optimize);
+    }
     let buffer = if let Option::Some(input) = opts.input {
         std::fs::read_to_string(input)?
     } else {
@@ -0,0 +1,79 @@
+"""Contains the ActionOptimizationTest class"""
+import copy
+import dataclasses
+import unittest
+from typing import List
+
+from shenzhen_solitaire.solver import action_optimization, board_possibilities, solver
+from shenzhen_solitaire.solver.board_actions import (
+    Action,
+    BunkerizeAction,
+    GoalAction,
+    HuaKillAction,
+    MoveAction,
+)
+
+from .boards import TEST_BOARD
+
+
+def _is_automatic(action: Action) -> bool:
+    return isinstance(action, HuaKillAction) or (
+        isinstance(action, GoalAction) and action.obvious
+    )
+
+
+def _manual_count(actions: List[Action]) -> int:
+    return sum(not _is_automatic(action) for action in actions)
+
+
+class ActionOptimizationTest(unittest.TestCase):
+    """Tests shortening solutions"""
+
+    def _check_solution(self, actions: List[Action]) -> None:
+        board_copy = copy.deepcopy(TEST_BOARD)
+        for action in actions:
+            action.apply(board_copy)
+            self.assertTrue(board_copy.check_correct())
+        self.assertTrue(board_copy.solved())
+
+    def test_optimize(self) -> None:
+        """Tests that an optimized solution still solves the board"""
+        solution = next(solver.best_first_solve(TEST_BOARD, weight=3))
+        optimized = action_optimization.optimize(TEST_BOARD, solution)
+        self._check_solution(optimized)
+        self.assertLessEqual(_manual_count(optimized), _manual_count(solution))
+
+    def test_round_trips(self) -> None:
+        """Tests that moving cards away and back again is removed"""
+        solution = next(solver.best_first_solve(TEST_BOARD, weight=3))
+        manual_solution = [action for action in solution if not _is_automatic(action)]
+        round_trips: List[List[Action]] = []
+        for action in board_possibilities.possible_actions(TEST_BOARD):
+            if isinstance(action, MoveAction):
+                round_trips.append(
+                    [
+                        action,
+                        dataclasses.replace(
+                            action,
+                            source_id=action.destination_id,
+                            destination_id=action.source_id,
+                        ),
+                    ]
+                )
+            elif isinstance(action, BunkerizeAction) and action.to_bunker:
+                round_trips.append(
+                    [action, dataclasses.replace(action, to_bunker=False)]
+                )
+        # Moving back is not always allowed
+        round_trips = [
+            round_trip
+            for round_trip in round_trips
+            if action_optimization.replay(TEST_BOARD, round_trip + manual_solution)
+        ]
+        self.assertGreater(len(round_trips), 0)
+        for round_trip in round_trips:
+            optimized = action_optimization.optimize(
+                TEST_BOARD, round_trip + solution
+            )
+            self._check_solution(optimized)
+            self.assertLessEqual(_manual_count(optimized), len(manual_solution))
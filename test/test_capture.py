@@ -0,0 +1,84 @@
+"""Contains the CaptureTest class"""
+import unittest
+from typing import Any, List, Optional
+
+import numpy as np
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+from shenzhen_solitaire import capture
+from shenzhen_solitaire.card_detection import board_parser
+
+
+class _RecordingCapture(capture.ArrayCapture):
+    """Array capture, which remembers the captured regions"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.regions: List[Optional[capture.Region]] = []
+
+    def capture(self, region: Optional[capture.Region] = None) -> np.ndarray:
+        self.regions.append(region)
+        return super().capture(region)
+
+
+class CaptureTest(unittest.TestCase):
+    """Tests the capture backends without a screen"""
+
+    def test_array_capture(self) -> None:
+        """Images are captured in order, the last one stays"""
+        images = [np.full((4, 6, 3), value, dtype=np.uint8) for value in [1, 2]]
+        backend = capture.ArrayCapture(images)
+        self.assertEqual([backend.capture()[0, 0, 0] for _ in range(3)], [1, 2, 2])
+        self.assertEqual(backend.capture((1, 2, 3, 2)).shape, (2, 3, 3))
+        backend.show(images[0])
+        self.assertEqual(backend.capture()[0, 0, 0], 1)
+
+    def test_region_capture(self) -> None:
+        """Boards captured in the region of the parser parse like whole screenshots"""
+        loaded_config = configuration.load("test_config.zip")
+        backend = capture.FileCapture(
+            ["pictures/20190809172206_1.jpg", "pictures/specific/BaiShiny.jpg"]
+        )
+        region_capture = capture.RegionCapture.for_configuration(
+            backend, loaded_config
+        )
+        for image in list(backend.images):
+            captured = region_capture.capture()
+            self.assertLess(captured.size, image.size)
+            self.assertEqual(
+                board_parser.parse_board(captured, loaded_config).to_json(),
+                board_parser.parse_board(image, loaded_config).to_json(),
+            )
+
+    def test_screen_wait(self) -> None:
+        """Waits end once the regions changed and settled, or by the timeout"""
+        frames = [np.full((10, 10, 3), value, dtype=np.uint8) for value in [0, 50, 100]]
+        region = [(2, 2, 4, 4)]
+        stats = capture.WaitStats()
+        # Marked screen, then a moving card which comes to rest
+        backend = _RecordingCapture([frames[0], frames[0], frames[1], frames[2]])
+        waiter = capture.ScreenWait(backend, poll_interval=0, stats=stats)
+        waiter.mark(region)
+        self.assertTrue(waiter.wait(region, timeout=5))
+        self.assertEqual(backend.captures, 6)
+        # Only the watched regions are captured, not the whole screen
+        self.assertEqual(backend.regions, [region[0]] * 6)
+
+        # Nothing changes, e.g. a missed drag
+        backend.show(frames[2])
+        waiter.mark(region)
+        self.assertFalse(waiter.wait(region, timeout=0.05))
+        self.assertTrue(waiter.wait(region, timeout=5, changed=False))
+        self.assertEqual(stats.waits, 3)
+        self.assertEqual(stats.timeouts, 1)
+
+        # Clicks without watched regions
+        captures = backend.captures
+        waiter.mark(())
+        self.assertTrue(waiter.wait((), timeout=5))
+        self.assertEqual(backend.captures, captures)
+        self.assertEqual(stats.waits, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 """Contains tests for chain module"""
+import copy
 import unittest
 
 from shenzhen_solitaire.board import NumberCard, Position
@@ -81,7 +82,9 @@ class ChainTest(unittest.TestCase):
                 goal_id=0,
             ),
         ]
+        # Other tests use the board, so the sequence is applied to a copy
+        test_board = copy.deepcopy(TEST_BOARD)
         for action in sequence:
-            step = list(board_possibilities.possible_actions(TEST_BOARD))
+            step = list(board_possibilities.possible_actions(test_board))
             self.assertIn(action, step)
-            action.apply(TEST_BOARD)
+            action.apply(test_board)
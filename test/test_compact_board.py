@@ -0,0 +1,37 @@
+"""Contains the CompactBoardTest class"""
+import copy
+import unittest
+
+from shenzhen_solitaire.compact_board import CompactBoard, zobrist_hash
+from shenzhen_solitaire.solver import board_possibilities
+
+from .boards import TEST_BOARD
+
+
+class CompactBoardTest(unittest.TestCase):
+    """Tests the array backed board"""
+
+    def test_conversion(self) -> None:
+        """Tests converting a board back and forth"""
+        compact = CompactBoard.from_board(TEST_BOARD)
+        converted = compact.to_board()
+        self.assertEqual(TEST_BOARD.field, converted.field)
+        self.assertEqual(TEST_BOARD.bunker, converted.bunker)
+        self.assertEqual(TEST_BOARD.goal, converted.goal)
+        self.assertEqual(TEST_BOARD.flower_gone, converted.flower_gone)
+
+    def test_actions(self) -> None:
+        """Tests that actions on the compact board match the board"""
+        compact = CompactBoard.from_board(TEST_BOARD)
+        snapshot = compact.snapshot()
+        for action in list(board_possibilities.possible_actions(compact)):
+            board_copy = copy.deepcopy(TEST_BOARD)
+            action.apply(board_copy)
+            action.apply_compact(compact)
+            self.assertEqual(
+                CompactBoard.from_board(board_copy).snapshot(), compact.snapshot()
+            )
+            self.assertEqual(zobrist_hash(compact.data), compact.zobrist)
+            action.undo_compact(compact)
+            self.assertEqual(snapshot, compact.snapshot())
+            self.assertEqual(zobrist_hash(snapshot), compact.zobrist)
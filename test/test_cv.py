@@ -1,7 +1,11 @@
 """Contains function to manually test the visual detection of a board"""
 
 import copy
+import os
+import shutil
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Tuple, Union
 
 import cv2
@@ -10,7 +14,7 @@ import numpy as np
 import shenzhen_solitaire.card_detection.configuration as configuration
 from shenzhen_solitaire import board
 from shenzhen_solitaire.board import Card, NumberCard, SpecialCard
-from shenzhen_solitaire.card_detection import adjustment, board_parser
+from shenzhen_solitaire.card_detection import adjustment, board_parser, registration
 
 from . import boards
 
@@ -104,3 +108,161 @@ class CardDetectionTest(unittest.TestCase):
             image = cv2.imread(f"pictures/specific/{imagename}.jpg")
             my_board = board_parser.parse_board(image, loaded_config)
             self.assertListEqual(goal, my_board.goal)
+
+    def test_compiled_load(self) -> None:
+        """Compiled templates give the same configuration and follow the archive"""
+        image = cv2.imread("pictures/20190809172206_1.jpg")
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = os.path.join(directory, "config.zip")
+            shutil.copy("test_config.zip", config_path)
+            cold = configuration.load(config_path, compiled=True)
+            self.assertTrue(os.path.exists(configuration.compiled_path(config_path)))
+            warm = configuration.load(config_path, compiled=True)
+            self.assertEqual(len(cold.catalogue), len(warm.catalogue))
+            for (cold_image, cold_card), (warm_image, warm_card) in zip(
+                cold.catalogue, warm.catalogue
+            ):
+                self.assertEqual(cold_card, warm_card)
+                np.testing.assert_array_equal(cold_image, warm_image)
+            self.assertEqual(
+                board_parser.parse_board(image, cold).to_json(),
+                board_parser.parse_board(image, warm).to_json(),
+            )
+            np.testing.assert_array_equal(
+                cold.feature_index().features, warm.feature_index().features
+            )
+
+            # Changing the archive invalidates the compiled templates
+            changed = copy.copy(warm)
+            changed.catalogue = warm.catalogue[:-1]
+            configuration.save(changed, config_path)
+            reloaded = configuration.load(config_path, compiled=True)
+            self.assertEqual(len(reloaded.catalogue), len(warm.catalogue) - 1)
+
+    def test_unstacked_templates(self) -> None:
+        """Templates which can not be stacked are matched one by one"""
+        image = cv2.imread("pictures/20190809172206_1.jpg")
+        # No card backs and special buttons, enough for a start board
+        laptop_config = configuration.load("laptop_conf.zip")
+        self.assertIsNone(laptop_config.stacks().card_back)
+        start_board = board_parser.parse_start_board(image, laptop_config)
+        self.assertEqual(len(start_board.field), board.Board.MAX_COLUMN_SIZE)
+
+        loaded_config = configuration.load("test_config.zip")
+        mixed_config = configuration.load("test_config.zip")
+        template, card = mixed_config.catalogue[5]
+        mixed_config.catalogue[5] = (template[1:-1, 1:-1], card)
+        mixed_config.green_card[0] = mixed_config.green_card[0][1:, 1:]
+        self.assertIsNone(mixed_config.stacks().catalogue)
+        for decode in [False, True]:
+            self.assertEqual(
+                board_parser.parse_board(
+                    image, loaded_config, decode=decode
+                ).to_json(),
+                board_parser.parse_board(image, mixed_config, decode=decode).to_json(),
+            )
+
+    def test_coarse_to_fine(self) -> None:
+        """Coarse to fine matching reads the same boards"""
+        loaded_config = configuration.load("test_config.zip")
+        stats = board_parser.RefinementStats()
+        coarse = board_parser.CoarseToFine(top_k=3, downsample=2, stats=stats)
+        for imagename in ["pictures/20190809172206_1.jpg", "pictures/specific/FaShiny.jpg"]:
+            image = cv2.imread(imagename)
+            self.assertEqual(
+                board_parser.parse_board(image, loaded_config).to_json(),
+                board_parser.parse_board(image, loaded_config, coarse=coarse).to_json(),
+            )
+        self.assertGreater(stats.squares, 0)
+        self.assertLessEqual(stats.changed, stats.squares)
+
+        # Other templates of the same card are no mistakes
+        stats = board_parser.RefinementStats()
+        coarse = board_parser.CoarseToFine(stats=stats, verify=True)
+        image = cv2.imread("pictures/20190809172206_1.jpg")
+        board_parser.parse_field(image, loaded_config, coarse=coarse)
+        self.assertGreater(stats.squares, 0)
+        self.assertEqual(stats.wrong, 0)
+
+    def test_nearest_neighbour(self) -> None:
+        """Classifying with the feature index reads the same boards"""
+        loaded_config = configuration.load("test_config.zip")
+        for margin in [0.03, 1.0]:
+            stats = board_parser.NearestStats()
+            nearest = board_parser.NearestNeighbour(margin=margin, stats=stats)
+            for imagename in [
+                "pictures/20190809172206_1.jpg",
+                "pictures/specific/FaShiny.jpg",
+            ]:
+                image = cv2.imread(imagename)
+                self.assertEqual(
+                    board_parser.parse_board(image, loaded_config).to_json(),
+                    board_parser.parse_board(
+                        image, loaded_config, nearest=nearest
+                    ).to_json(),
+                )
+            self.assertGreater(stats.squares, 0)
+            if margin == 1.0:
+                self.assertEqual(stats.fallbacks, stats.squares)
+            else:
+                self.assertLess(stats.fallbacks, stats.squares)
+
+    def test_registration(self) -> None:
+        """Registered parsing finds moved boards"""
+        loaded_config = configuration.load("test_config.zip")
+        image = cv2.imread("pictures/specific/BaiShiny.jpg")
+        expected = board_parser.parse_board(image, loaded_config).to_json()
+        self.assertEqual(registration.estimate_offset(image, loaded_config), (0, 0))
+        for offset in [(3, -2), (-4, 5)]:
+            moved = np.roll(image, offset, axis=(0, 1))
+            self.assertEqual(registration.estimate_offset(moved, loaded_config), offset)
+            self.assertEqual(
+                board_parser.parse_board(moved, loaded_config, register=True).to_json(),
+                expected,
+            )
+
+    def test_reparse(self) -> None:
+        """Incremental parsing reads changed squares like a full parse"""
+        loaded_config = configuration.load("test_config.zip")
+        previous_image = cv2.imread("pictures/20190809172206_1.jpg")
+        previous_board = board_parser.parse_board(previous_image, loaded_config)
+
+        stats = board_parser.ReparseStats()
+        unchanged = board_parser.reparse_board(
+            previous_image, previous_board, previous_image, loaded_config, stats=stats
+        )
+        self.assertEqual(unchanged.to_json(), previous_board.to_json())
+        self.assertEqual(stats.changed, 0)
+        self.assertEqual(stats.classified, 0)
+
+        # Replace the first column with the one of another game
+        image = previous_image.copy()
+        other_image = cv2.imread("pictures/20190809172213_1.jpg")
+        image[560:, 720:870] = other_image[560:, 720:870]
+        stats = board_parser.ReparseStats()
+        changed = board_parser.reparse_board(
+            previous_image, previous_board, image, loaded_config, stats=stats
+        )
+        expected = board_parser.parse_board(image, loaded_config)
+        self.assertNotEqual(expected.field[0], previous_board.field[0])
+        self.assertEqual(changed.to_json(), expected.to_json())
+        self.assertLessEqual(stats.classified, len(expected.field[0]))
+
+    def test_parallel_parse(self) -> None:
+        """Parsing in a thread pool reads the same boards"""
+        loaded_config = configuration.load("test_config.zip")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for imagename in [
+                "pictures/20190809172206_1.jpg",
+                "pictures/specific/BaiShiny.jpg",
+            ]:
+                image = cv2.imread(imagename)
+                for decode in [False, True]:
+                    self.assertEqual(
+                        board_parser.parse_board(
+                            image, loaded_config, decode=decode
+                        ).to_json(),
+                        board_parser.parse_board(
+                            image, loaded_config, decode=decode, executor=executor
+                        ).to_json(),
+                    )
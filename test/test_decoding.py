@@ -0,0 +1,54 @@
+"""Contains the DecodingTest class"""
+
+import itertools
+import unittest
+from typing import Dict, List
+
+import numpy as np
+
+from shenzhen_solitaire.board import Card, NumberCard, SpecialCard
+from shenzhen_solitaire.card_detection import decoding
+
+
+class DecodingTest(unittest.TestCase):
+    """Tests reading cards under the card counts of the game"""
+
+    def test_assign(self) -> None:
+        """Assignments have the least cost of all assignments"""
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            rows = int(rng.integers(1, 5))
+            cost = rng.random((rows, int(rng.integers(rows, 6)))).round(1)
+            result = decoding.assign(cost)
+            self.assertEqual(len(set(result)), rows)
+            best = min(
+                sum(cost[row, column] for row, column in enumerate(columns))
+                for columns in itertools.permutations(range(cost.shape[1]), rows)
+            )
+            self.assertAlmostEqual(cost[np.arange(rows), result].sum(), best)
+
+    def test_remaining_cards(self) -> None:
+        """Cards in goal, killed dragons and the flower are not left"""
+        counts = decoding.remaining_cards(
+            [NumberCard(NumberCard.Suit.Red, 3), None, None],
+            [(SpecialCard.Fa, 0), None, SpecialCard.Bai],
+            True,
+        )
+        self.assertNotIn(NumberCard(NumberCard.Suit.Red, 3), counts)
+        self.assertEqual(counts[NumberCard(NumberCard.Suit.Red, 4)], 1)
+        self.assertNotIn(SpecialCard.Fa, counts)
+        self.assertEqual(counts[SpecialCard.Bai], 4)
+        self.assertNotIn(SpecialCard.Hua, counts)
+        self.assertEqual(sum(counts.values()), 6 + 9 + 9 + 8)
+
+    def test_repair(self) -> None:
+        """A unique card read twice goes to the square fitting it best"""
+        red_5 = NumberCard(NumberCard.Suit.Red, 5)
+        green_5 = NumberCard(NumberCard.Suit.Green, 5)
+        cards: List[Card] = [red_5, green_5, SpecialCard.Zhong]
+        scores = np.array([[0.99, 0.5, 0.1], [0.97, 0.95, 0.1], [0.2, 0.1, 0.98]])
+        counts: Dict[Card, int] = {red_5: 1, green_5: 1, SpecialCard.Zhong: 4}
+        self.assertEqual(
+            decoding.decode(scores, cards, counts), [red_5, green_5, SpecialCard.Zhong]
+        )
+        self.assertIsNone(decoding.decode(scores, cards, {red_5: 1, green_5: 1}))
@@ -0,0 +1,61 @@
+"""Contains the ParserServiceTest class"""
+import unittest
+
+import cv2
+import numpy as np
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+from shenzhen_solitaire.card_detection import board_parser, parser_service
+
+
+def _catalogue_templates(conf: configuration.Configuration) -> np.ndarray:
+    catalogue = conf.stacks().catalogue
+    assert catalogue is not None
+    return catalogue.templates
+
+
+def _owns_templates(conf: configuration.Configuration, _: int) -> bool:
+    return bool(_catalogue_templates(conf).flags.owndata)
+
+
+class ParserServiceTest(unittest.TestCase):
+    """Tests parsing with a configuration in shared memory"""
+
+    def setUp(self) -> None:
+        self.conf = configuration.load("test_config.zip")
+        self.image = cv2.imread("pictures/20190809172206_1.jpg")
+
+    def test_attach(self) -> None:
+        """An attached configuration parses like the original one"""
+        with parser_service.SharedConfiguration(self.conf) as shared:
+            memory, attached = parser_service.attach(shared.layout)
+            try:
+                self.assertEqual(attached.field_adjustment, self.conf.field_adjustment)
+                self.assertEqual(
+                    [card for _, card in attached.catalogue],
+                    [card for _, card in self.conf.catalogue],
+                )
+                self.assertFalse(attached.catalogue[0][0].flags.writeable)
+                np.testing.assert_array_equal(
+                    _catalogue_templates(attached), _catalogue_templates(self.conf)
+                )
+                self.assertEqual(
+                    board_parser.parse_board(self.image, attached).to_json(),
+                    board_parser.parse_board(self.image, self.conf).to_json(),
+                )
+                del attached
+            finally:
+                memory.close()
+
+    def test_service(self) -> None:
+        """Workers parse with the shared configuration, without copying it"""
+        with parser_service.ParserService(self.conf, processes=2) as service:
+            self.assertEqual(
+                service.parse_board(self.image, decode=True).to_json(),
+                board_parser.parse_board(self.image, self.conf, decode=True).to_json(),
+            )
+            self.assertEqual(list(service.map(_owns_templates, range(4))), [False] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Contains the PipelineTest class"""
+import asyncio
+import threading
+import unittest
+from typing import List
+
+from shenzhen_solitaire.pipeline import LatencyStats, Pipeline, Stage
+
+
+class PipelineTest(unittest.TestCase):
+    """Tests the stages and latency statistics of the pipeline"""
+
+    def test_order(self) -> None:
+        """Items pass all stages in order, stages work at the same time"""
+        threads: List[str] = []
+        # The second stage works on the first item, while the first stage
+        # starts on the next one
+        next_started = threading.Event()
+        overlapped: List[bool] = []
+
+        def _double(item: int) -> int:
+            threads.append(threading.current_thread().name)
+            if item == 1:
+                next_started.set()
+            return item * 2
+
+        def _increment(item: int) -> int:
+            if item == 0:
+                overlapped.append(next_started.wait(timeout=10))
+            return item + 1
+
+        stats = LatencyStats()
+        pipeline = Pipeline(
+            [Stage("double", _double), Stage("increment", _increment)],
+            stats=stats,
+        )
+        results = asyncio.run(pipeline.run(range(4)))
+        self.assertEqual(results, [1, 3, 5, 7])
+        self.assertEqual(overlapped, [True])
+        self.assertEqual(len(set(threads)), 1)
+        self.assertNotEqual(threads[0], threading.current_thread().name)
+        self.assertEqual(len(stats.durations["double"]), 4)
+        self.assertGreaterEqual(
+            stats.percentile("double", 95), stats.percentile("double", 50)
+        )
+        self.assertIn("increment", stats.summary())
+
+    def test_feedback(self) -> None:
+        """Results are passed to the first stage again, until the limit"""
+        warmed = threading.Event()
+        pipeline = Pipeline([Stage("count", lambda x: x + 1, warm=warmed.set)])
+        results = asyncio.run(pipeline.run([0], feedback=True, limit=5))
+        self.assertEqual(results, [1, 2, 3, 4, 5])
+        self.assertTrue(warmed.is_set())
+        self.assertEqual(len(pipeline.stats.durations["count warm"]), 1)
+
+    def test_error(self) -> None:
+        """An exception in a stage stops the pipeline"""
+
+        def _fail(item: int) -> int:
+            if item == 2:
+                raise ValueError("Bad item")
+            return item
+
+        pipeline = Pipeline([Stage("fail", _fail), Stage("identity", lambda x: x)])
+        with self.assertRaises(ValueError):
+            asyncio.run(pipeline.run(range(5)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Contains the SimulationTest class"""
+import contextlib
+import io
+import unittest
+from typing import List, Tuple
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+import shenzhen_solitaire.clicker as clicker
+from shenzhen_solitaire.clicker import simulation
+from shenzhen_solitaire.solver import action_optimization, solver
+from shenzhen_solitaire.solver.board_actions import Action
+
+from .boards import TEST_BOARD
+
+
+class SimulationTest(unittest.TestCase):
+    """Tests executing solutions with the simulated input backend"""
+
+    def setUp(self) -> None:
+        self.conf = configuration.load("test_config.zip")
+        self.solution = next(solver.best_first_solve(TEST_BOARD, weight=3))
+
+    def _play(
+        self,
+        game: simulation.SimulatedInput,
+        solution: List[Action],
+        offset: Tuple[int, int] = (0, 0),
+    ) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            clicker.handle_actions(
+                [action.to_json_struct() for action in solution],
+                offset,
+                self.conf,
+                backend=game,
+            )
+
+    def test_solve(self) -> None:
+        """Solutions win the simulated game, without missed inputs"""
+        for solution in [
+            self.solution,
+            action_optimization.optimize(TEST_BOARD, self.solution),
+        ]:
+            game = simulation.SimulatedInput(TEST_BOARD, self.conf, offset=(3, 4))
+            self._play(game, solution, offset=(3, 4))
+            self.assertTrue(game.board.solved())
+            self.assertEqual(game.missed, 0)
+            self.assertGreater(game.time, 0)
+        self.assertFalse(TEST_BOARD.solved())
+
+    def test_slow_game(self) -> None:
+        """Input during the animations of the game is ignored"""
+        game = simulation.SimulatedInput(
+            TEST_BOARD, self.conf, timing=simulation.GameTiming(goal=10)
+        )
+        self._play(game, self.solution)
+        self.assertFalse(game.board.solved())
+        self.assertGreater(game.missed, 0)
+
+    def test_missed_drag(self) -> None:
+        """Drags which are no legal move do nothing"""
+        game = simulation.SimulatedInput(TEST_BOARD, self.conf)
+        field = [list(column) for column in game.board.field]
+        clicker.drag((0, 0), (5, 5), backend=game)
+        self.assertEqual(game.board.field, field)
+        self.assertEqual(game.missed, 1)
+        self.assertAlmostEqual(game.time, clicker.DRAG_DURATION)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Contains the SolutionCacheTest class"""
+import copy
+import tempfile
+import unittest
+from pathlib import Path
+
+from shenzhen_solitaire.solver import solver
+from shenzhen_solitaire.solver.batch import solve_many
+from shenzhen_solitaire.solver.solution_cache import SolutionCache
+
+from .boards import TEST_BOARD
+
+
+class SolutionCacheTest(unittest.TestCase):
+    """Tests the persistent solution cache"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "solutions.sqlite"
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_permuted_board(self) -> None:
+        """Tests that a solution is found for a board with reordered columns"""
+        solution = next(solver.solve(TEST_BOARD))
+        with SolutionCache(self.path) as cache:
+            cache.put(TEST_BOARD, solution, 1.5)
+        real_board = copy.deepcopy(TEST_BOARD)
+        real_board.field = real_board.field[::-1]
+        with SolutionCache(self.path) as cache:
+            cached = cache.get(real_board)
+        assert cached is not None
+        cached_solution, duration = cached
+        self.assertEqual(1.5, duration)
+        for action in cached_solution:
+            action.apply(real_board)
+            self.assertTrue(real_board.check_correct())
+        self.assertTrue(real_board.solved())
+
+    def test_eviction(self) -> None:
+        """Tests that the least recently used solution is evicted"""
+        solution = next(solver.solve(TEST_BOARD))
+        board_copy = copy.deepcopy(TEST_BOARD)
+        boards = [copy.deepcopy(board_copy)]
+        for action in solution[:2]:
+            action.apply(board_copy)
+            boards.append(copy.deepcopy(board_copy))
+        with SolutionCache(self.path, max_entries=2) as cache:
+            cache.put(boards[0], solution, 1)
+            cache.put(boards[1], solution[1:], 1)
+            self.assertIsNotNone(cache.get(boards[0]))
+            cache.put(boards[2], solution[2:], 1)
+            self.assertEqual(2, len(cache))
+            self.assertIsNotNone(cache.get(boards[0]))
+            self.assertIsNone(cache.get(boards[1]))
+            self.assertIsNotNone(cache.get(boards[2]))
+
+    def test_solve_many(self) -> None:
+        """Tests that the batch solver fills and uses the cache"""
+        with SolutionCache(self.path) as cache:
+            first = list(solve_many([TEST_BOARD], workers=1, cache=cache))
+            second = list(solve_many([TEST_BOARD], workers=1, cache=cache))
+        self.assertFalse(first[0][2].cached)
+        self.assertTrue(second[0][2].cached)
+        self.assertEqual(first[0][2].duration, second[0][2].duration)
@@ -1,8 +1,11 @@
 """Contains the SolverTest class"""
 import copy
+import threading
 import unittest
 
-from shenzhen_solitaire.solver import solver
+from shenzhen_solitaire.solver import board_possibilities, solver
+from shenzhen_solitaire.solver.batch import solve_many
+from shenzhen_solitaire.solver.canonical import canonical_board, remap_solution
 
 from .boards import TEST_BOARD
 
@@ -21,3 +24,79 @@ class SolverTest(unittest.TestCase):
                 action.apply(board_copy)
                 self.assertTrue(board_copy.check_correct())
             self.assertTrue(board_copy.solved())
+
+    def test_undo(self) -> None:
+        """Tests that undoing an action restores the board"""
+        board_copy = copy.deepcopy(TEST_BOARD)
+        board_id = board_copy.state_identifier
+        for action in list(board_possibilities.possible_actions(board_copy)):
+            action.apply(board_copy)
+            self.assertNotEqual(board_id, board_copy.state_identifier)
+            action.undo(board_copy)
+            self.assertEqual(board_id, board_copy.state_identifier)
+
+    def test_best_first(self) -> None:
+        """Tests the best first solver"""
+        board_copy = copy.deepcopy(TEST_BOARD)
+        stats = solver.SolverStats()
+        solution = next(solver.best_first_solve(TEST_BOARD, weight=3, stats=stats))
+        self.assertFalse(stats.timed_out)
+        for action in solution:
+            action.apply(board_copy)
+            self.assertTrue(board_copy.check_correct())
+        self.assertTrue(board_copy.solved())
+
+    def test_node_budget(self) -> None:
+        """Tests that the best first solver stops after its node budget"""
+        stats = solver.SolverStats()
+        solutions = list(
+            solver.best_first_solve(TEST_BOARD, node_budget=10, stats=stats)
+        )
+        self.assertListEqual([], solutions)
+        self.assertTrue(stats.timed_out)
+
+    def test_anytime(self) -> None:
+        """Tests that the anytime solver yields cheaper and cheaper solutions"""
+        costs = []
+        for solution in solver.anytime_solve(TEST_BOARD, 2):
+            board_copy = copy.deepcopy(TEST_BOARD)
+            for action in solution:
+                action.apply(board_copy)
+            self.assertTrue(board_copy.solved())
+            costs.append(sum(solver.action_cost(action) for action in solution))
+        self.assertGreater(len(costs), 0)
+        self.assertListEqual(sorted(set(costs), reverse=True), costs)
+
+    def test_anytime_cancel(self) -> None:
+        """Tests that the anytime solver stops once cancelled"""
+        cancel = threading.Event()
+        cancel.set()
+        stats = solver.SolverStats()
+        solutions = list(
+            solver.anytime_solve(TEST_BOARD, 60, cancel=cancel, stats=stats)
+        )
+        self.assertListEqual([], solutions)
+        self.assertTrue(stats.timed_out)
+
+    def test_canonical(self) -> None:
+        """Tests solving the canonical board and translating the solution back"""
+        real_board = copy.deepcopy(TEST_BOARD)
+        real_board.field = real_board.field[::-1]
+        canonical, columns, bunker = canonical_board(real_board)
+        solution = next(solver.solve(canonical, canonical=True))
+        for action in remap_solution(real_board, solution, columns, bunker):
+            action.apply(real_board)
+            self.assertTrue(real_board.check_correct())
+        self.assertTrue(real_board.solved())
+
+    def test_solve_many(self) -> None:
+        """Tests solving boards in a process pool"""
+        results = list(solve_many([TEST_BOARD, TEST_BOARD], workers=2))
+        self.assertListEqual([0, 1], sorted(index for index, _, _ in results))
+        for _, solution, stats in results:
+            assert solution is not None
+            self.assertGreater(stats.nodes, 0)
+            board_copy = copy.deepcopy(TEST_BOARD)
+            for action in solution:
+                action.apply(board_copy)
+            self.assertTrue(board_copy.solved())
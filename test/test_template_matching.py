@@ -0,0 +1,75 @@
+"""Contains the TemplateMatchingTest class"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+from shenzhen_solitaire.card_detection import board_parser, card_finder
+from shenzhen_solitaire.card_detection.template_matching import (
+    TemplateStack,
+    match_each,
+    stackable,
+)
+
+
+class TemplateMatchingTest(unittest.TestCase):
+    """Tests matching stacked templates against cv2.matchTemplate"""
+
+    def test_same_as_cv2(self) -> None:
+        """Batched scores are the scores of cv2.matchTemplate"""
+        image = cv2.imread("pictures/20190809172206_1.jpg")
+        conf = configuration.load("test_config.zip")
+        squares = card_finder.get_field_squares(
+            image,
+            board_parser.fake_adjustment(conf.field_adjustment),
+            count_x=5,
+            count_y=8,
+        )
+        templates = [template for template, _ in conf.catalogue]
+        scores = TemplateStack(templates).match(squares)
+        self.assertEqual(scores.shape, (len(squares), len(templates)))
+        for square, square_scores in zip(squares, scores):
+            expected = [
+                board_parser.match_template(template, square) for template in templates
+            ]
+            np.testing.assert_allclose(square_scores, expected, atol=1e-2)
+            self.assertEqual(np.argmax(square_scores), np.argmax(expected))
+
+    def test_candidates(self) -> None:
+        """Matching some templates gives their scores of matching all templates"""
+        rng = np.random.default_rng(1)
+        templates = list(rng.integers(0, 255, (6, 4, 5, 3), dtype=np.uint8))
+        images = list(rng.integers(0, 255, (3, 9, 8, 3), dtype=np.uint8))
+        stack = TemplateStack(templates)
+        candidates = np.array([[5, 0], [2, 2], [1, 4]])
+        np.testing.assert_allclose(
+            stack.match_candidates(images, candidates),
+            np.take_along_axis(stack.match(images), candidates, axis=1),
+            rtol=1e-5,
+        )
+
+    def test_match_each(self) -> None:
+        """Templates of different sizes are matched one by one"""
+        rng = np.random.default_rng(2)
+        templates = list(rng.integers(0, 255, (3, 4, 5, 3), dtype=np.uint8))
+        images = list(rng.integers(0, 255, (2, 9, 8, 3), dtype=np.uint8))
+        np.testing.assert_allclose(
+            match_each(templates, images),
+            TemplateStack(templates).match(images),
+            atol=1e-4,
+        )
+        templates.append(templates[0][1:, 1:])
+        self.assertFalse(stackable(templates))
+        self.assertFalse(stackable([]))
+        self.assertEqual(match_each(templates, images).shape, (2, 4))
+        self.assertEqual(match_each([], images).shape, (2, 0))
+
+    def test_flat_images(self) -> None:
+        """Flat windows are handled like cv2.matchTemplate does"""
+        rng = np.random.default_rng(0)
+        template = rng.integers(0, 255, (4, 5, 3), dtype=np.uint8)
+        flat = np.full((8, 8, 3), 100, dtype=np.uint8)
+        score = TemplateStack([template]).match([flat])[0, 0]
+        self.assertAlmostEqual(score, board_parser.match_template(template, flat))
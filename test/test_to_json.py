@@ -0,0 +1,35 @@
+"""Contains the ToJsonTest class"""
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+from tools import to_json
+
+
+class ToJsonTest(unittest.TestCase):
+    """Tests the batch mode of the json tool"""
+
+    def test_parse_files(self) -> None:
+        """Every image gets a line, images which cannot be parsed an error"""
+        conf = configuration.load("test_config.zip")
+        picture = "pictures/20190809172206_1.jpg"
+        with tempfile.TemporaryDirectory() as directory:
+            small = str(Path(directory) / "small.png")
+            cv2.imwrite(small, np.zeros((10, 10, 3), dtype=np.uint8))
+            cropped = str(Path(directory) / "cropped.png")
+            cv2.imwrite(cropped, cv2.imread(picture)[:600, :900])
+            missing = str(Path(directory) / "missing.png")
+            paths = [picture, small, cropped, missing]
+            lines = list(to_json.parse_files(paths, conf, workers=1))
+        self.assertEqual([line["path"] for line in lines], paths)
+        self.assertIn("board", lines[0])
+        for line in lines[1:]:
+            self.assertIn("error", line)
+
+
+if __name__ == "__main__":
+    unittest.main()
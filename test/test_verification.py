@@ -0,0 +1,115 @@
+"""Contains the VerificationTest class"""
+import contextlib
+import copy
+import io
+import unittest
+from typing import Any, List, Optional
+
+import shenzhen_solitaire.card_detection.configuration as configuration
+import shenzhen_solitaire.clicker as clicker
+from shenzhen_solitaire.board import Board
+from shenzhen_solitaire.capture import FileCapture
+from shenzhen_solitaire.card_detection.board_parser import parse_board
+from shenzhen_solitaire.clicker import simulation, verification
+from shenzhen_solitaire.solver import solver
+from shenzhen_solitaire.solver.board_actions import Action
+
+from .boards import TEST_BOARD
+
+
+class _DroppingInput(simulation.SimulatedInput):
+    """Simulated game, which loses the drag with the given number"""
+
+    def __init__(self, *args: Any, drop: int, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.drop = drop
+        self.releases = 0
+
+    def mouse_up(self) -> None:
+        self.releases += 1
+        if self.releases == self.drop:
+            # Released outside of the game
+            self.move_to(-100, -100)
+        super().mouse_up()
+
+
+def _solve(board: Board) -> Optional[List[Action]]:
+    return next(solver.best_first_solve(board, weight=3), None)
+
+
+class VerificationTest(unittest.TestCase):
+    """Tests executing solutions with checks of the simulated game"""
+
+    def setUp(self) -> None:
+        self.conf = configuration.load("test_config.zip")
+        solution = _solve(TEST_BOARD)
+        assert solution is not None
+        self.solution = solution
+
+    def _play(self, game: simulation.SimulatedInput, verify: bool) -> bool:
+        stats = verification.VerificationStats()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not verify:
+                clicker.handle_actions(
+                    [action.to_json_struct() for action in self.solution],
+                    (0, 0),
+                    self.conf,
+                    backend=game,
+                )
+                return game.board.solved()
+            self.assertTrue(
+                verification.handle_actions(
+                    self.solution,
+                    TEST_BOARD,
+                    (0, 0),
+                    self.conf,
+                    lambda full: copy.deepcopy(game.board),
+                    _solve,
+                    backend=game,
+                    stats=stats,
+                )
+            )
+        self.assertGreater(stats.checks, 0)
+        self.assertEqual(stats.divergences, game.missed)
+        return game.board.solved()
+
+    def test_verified(self) -> None:
+        """A missed drag loses the game, unless the game is checked"""
+        self.assertTrue(
+            self._play(simulation.SimulatedInput(TEST_BOARD, self.conf), verify=True)
+        )
+        self.assertFalse(
+            self._play(_DroppingInput(TEST_BOARD, self.conf, drop=3), verify=False)
+        )
+        self.assertTrue(
+            self._play(_DroppingInput(TEST_BOARD, self.conf, drop=3), verify=True)
+        )
+
+    def test_same_state(self) -> None:
+        """Dragons in the bunker are equal in any slot"""
+        board = Board.from_json(TEST_BOARD.to_json())
+        self.assertTrue(verification.same_state(board, TEST_BOARD))
+        other = copy.deepcopy(board)
+        other.field[0].pop()
+        self.assertFalse(verification.same_state(board, other))
+        for dragon_board, dragons in [(board, [0, 1]), (other, [1, 0])]:
+            dragon_board.bunker[:2] = [
+                (clicker.DRAGON_SEQUENCE[dragon], 0) for dragon in dragons
+            ]
+        other.field[0] = list(board.field[0])
+        self.assertTrue(verification.same_state(board, other))
+
+    def test_screen_reader(self) -> None:
+        """The board is read again, when the screen changes"""
+        pictures = ["pictures/20190809172206_1.jpg", "pictures/specific/BaiShiny.jpg"]
+        backend = FileCapture(pictures)
+        boards = [parse_board(image, self.conf) for image in backend.images]
+        reader = verification.ScreenReader(backend, self.conf)
+        self.assertTrue(verification.same_state(reader(False), boards[0]))
+        self.assertTrue(verification.same_state(reader(False), boards[1]))
+        self.assertGreater(reader.stats.duration, 0)
+        self.assertTrue(verification.same_state(reader(True), boards[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
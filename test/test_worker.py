@@ -0,0 +1,55 @@
+"""Contains the SolverWorkerTest class"""
+import sys
+import unittest
+from typing import List
+
+from shenzhen_solitaire.solver import solver
+from shenzhen_solitaire.solver.worker import SolverWorker, WorkerError
+
+from .boards import TEST_BOARD
+
+WORKER_COMMAND = [sys.executable, "-m", "shenzhen_solitaire.solver.worker"]
+
+
+def _worker(*arguments: str, max_attempts: int = 2) -> SolverWorker:
+    return SolverWorker(WORKER_COMMAND + list(arguments), max_attempts=max_attempts)
+
+
+class SolverWorkerTest(unittest.TestCase):
+    """Tests the solver worker client with the python worker"""
+
+    def setUp(self) -> None:
+        self.expected = [
+            action.to_json_struct() for action in next(solver.solve(TEST_BOARD))
+        ]
+
+    def test_solve(self) -> None:
+        """Tests solving several boards at once"""
+        with _worker() as worker:
+            futures = [worker.submit(TEST_BOARD) for _ in range(3)]
+            results: List[object] = [future.result(timeout=30) for future in futures]
+        self.assertListEqual([self.expected] * 3, results)
+
+    def test_timeout(self) -> None:
+        """Tests that a stuck worker is restarted"""
+        with _worker("--delay", "1") as worker:
+            with self.assertRaises(TimeoutError):
+                worker.solve(TEST_BOARD, timeout=0.2)
+            self.assertEqual(1, worker.restarts)
+            self.assertListEqual(self.expected, worker.solve(TEST_BOARD, timeout=30))
+
+    def test_crash(self) -> None:
+        """Tests that outstanding requests are sent again after a crash"""
+        with _worker("--crash-after", "1", max_attempts=3) as worker:
+            futures = [worker.submit(TEST_BOARD, timeout=30) for _ in range(3)]
+            for future in futures:
+                self.assertListEqual(self.expected, future.result(timeout=30))
+            self.assertGreaterEqual(worker.restarts, 2)
+
+    def test_max_attempts(self) -> None:
+        """Tests that requests fail once the worker died too often"""
+        with _worker("--crash-after", "1", max_attempts=1) as worker:
+            futures = [worker.submit(TEST_BOARD, timeout=30) for _ in range(2)]
+            self.assertListEqual(self.expected, futures[0].result(timeout=30))
+            with self.assertRaises(WorkerError):
+                futures[1].result(timeout=30)
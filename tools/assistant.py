@@ -1,19 +1,30 @@
 import argparse
+import asyncio
+import functools
 import os
-import subprocess
-import tempfile
 import time
-from pathlib import Path
-from typing import List, Dict, Any
-import json
-import cv2
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 import pyautogui
 
 import shenzhen_solitaire.card_detection.configuration as configuration
 import shenzhen_solitaire.clicker as clicker
 from shenzhen_solitaire.board import Board
+from shenzhen_solitaire.capture import (
+    CaptureBackend,
+    RegionCapture,
+    ScreenCapture,
+    ScreenWait,
+    WaitStats,
+    board_region,
+)
 from shenzhen_solitaire.card_detection.board_parser import parse_start_board
+from shenzhen_solitaire.clicker import verification
+from shenzhen_solitaire.pipeline import LatencyStats, Pipeline, Stage
+from shenzhen_solitaire.solver import action_optimization, solver
+from shenzhen_solitaire.solver.board_actions import Action
+from shenzhen_solitaire.solver.solution_cache import SolutionCache, decode_actions
+from shenzhen_solitaire.solver.worker import SolverWorker, WorkerError
 
 OFFSET = (0, 0)
 # SIZE = (2560, 1440)
@@ -26,37 +37,208 @@ UNSOLVED_DIR = "E:/shenzhen-solitaire/unsolved"
 SOLVER_PATH = (
     "/home/lukas/documents/coding/rust/shenzhen-solitaire/target/release/solver"
 )
+SOLVE_TIMEOUT = 60
+SOLUTION_CACHE_SIZE = 10000
+# Dealing a new game pauses between cards, so the board settles only after longer
+NEW_GAME_SETTLE_POLLS = 15
 
 
-def extern_solve(board: Board) -> List[Dict[str, Any]]:
-    result = subprocess.run(
-        [SOLVER_PATH], input=board.to_json(), capture_output=True, text=True, check=True
-    )
-    return json.loads(result.stdout)
+def extern_solve(board: Board, worker: SolverWorker) -> List[Dict[str, Any]]:
+    return worker.solve(board)
+
+
+def intern_solve(
+    board: Board,
+    cache: Optional[SolutionCache] = None,
+    anytime_budget: Optional[float] = None,
+    optimize: bool = False,
+) -> List[Dict[str, Any]]:
+    stats = solver.SolverStats()
+    solution = None
+    if anytime_budget is not None:
+        for solution in solver.anytime_solve(board, anytime_budget, stats=stats):
+            print(f"Found solution with {len(solution)} steps")
+    if solution is None:
+        solution = next(solver.solve(board, timeout=SOLVE_TIMEOUT, stats=stats), None)
+    if solution is None:
+        raise RuntimeError("Could not solve board")
+    if optimize:
+        solution = action_optimization.optimize(board, solution)
+    if cache is not None:
+        cache.put(board, solution, stats.duration)
+    return [action.to_json_struct() for action in solution]
+
+
+def take_screenshot(capture: CaptureBackend) -> np.ndarray:
+    print("Taking screenshot")
+    return capture.capture()
+
+
+class SolveStage:
+    """Solves boards with the cache, the external or the python solver
+
+    The cache and the external solver are opened by `warm`,
+    in the thread of the stage, while the first board is captured.
+    The cache is only used from that thread, like sqlite requires.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        use_extern: bool = False,
+        anytime_budget: Optional[float] = None,
+        optimize: bool = False,
+    ) -> None:
+        self.cache_path = cache_path
+        self.use_extern = use_extern
+        self.anytime_budget = anytime_budget
+        self.optimize = optimize
+        self.cache: Optional[SolutionCache] = None
+        self.worker: Optional[SolverWorker] = None
 
+    def warm(self) -> None:
+        if self.cache_path is not None and self.cache is None:
+            self.cache = SolutionCache(self.cache_path, SOLUTION_CACHE_SIZE)
+        if self.use_extern and self.worker is None:
+            self.worker = SolverWorker([SOLVER_PATH, "--serve"], timeout=SOLVE_TIMEOUT)
 
-def take_screenshot():
-    with tempfile.TemporaryDirectory(prefix="shenzhen_solitaire") as screenshot_dir:
-        print("Taking screenshot")
-        screenshot_file = Path(screenshot_dir) / "screenshot.png"
-        screenshot = pyautogui.screenshot(region=(*OFFSET, *SIZE))
-        screenshot.save(screenshot_file)
-        image = cv2.imread(str(screenshot_file))
-    return image
+    def __call__(self, board: Board) -> Tuple[Board, List[Dict[str, Any]]]:
+        self.warm()
+        cached = self.cache.get(board) if self.cache is not None else None
+        if cached is not None:
+            print(f"Found cached solution, originally solved in {cached[1]:.2f}s")
+            actions = [action.to_json_struct() for action in cached[0]]
+        elif self.worker is not None:
+            actions = extern_solve(board, self.worker)
+        else:
+            actions = intern_solve(
+                board, self.cache, self.anytime_budget, self.optimize
+            )
+        print(actions)
+        print(f"Solved in {len(actions)} steps")
+        return board, actions
 
+    def resolve(self, board: Board) -> Optional[List[Action]]:
+        """Solve a board in the middle of a game, without the cache
 
-def solve(conf: configuration.Configuration) -> None:
-    image = take_screenshot()
-    board = parse_start_board(image, conf)
+        Called by the play stage, the cache belongs to the thread of this stage.
+        """
+        if self.worker is not None:
+            try:
+                return decode_actions(board, extern_solve(board, self.worker))
+            except (WorkerError, TimeoutError):
+                return None
+        solution = next(solver.solve(board, timeout=SOLVE_TIMEOUT), None)
+        if solution is not None and self.optimize:
+            solution = action_optimization.optimize(board, solution)
+        return solution
+
+
+def parse(conf: configuration.Configuration, image: np.ndarray) -> Board:
+    board = parse_start_board(image, conf, decode=True)
     assert board.check_correct()
-    actions = extern_solve(board)
-    print(actions)
-    print(f"Solved in {len(actions)} steps")
-    clicker.handle_actions(actions, OFFSET, conf)
-    print("Solved")
-    time.sleep(2)
-    clicker.click(NEW_BUTTON, OFFSET)
-    time.sleep(7)
+    return board
+
+
+def play(
+    conf: configuration.Configuration,
+    waiter: Optional[ScreenWait],
+    reader: Optional[verification.ScreenReader],
+    solve_stage: SolveStage,
+    stats: verification.VerificationStats,
+    solved: Tuple[Board, List[Dict[str, Any]]],
+) -> None:
+    board, actions = solved
+    decoded = decode_actions(board, actions) if reader is not None else None
+    if decoded is None:
+        clicker.handle_actions(actions, OFFSET, conf, waiter)
+        print("Solved")
+        return
+    won = verification.handle_actions(
+        decoded,
+        board,
+        OFFSET,
+        conf,
+        reader,
+        solve_stage.resolve,
+        waiter=waiter,
+        stats=stats,
+    )
+    print("Solved" if won else "Gave up the game")
+    print(
+        f"Checked the game {stats.checks} times in {stats.duration:.2f}s, "
+        f"{stats.divergences} times it differed from the solution"
+    )
+
+
+def new_game(
+    conf: configuration.Configuration,
+    waiter: Optional[ScreenWait],
+    stats: LatencyStats,
+    _: None,
+) -> None:
+    if waiter is None:
+        time.sleep(2)
+        clicker.click(NEW_BUTTON, OFFSET)
+        time.sleep(7)
+    else:
+        # Wait for the end of the animation of the won game, then for the new deal
+        board = [board_region(conf)]
+        waiter.wait(
+            board, timeout=2, changed=False, settle_polls=NEW_GAME_SETTLE_POLLS
+        )
+        clicker.click(
+            NEW_BUTTON,
+            OFFSET,
+            waiter,
+            board,
+            timeout=clicker.CLICK_DURATION / 3 + clicker.DRAGON_WAIT + 7,
+            settle_polls=NEW_GAME_SETTLE_POLLS,
+        )
+        if waiter.stats is not None:
+            print(
+                f"Waited {waiter.stats.duration:.2f}s for the screen in total, "
+                f"{waiter.stats.timeouts} of {waiter.stats.waits} waits timed out"
+            )
+    print(stats.summary())
+
+
+def pipeline(
+    conf: configuration.Configuration,
+    capture: CaptureBackend,
+    solve_stage: SolveStage,
+    waiter: Optional[ScreenWait] = None,
+    stats: Optional[LatencyStats] = None,
+    reader: Optional[verification.ScreenReader] = None,
+) -> Pipeline:
+    """Returns the stages of the assistant, one game passes them from start to end
+
+    The pipeline is run with feedback, every new game is captured again.
+    With `reader`, the game is checked before every input and solved again
+    if it differs from the solution, see `verification.handle_actions`.
+    """
+    if stats is None:
+        stats = LatencyStats()
+    return Pipeline(
+        [
+            Stage("capture", lambda _: take_screenshot(capture)),
+            Stage("parse", functools.partial(parse, conf)),
+            Stage("solve", solve_stage, warm=solve_stage.warm),
+            Stage(
+                "play",
+                functools.partial(
+                    play,
+                    conf,
+                    waiter,
+                    reader,
+                    solve_stage,
+                    verification.VerificationStats(),
+                ),
+            ),
+            Stage("new game", functools.partial(new_game, conf, waiter, stats)),
+        ],
+        stats=stats,
+    )
 
 
 def main() -> None:
@@ -72,14 +254,73 @@ def main() -> None:
         action="store_false",
         help="Enable 0.1 second delay between all actions to allow user to interrupt",
     )
+    parser.add_argument(
+        "--extern",
+        dest="use_extern",
+        action="store_true",
+        help="Use the external rust solver instead of the python solver",
+    )
+    parser.add_argument(
+        "--cache",
+        dest="cache_path",
+        type=str,
+        default=None,
+        help="Solution cache database, solutions of the python solver are stored there",
+    )
+    parser.add_argument(
+        "--anytime",
+        dest="anytime_budget",
+        type=float,
+        default=None,
+        help="Spend this many seconds looking for shorter solutions",
+    )
+    parser.add_argument(
+        "--optimize",
+        dest="optimize",
+        action="store_true",
+        help="Remove unnecessary moves from solutions of the python solver",
+    )
+    parser.add_argument(
+        "--full-capture",
+        dest="full_capture",
+        action="store_true",
+        help="Capture the whole game instead of the region read by the parser",
+    )
+    parser.add_argument(
+        "--wait-for-screen",
+        dest="wait_for_screen",
+        action="store_true",
+        help="Continue as soon as the screen settled after every action, "
+        "instead of waiting fixed durations",
+    )
+    parser.add_argument(
+        "--verify",
+        dest="verify",
+        action="store_true",
+        help="Check the game before every move and solve it again "
+        "if a move was missed, best used with --wait-for-screen",
+    )
     args = parser.parse_args()
 
     if not args.no_failsafe:
         pyautogui.PAUSE = 0
     time.sleep(3)
     conf = configuration.load(args.config_path)
-    while True:
-        solve(conf)
+    capture: CaptureBackend = ScreenCapture(OFFSET, SIZE)
+    if not args.full_capture:
+        capture = RegionCapture.for_configuration(capture, conf)
+    waiter = (
+        ScreenWait(capture, stats=WaitStats()) if args.wait_for_screen else None
+    )
+    solve_stage = SolveStage(
+        args.cache_path, args.use_extern, args.anytime_budget, args.optimize
+    )
+    reader = verification.ScreenReader(capture, conf) if args.verify else None
+    asyncio.run(
+        pipeline(conf, capture, solve_stage, waiter, reader=reader).run(
+            [None], feedback=True
+        )
+    )
 
 
 if __name__ == "__main__":
@@ -89,19 +89,21 @@ def debug_match(
     image: np.array,
     image_type: Union[NumberCard, SpecialCard],
     catalogue: List[Tuple[Any, Union[SpecialCard, NumberCard]]],
+    catalogue_contours: List[np.ndarray],
 ) -> None:
     cnt1 = prepare_image(image)
     i1_matches = []
-    for index, (template_image, template_type) in enumerate(catalogue):
-        cnt2 = prepare_image(template_image)
+    for index, ((_, template_type), cnt2) in enumerate(
+        zip(catalogue, catalogue_contours)
+    ):
         i1_matches.append((template_type, matchScaleInvShape(cnt1, cnt2), index))
     i1_matches = sorted(i1_matches, key=lambda x: x[1])
     correct_type_index = check_type(i1_matches, image_type)
     if correct_type_index is not None:
         show_wrong_images(
             cnt1,
-            prepare_image(catalogue[correct_type_index][0]),
-            prepare_image(catalogue[i1_matches[0][2]][0]),
+            catalogue_contours[correct_type_index],
+            catalogue_contours[i1_matches[0][2]],
         )
         return
     for list_type, list_value, list_index in i1_matches:
@@ -122,8 +124,10 @@ def main() -> None:
     laptop = configuration.load("laptop_conf.zip")
     bla = [(i, t) for i, t in pc.catalogue if t == SpecialCard.Hua]
     # bla = pc.catalogue
+    # The catalogue is prepared once, not for every image
+    laptop_contours = [prepare_image(image) for image, _ in laptop.catalogue]
     for pc_image, pc_card_type in bla:
-        debug_match(pc_image, pc_card_type, laptop.catalogue)
+        debug_match(pc_image, pc_card_type, laptop.catalogue, laptop_contours)
 
 
 if __name__ == "__main__":
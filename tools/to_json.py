@@ -1,25 +1,108 @@
 import argparse
-import sys
+import functools
+import glob
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
 
 import cv2
 
 import shenzhen_solitaire.card_detection.configuration as configuration
 from shenzhen_solitaire.card_detection.board_parser import parse_board, parse_start_board
+from shenzhen_solitaire.card_detection.parser_service import ParserService
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp"}
+
+def find_images(pattern: str) -> List[str]:
+    """Returns the images in a directory, or the files matching a glob pattern"""
+    if os.path.isdir(pattern):
+        return sorted(
+            str(path)
+            for path in Path(pattern).iterdir()
+            if path.suffix.lower() in IMAGE_EXTENSIONS
+        )
+    return sorted(glob.glob(pattern, recursive=True))
+
+
+def _parse_file(
+    conf: configuration.Configuration, path: str, *, simple: bool
+) -> Dict[str, Any]:
+    """Returns the json struct of the line of an image"""
+    start_time = time.time()
+    image = cv2.imread(path)
+    if image is None:
+        return {"path": path, "error": "Could not read image"}
+    try:
+        if simple:
+            board = parse_start_board(image, conf)
+        else:
+            board = parse_board(image, conf)
+    except (AssertionError, cv2.error, ValueError, IndexError) as error:
+        # E.g. cropped images, whose squares are outside of the image
+        return {"path": path, "error": f"Could not parse board: {error!r}"}
+    return {
+        "path": path,
+        "board": json.loads(board.to_json()),
+        "duration": time.time() - start_time,
+        "valid": board.check_correct(),
+    }
+
+
+def parse_files(
+    paths: List[str],
+    conf: configuration.Configuration,
+    *,
+    simple: bool = False,
+    workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Parse the images in worker processes, yields their lines in order
+
+    The workers share the configuration, see `ParserService`.
+    """
+    with ParserService(conf, workers) as service:
+        yield from service.map(
+            functools.partial(_parse_file, simple=simple), paths, chunksize=4
+        )
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Parse board to json")
-    parser.add_argument("board_path", type=str, help="Path to image of board")
+    parser.add_argument(
+        "board_path",
+        type=str,
+        help="Path to image of board, or a directory or glob pattern of images "
+        "to print a json line for every image",
+    )
     parser.add_argument(
         "--config", dest="config_path", type=str, help="Config path",
     )
     parser.add_argument("--simple", action="store_true", help="Parse a start board, use when config is not complete")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes for directories, default is one per core",
+    )
 
     args = parser.parse_args()
-    image = cv2.imread(args.board_path)
-
     conf = configuration.load(args.config_path)
 
+    if not os.path.isfile(args.board_path):
+        paths = find_images(args.board_path)
+        if not paths:
+            parser.error(f"No images found at {args.board_path}")
+        for line in parse_files(
+            paths,
+            conf,
+            simple=args.simple,
+            workers=args.workers,
+        ):
+            print(json.dumps(line), flush=True)
+        return
+
+    image = cv2.imread(args.board_path)
     if args.simple:
         print(parse_start_board(image, conf).to_json())
     else: